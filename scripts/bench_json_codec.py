@@ -0,0 +1,69 @@
+"""Microbenchmark: stdlib JSON vs the orjson codec layer used by the app.
+
+Run from the repository root:
+
+    PYTHONPATH=src python scripts/bench_json_codec.py
+"""
+
+import json
+import timeit
+
+from fastapi.responses import JSONResponse
+
+import json_codec
+from models.proxy import ProxyRequest
+
+REQUEST_BODY = b'{"message": "test message", "name": "test name", "test_number": 42}'
+UPSTREAM_BODY = json.dumps(
+    {
+        "args": {},
+        "data": REQUEST_BODY.decode(),
+        "files": {},
+        "form": {},
+        "headers": {
+            "Accept": "*/*",
+            "Content-Type": "application/json",
+            "Host": "httpbin.org",
+            "User-Agent": "python-httpx/0.28.1",
+        },
+        "json": json.loads(REQUEST_BODY),
+        "origin": "203.0.113.7",
+        "url": "https://httpbin.org/post",
+    }
+).encode()
+UPSTREAM_CONTENT = json.loads(UPSTREAM_BODY)
+
+CASES = {
+    "decode ProxyRequest body": (
+        lambda: ProxyRequest.model_validate(json.loads(REQUEST_BODY)),
+        lambda: ProxyRequest.model_validate(json_codec.loads(REQUEST_BODY)),
+    ),
+    "decode upstream body": (
+        lambda: json.loads(UPSTREAM_BODY),
+        lambda: json_codec.loads(UPSTREAM_BODY),
+    ),
+    "render upstream response": (
+        lambda: JSONResponse(UPSTREAM_CONTENT),
+        lambda: json_codec.ORJSONResponse(UPSTREAM_CONTENT),
+    ),
+    "render greeting response": (
+        lambda: JSONResponse({"message": "Hello, World, I'm version 1!"}),
+        lambda: json_codec.ORJSONResponse({"message": "Hello, World, I'm version 1!"}),
+    ),
+}
+
+
+def best_of(func, number=20_000, repeat=5) -> float:
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    print(f"{'case':<28}{'stdlib (us)':>14}{'orjson (us)':>14}{'speedup':>10}")
+    for name, (baseline, candidate) in CASES.items():
+        before = best_of(baseline) * 1e6
+        after = best_of(candidate) * 1e6
+        print(f"{name:<28}{before:>14.2f}{after:>14.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
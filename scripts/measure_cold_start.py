@@ -0,0 +1,187 @@
+"""Measure cold-start time: from spawning the server to its first healthy response.
+
+Each run copies ``src/`` to a fresh directory and starts ``python app.py`` there,
+as the container does, then polls ``/health`` until it answers 200. By default
+the copy is precompiled, like the image; ``--no-bytecode`` leaves it without
+``.pyc`` files so that every run compiles the application from source. Once the
+server is up, the phases it reports in ``app_startup_seconds`` are collected
+too. Environment variables (e.g. ``FASTAPI_COLD_START_MODE=true``) are passed
+through to the server.
+
+With ``--importtime``, each run also imports the app under ``python -X
+importtime`` and the slowest of the app's own top-level imports are listed,
+cumulative time included. This is kept apart from the timed start because
+``-X importtime`` slows imports down.
+
+Run from the repository root:
+
+    python scripts/measure_cold_start.py --runs 10
+    python scripts/measure_cold_start.py --runs 10 --no-bytecode
+    python scripts/measure_cold_start.py --runs 10 --importtime
+"""
+
+import argparse
+import compileall
+import http.client
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+PHASE_SAMPLE = re.compile(r'^app_startup_seconds\{phase="([^"]+)"\} (\S+)$', re.M)
+# "import time: <self us> | <cumulative us> | <module>", the module name
+# indented by two spaces per level of nesting
+IMPORT_TIME = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$", re.M)
+SLOWEST_IMPORTS = 15
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int, path: str) -> tuple[int, bytes]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def prepare(workdir: Path, bytecode: bool) -> Path:
+    app_dir = workdir / "app"
+    shutil.copytree(SRC, app_dir, ignore=shutil.ignore_patterns("__pycache__"))
+    if bytecode:
+        compileall.compile_dir(app_dir, quiet=1)
+    return app_dir
+
+
+def app_imports(app_dir: Path, env: dict) -> dict[str, float]:
+    """Seconds spent in each top-level import of ``app``, from ``-X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=app_dir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    # A module's imports are listed one level in, just before the module itself
+    children: dict[str, float] = {}
+    for cumulative, indent, module in IMPORT_TIME.findall(result.stderr):
+        if len(indent) == 2:
+            children[module] = int(cumulative) / 1e6
+        elif not indent:
+            if module == "app":
+                return children
+            children = {}
+    return {}
+
+
+def measure_once(
+    bytecode: bool, timeout: float, importtime: bool = False
+) -> tuple[float, dict[str, float], dict[str, float]]:
+    """
+    Return seconds until the first healthy response, the reported phases and,
+    with ``importtime``, the seconds spent in each of the app's imports.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        app_dir = prepare(Path(workdir), bytecode)
+        port = free_port()
+        env = {**os.environ, "UVICORN_PORT": str(port), "UVICORN_WORKERS": "1"}
+        if not bytecode:
+            env["PYTHONDONTWRITEBYTECODE"] = "1"
+        imports = app_imports(app_dir, env) if importtime else {}
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "app.py"],
+            cwd=app_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"Server not healthy after {timeout}s")
+                try:
+                    status, _ = get(port, "/health")
+                except OSError:
+                    status = None
+                if status == 200:
+                    break
+                time.sleep(0.002)
+            elapsed = time.perf_counter() - started
+            _, metrics = get(port, "/metrics")
+            phases = {
+                phase: float(value)
+                for phase, value in PHASE_SAMPLE.findall(metrics.decode())
+            }
+            return elapsed, phases, imports
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--no-bytecode",
+        action="store_true",
+        help="start from source only, as an image without precompiled bytecode",
+    )
+    parser.add_argument(
+        "--importtime",
+        action="store_true",
+        help="also list the slowest imports of the app, from python -X importtime",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    totals = []
+    phases: dict[str, list[float]] = {}
+    imports: dict[str, list[float]] = {}
+    for run in range(1, args.runs + 1):
+        elapsed, reported, imported = measure_once(
+            not args.no_bytecode, args.timeout, args.importtime
+        )
+        totals.append(elapsed)
+        for phase, value in reported.items():
+            phases.setdefault(phase, []).append(value)
+        for module, value in imported.items():
+            imports.setdefault(module, []).append(value)
+        print(f"run {run}: first healthy response after {elapsed * 1000:.0f} ms")
+
+    print(
+        f"\ncold start over {args.runs} runs: "
+        f"median {statistics.median(totals) * 1000:.0f} ms, "
+        f"min {min(totals) * 1000:.0f} ms, max {max(totals) * 1000:.0f} ms"
+    )
+    if phases:
+        print("median phases reported by the app:")
+        for phase, values in phases.items():
+            print(f"  {phase:<18} {statistics.median(values) * 1000:8.1f} ms")
+    if imports:
+        medians = {module: statistics.median(v) for module, v in imports.items()}
+        slowest = sorted(medians.items(), key=lambda item: -item[1])
+        print("median time of the slowest imports of app (-X importtime):")
+        for module, seconds in slowest[:SLOWEST_IMPORTS]:
+            print(f"  {module:<40} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
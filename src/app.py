@@ -1,49 +1,196 @@
 """FastAPI application factory and server configuration."""
+
+# Imported first so that the startup timeline covers the imports below
+from startup import timeline
+
 import logging
+import os
+from contextlib import asynccontextmanager
+from functools import partial
+
+# Each group of imports is timed as its own "import:<group>" phase; a module
+# shared by several groups is counted in the first one that imports it, so
+# the groups go from the lowest layer up
+with timeline.import_group("fastapi"):
+    from fastapi import FastAPI
+    # from x35_json_logging import initialize_logging
 
-import uvicorn
-from fastapi import FastAPI
-#from x35_json_logging import initialize_logging
+    from json_codec import ORJSONResponse
 
+with timeline.import_group("settings"):
+    from settings import settings
 
-from routes.api.v1 import hello as hello_v1
-from routes.api.v1 import req_write_to_bucket
+with timeline.import_group("clients"):
+    from clients.httpx import create_httpx_client
+    from clients.dedup import UploadIndex
+    from clients.formats import create_output_format
+    from clients.gcs_client import GCSBucketClient
+    from clients.storage import create_storage_backend
 
-from settings import settings
+with timeline.import_group("services"):
+    from services.admission import PRIORITY_LANE, create_admission_controller
+    from services.cache import ResponseCache
+    from services.hedging import create_hedger
+    from services.resilience import create_upstream_guard
+    from services.system_metrics import SystemMetricsSampler
+    from services.write_behind import WriteBehindQueue
+
+with timeline.import_group("middleware"):
+    from middleware import AdmissionMiddleware, MetricsMiddleware
+    from multiprocess_metrics import is_multiprocess_mode
+
+with timeline.import_group("routes"):
+    from routes.api.v1 import goodbye as goodbye_v1
+    from routes.api.v1 import hello as hello_v1
+    from routes.api.v1 import req_write_to_bucket
+    from routes.api.v1 import proxy_httpbin
+    from routes.api.v2 import hello as hello_v2
+    from routes.health import (
+        health_router,
+        metrics_router,
+        profile_router,
+        version_router,
+    )
+
+timeline.finish_imports()
 
 # initialize_logging()
 logger = logging.getLogger(f"x35.{__name__}")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and close them cleanly on shutdown."""
+    with timeline.phase("lifespan"):
+        await _startup(app)
+    timeline.publish()
+    try:
+        yield
+    finally:
+        await app.state.sampler.aclose()
+        if app.state.write_behind is not None:
+            await app.state.write_behind.aclose()
+        await app.state.gcs_client.aclose()
+        if app.state.httpx_client is not None:
+            await app.state.httpx_client.aclose()
+        if is_multiprocess_mode():
+            from prometheus_client import multiprocess
+
+            multiprocess.mark_process_dead(os.getpid())
+
+
+async def _startup(app: FastAPI) -> None:
+    app.state.sampler = SystemMetricsSampler(interval=settings.metrics.sampler_interval)
+    app.state.sampler.start()
+    upstream_transport = None
+    if settings.simulator.upstream_enabled:
+        from simulator import create_simulated_transport
+
+        upstream_transport = create_simulated_transport(settings.simulator)
+    app.state.httpx_client_factory = partial(
+        create_httpx_client, settings.upstream, transport=upstream_transport
+    )
+    app.state.httpx_client = None
+    if not settings.fastapi.cold_start_mode:
+        app.state.httpx_client = app.state.httpx_client_factory()
+    app.state.response_cache = None
+    if settings.upstream.cache_enabled:
+        app.state.response_cache = ResponseCache(
+            ttl=settings.upstream.cache_ttl, max_size=settings.upstream.cache_max_size
+        )
+    app.state.upstream_guard = create_upstream_guard(settings.upstream)
+    app.state.hedger = create_hedger(settings.upstream)
+    app.state.gcs_client = GCSBucketClient(
+        settings.gcsbucket.bucket_name,
+        max_workers=settings.gcsbucket.max_workers,
+        backend=create_storage_backend(settings.gcsbucket, settings.simulator),
+        output_format=create_output_format(settings.gcsbucket),
+        dedup_index=(
+            UploadIndex(settings.gcsbucket.dedup_max_entries)
+            if settings.gcsbucket.dedup_enabled
+            else None
+        ),
+        conditional_writes=settings.gcsbucket.conditional_writes,
+    )
+    app.state.write_behind = None
+    if settings.gcsbucket.write_behind_enabled:
+        app.state.write_behind = WriteBehindQueue(
+            app.state.gcs_client,
+            max_queue_size=settings.gcsbucket.write_behind_queue_size,
+            max_batch_count=settings.gcsbucket.write_behind_max_batch_count,
+            max_batch_bytes=settings.gcsbucket.write_behind_max_batch_bytes,
+            max_batch_age=settings.gcsbucket.write_behind_max_batch_age,
+            enqueue_timeout=settings.gcsbucket.write_behind_enqueue_timeout,
+            prefix=settings.gcsbucket.write_behind_prefix,
+            max_retries=settings.gcsbucket.write_behind_max_retries,
+            retry_backoff=settings.gcsbucket.write_behind_retry_backoff,
+            dead_letter_dir=settings.gcsbucket.write_behind_dead_letter_dir or None,
+        )
+        app.state.write_behind.start()
+
+
 def create_app() -> FastAPI:
+    with timeline.phase("create_app"):
+        return _build_app()
+
+
+def _build_app() -> FastAPI:
     app = FastAPI(
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         docs_url="/docs" if settings.fastapi.enable_docs else None,
         redoc_url="/redoc" if settings.fastapi.enable_docs else None,
     )
 
+    if settings.admission.enabled:
+        # Added first so it runs inside MetricsMiddleware, which then counts shed requests
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=create_admission_controller(
+                settings.admission,
+                {
+                    PRIORITY_LANE: [health_router, metrics_router, version_router],
+                    "greetings": [hello_v1.router, goodbye_v1.router, hello_v2.router],
+                    "bucket": [req_write_to_bucket.router],
+                    "proxy": [proxy_httpbin.router],
+                },
+            ),
+        )
+    app.add_middleware(MetricsMiddleware)
+
+    # Health and monitoring routes
+    app.include_router(health_router)
+    app.include_router(metrics_router)
+    app.include_router(version_router)
+    if settings.debug.profiler_enabled:
+        app.include_router(profile_router)
+
     # Application routes
     app.include_router(hello_v1.router)
+    app.include_router(goodbye_v1.router)
+    app.include_router(hello_v2.router)
     app.include_router(req_write_to_bucket.router)
+    app.include_router(proxy_httpbin.router)
 
     return app
 
 
 if __name__ == "__main__":
+    # Only needed to serve, so not imported by workers or tests
+    import uvicorn
+
+    from multiprocess_metrics import enable_multiprocess_mode
+    from process_manager import available_cpus, uvicorn_options
+
     logger.info("Starting FastAPI application")
+    workers = settings.uvicorn.workers or available_cpus()
+    if workers > 1:
+        # Workers are spawned fresh and pick the shared directory up from the environment
+        enable_multiprocess_mode(settings.metrics.multiprocess_dir)
     uvicorn.run(
         "app:create_app",
         factory=True,
-        access_log=settings.uvicorn.access_log,
-        backlog=settings.uvicorn.backlog,
-        host="0.0.0.0",
-        http=settings.uvicorn.http,
-        limit_concurrency=settings.uvicorn.max_concurrency,
-        log_level=settings.uvicorn.log_level,
-        loop=settings.uvicorn.loop,
-        port=settings.uvicorn.port,
-        proxy_headers=settings.uvicorn.proxy_headers,
         reload=settings.uvicorn.reload,
-        server_header=settings.uvicorn.server_header,
-        timeout_keep_alive=settings.uvicorn.keep_alive,
-        workers=settings.uvicorn.workers,
+        workers=workers,
+        **uvicorn_options(settings.uvicorn),
     )
@@ -0,0 +1,48 @@
+"""Bounded index of recently uploaded object contents."""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+
+class IndexEntry(NamedTuple):
+    #: Base64-encoded MD5 of the uploaded bytes.
+    md5: str
+    #: Generation the upload produced, when the backend reports one.
+    generation: int | None
+
+
+class UploadIndex:
+    """
+    Remembers the content hash of the last upload to each object name.
+
+    Only the ``max_entries`` most recently used names are kept, so memory is
+    bounded no matter how many distinct keys are written. A miss only costs
+    an upload that would have happened anyway.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, IndexEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, file_name: str) -> IndexEntry | None:
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is not None:
+                self._entries.move_to_end(file_name)
+            return entry
+
+    def put(self, file_name: str, md5: str, generation: int | None) -> None:
+        with self._lock:
+            self._entries[file_name] = IndexEntry(md5, generation)
+            self._entries.move_to_end(file_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, file_name: str) -> None:
+        with self._lock:
+            self._entries.pop(file_name, None)
@@ -0,0 +1,200 @@
+"""Output formats for objects written by the bucket client.
+
+Batched writes hand a format NDJSON lines (one encoded payload per line).
+The format turns them into a stream of chunks: plain NDJSON, NDJSON
+compressed with gzip or zstd, or Parquet. Encoders yield output
+incrementally, so a large batch is never held uncompressed and compressed at
+the same time. The zstd and Parquet formats need the optional ``zstandard``
+and ``pyarrow`` packages.
+"""
+
+import zlib
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+
+import json_codec
+from settings.gcsbucket import GCSBucketSettings
+
+# Input bytes fed to a compressor between reads of its output
+_COMPRESS_CHUNK_SIZE = 256 * 1024
+
+
+class OutputFormat:
+    """Plain, uncompressed NDJSON batches and JSON single documents."""
+
+    extension = ".ndjson"
+    content_type = "application/x-ndjson"
+    #: Value of the object's Content-Encoding metadata, if any.
+    content_encoding: str | None = None
+    #: Whether ``encode_document`` costs CPU time (compression) and so must
+    #: not run on the event loop. Batches are always encoded on the pool.
+    document_cpu_bound = False
+
+    def encode(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        """Yield the encoded batch object for ``lines``, chunk by chunk."""
+        yield from lines
+
+    def encode_document(self, data: bytes) -> tuple[str, bytes, str | None]:
+        """Return the name suffix, body and Content-Encoding for one JSON document."""
+        return "", data, None
+
+
+class _CompressedNDJSON(OutputFormat, ABC):
+    document_cpu_bound = True
+
+    @abstractmethod
+    def _compressor(self):
+        """Return a fresh compressor object with ``compress`` and ``flush``."""
+
+    def encode(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = self._compressor()
+        pending = []
+        size = 0
+        for line in lines:
+            pending.append(line)
+            size += len(line)
+            if size >= _COMPRESS_CHUNK_SIZE:
+                chunk = compressor.compress(b"".join(pending))
+                pending.clear()
+                size = 0
+                if chunk:
+                    yield chunk
+        if pending:
+            chunk = compressor.compress(b"".join(pending))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+    def encode_document(self, data: bytes) -> tuple[str, bytes, str | None]:
+        suffix = self.extension.removeprefix(".ndjson")
+        return suffix, b"".join(self.encode([data])), self.content_encoding
+
+
+class GzipNDJSON(_CompressedNDJSON):
+    """NDJSON compressed with gzip, stored with ``Content-Encoding: gzip``."""
+
+    extension = ".ndjson.gz"
+    content_encoding = "gzip"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def _compressor(self):
+        # wbits=31 selects the gzip container rather than a raw zlib stream
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+
+class ZstdNDJSON(_CompressedNDJSON):
+    """NDJSON compressed with zstd, stored with ``Content-Encoding: zstd``."""
+
+    extension = ".ndjson.zst"
+    content_encoding = "zstd"
+
+    def __init__(self, level: int = 3):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError(
+                "The zstd output format requires the 'zstandard' package"
+            ) from e
+        self.level = level
+        self._zstandard = zstandard
+
+    def _compressor(self):
+        return self._zstandard.ZstdCompressor(level=self.level).compressobj()
+
+
+class Parquet(OutputFormat):
+    """
+    Parquet files, one row group per ``row_group_size`` payloads.
+
+    The schema is inferred from the first row group. Later rows are coerced
+    to it: missing fields become null and unknown fields are dropped. Single
+    documents are not worth a columnar file and are written as plain JSON.
+    """
+
+    extension = ".parquet"
+    content_type = "application/vnd.apache.parquet"
+
+    def __init__(self, compression: str = "zstd", row_group_size: int = 10000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise RuntimeError(
+                "The parquet output format requires the 'pyarrow' package"
+            ) from e
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+
+    def encode(self, lines: Iterable[bytes]) -> Iterator[bytes]:
+        sink = _ChunkSink()
+        writer = None
+        rows = []
+        for line in lines:
+            rows.append(json_codec.loads(line))
+            if len(rows) >= self.row_group_size:
+                writer = self._write_rows(writer, sink, rows)
+                rows = []
+                yield from sink.drain()
+        if rows or writer is None:
+            writer = self._write_rows(writer, sink, rows)
+        writer.close()
+        yield from sink.drain()
+
+    def _write_rows(self, writer, sink: "_ChunkSink", rows: list):
+        if writer is None:
+            table = self._pa.Table.from_pylist(rows)
+            writer = self._pq.ParquetWriter(
+                sink, table.schema, compression=self.compression
+            )
+        else:
+            table = self._pa.Table.from_pylist(rows, schema=writer.schema)
+        writer.write_table(table)
+        return writer
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are drained as they are produced."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def create_output_format(gcsbucket: GCSBucketSettings) -> OutputFormat:
+    """Build the output format selected by the bucket settings."""
+    level = gcsbucket.compression_level
+    if gcsbucket.format == "ndjson.gz":
+        return GzipNDJSON() if level is None else GzipNDJSON(level)
+    if gcsbucket.format == "ndjson.zst":
+        return ZstdNDJSON() if level is None else ZstdNDJSON(level)
+    if gcsbucket.format == "parquet":
+        return Parquet(row_group_size=gcsbucket.parquet_row_group_size)
+    return OutputFormat()
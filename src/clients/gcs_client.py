@@ -1,17 +1,300 @@
-from cloudpathlib import GSPath
-import json
+import asyncio
+import time
+from typing import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+import json_codec
+from clients.dedup import UploadIndex
+from clients.formats import OutputFormat
+from clients.storage import (
+    GCSBackend,
+    PreconditionFailed,
+    StorageBackend,
+    content_md5,
+)
+
+GCS_WRITER_POOL_SIZE = Gauge(
+    "gcs_writer_pool_size",
+    "Number of threads available for bucket uploads",
+    multiprocess_mode="livesum",
+)
+GCS_WRITER_ACTIVE = Gauge(
+    "gcs_writer_active_uploads",
+    "Bucket uploads currently running in the pool",
+    multiprocess_mode="livesum",
+)
+GCS_WRITER_WAITING = Gauge(
+    "gcs_writer_waiting_uploads",
+    "Bucket uploads waiting for a free pool thread",
+    multiprocess_mode="livesum",
+)
+GCS_UPLOAD_DURATION = Histogram(
+    "gcs_upload_duration_seconds",
+    "Time spent uploading an object to the bucket, by outcome",
+    ["outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+GCS_UPLOAD_BYTES = Histogram(
+    "gcs_upload_bytes",
+    "Size of objects uploaded to the bucket, by outcome",
+    ["outcome"],
+    buckets=(256, 1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304),
+)
+GCS_WRITER_WAIT = Histogram(
+    "gcs_writer_wait_seconds", "Time bucket uploads spent waiting for a pool thread"
+)
+GCS_UPLOAD_SKIPPED = Counter(
+    "gcs_upload_skipped_total",
+    "Uploads skipped because the object already held identical content, by how it was known",
+    ["reason"],
+)
+GCS_UPLOAD_SKIPPED_BYTES = Counter(
+    "gcs_upload_skipped_bytes_total",
+    "Bytes not uploaded because the object already held identical content",
+)
+GCS_UPLOAD_PRECONDITION_FAILURES = Counter(
+    "gcs_upload_precondition_failures_total",
+    "Conditional uploads rejected because the object changed since it was last seen",
+)
+
+# Conditional write attempts before giving up on an object that keeps changing
+_MAX_CONDITIONAL_ATTEMPTS = 3
+
 
 class GCSBucketClient:
+    """
+    Asynchronous writer for a single bucket.
+
+    Objects are stored through ``backend``, the GCS bucket unless another
+    ``StorageBackend`` is given, and batches are encoded with
+    ``output_format``, plain NDJSON by default. Blocking uploads, and
+    uploads whose data is still being encoded, run on a bounded thread pool
+    so they never stall the event loop. Encoded bytes are handed to
+    non-blocking backends inline, under the same concurrency limit, and
+    single documents are compressed off the loop whatever the backend.
+
+    With a ``dedup_index``, single-document writes whose bytes match the last
+    upload to the same name are skipped. With ``conditional_writes``, those
+    uploads also carry a generation precondition, so a worker whose view of
+    the object is stale re-checks it instead of blindly overwriting it, and
+    skips the upload if another worker already stored the same bytes.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        max_workers: int = 8,
+        backend: StorageBackend | None = None,
+        output_format: OutputFormat | None = None,
+        dedup_index: UploadIndex | None = None,
+        conditional_writes: bool = False,
+    ):
+        self.bucket_name = bucket_name
+        self.backend = backend if backend is not None else GCSBackend(bucket_name)
+        self.output_format = (
+            output_format if output_format is not None else OutputFormat()
+        )
+        self.dedup_index = dedup_index
+        self.conditional_writes = conditional_writes
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="gcs-writer"
+        )
+        self._slots = asyncio.Semaphore(max_workers)
+        GCS_WRITER_POOL_SIZE.set(max_workers)
+
+    def _upload(
+        self,
+        file_name: str,
+        data: bytes | Iterable[bytes],
+        content_type: str,
+        content_encoding: str | None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        outcome = "error"
+        started = time.perf_counter()
+        size = 0
+
+        def counted(chunks: Iterable[bytes]) -> Iterator[bytes]:
+            nonlocal size
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
 
-    def write_to_bucket(bucket_name, file_name, file_content):
         try:
-            bucket_path = GSPath(f"gs://{bucket_name}")
-            file_path = bucket_path / file_name
-            #file_path.write_text(str(file_content))
-            with file_path.open("w") as f:
-                json.dump(file_content, f)
+            generation = None
+            if isinstance(data, bytes):
+                size = len(data)
+                generation = self.backend.write(
+                    file_name, data, content_type, content_encoding, if_generation_match
+                )
+            else:
+                self.backend.write_stream(
+                    file_name, counted(data), content_type, content_encoding
+                )
+            outcome = "success"
+            return generation
+        except PreconditionFailed:
+            outcome = "precondition_failed"
+            raise
+        finally:
+            GCS_UPLOAD_DURATION.labels(outcome=outcome).observe(
+                time.perf_counter() - started
+            )
+            GCS_UPLOAD_BYTES.labels(outcome=outcome).observe(size)
+
+    async def _run(self, func, *args, offload: bool | None = None):
+        """
+        Call ``func`` on the pool, or inline if ``offload`` is false; by
+        default only backends that block are called on the pool.
+        """
+        started = time.perf_counter()
+        GCS_WRITER_WAITING.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            GCS_WRITER_WAITING.dec()
+        GCS_WRITER_WAIT.observe(time.perf_counter() - started)
+        GCS_WRITER_ACTIVE.inc()
+        try:
+            if not (self.backend.blocking if offload is None else offload):
+                return func(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            GCS_WRITER_ACTIVE.dec()
+            self._slots.release()
+
+    async def write_bytes(
+        self,
+        file_name: str,
+        data: bytes | Iterable[bytes],
+        content_type: str = "application/json",
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        """
+        Upload raw bytes, waiting for a free pool thread if all are busy.
+
+        ``data`` may also be an iterable of chunks. It is consumed on the pool
+        thread, whatever the backend, so producing the chunks (encoding and
+        compressing a batch) never runs on the event loop. Returns
+        the object's new generation when the backend reports one. A failed
+        ``if_generation_match`` precondition raises ``PreconditionFailed``.
+        """
+        try:
+            return await self._run(
+                self._upload,
+                file_name,
+                data,
+                content_type,
+                content_encoding,
+                if_generation_match,
+                offload=self.backend.blocking or not isinstance(data, bytes),
+            )
+        except PreconditionFailed:
+            raise
         except Exception as e:
             raise GCSBucketClientError("Failed to write the file to bucket") from e
 
+    async def write_to_bucket(self, file_name: str, file_content) -> None:
+        """
+        Serialize ``file_content`` as JSON and upload it as ``file_name``.
+
+        Compressed output formats compress the document too, on the pool, and
+        append their suffix (``.gz``, ``.zst``) to the name.
+        """
+        document = json_codec.dumps(file_content)
+        if self.output_format.document_cpu_bound:
+            suffix, data, content_encoding = await self._run(
+                self.output_format.encode_document, document, offload=True
+            )
+        else:
+            suffix, data, content_encoding = self.output_format.encode_document(
+                document
+            )
+        file_name += suffix
+        if self.dedup_index is None:
+            await self.write_bytes(file_name, data, content_encoding=content_encoding)
+            return
+
+        md5 = content_md5(data)
+        seen = self.dedup_index.get(file_name)
+        if seen is not None and seen.md5 == md5:
+            self._skipped("unchanged", data)
+            return
+        if not self.conditional_writes:
+            generation = await self.write_bytes(
+                file_name, data, content_encoding=content_encoding
+            )
+            self.dedup_index.put(file_name, md5, generation)
+            return
+
+        # Create-only unless we know which generation we are replacing
+        expected = seen.generation if seen is not None and seen.generation else 0
+        for _ in range(_MAX_CONDITIONAL_ATTEMPTS):
+            try:
+                generation = await self.write_bytes(
+                    file_name,
+                    data,
+                    content_encoding=content_encoding,
+                    if_generation_match=expected,
+                )
+            except PreconditionFailed:
+                GCS_UPLOAD_PRECONDITION_FAILURES.inc()
+                try:
+                    current = await self._run(self.backend.stat, file_name)
+                except Exception as e:
+                    raise GCSBucketClientError(
+                        "Failed to read the object from bucket"
+                    ) from e
+                if current is not None and current.md5 == md5:
+                    self.dedup_index.put(file_name, md5, current.generation)
+                    self._skipped("unchanged_remote", data)
+                    return
+                expected = current.generation if current is not None else 0
+                continue
+            self.dedup_index.put(file_name, md5, generation)
+            return
+        self.dedup_index.discard(file_name)
+        raise GCSBucketClientError(
+            "Failed to write the file to bucket: object kept changing concurrently"
+        )
+
+    @staticmethod
+    def _skipped(reason: str, data: bytes) -> None:
+        GCS_UPLOAD_SKIPPED.labels(reason=reason).inc()
+        GCS_UPLOAD_SKIPPED_BYTES.inc(len(data))
+
+    async def write_lines(self, file_stem: str, lines: Iterable[bytes]) -> str:
+        """
+        Upload NDJSON ``lines`` as one object in the configured output format.
+
+        The object is named ``file_stem`` plus the format's extension, and
+        that name is returned. Encoding streams on the pool thread.
+        """
+        output_format = self.output_format
+        file_name = file_stem + output_format.extension
+        await self.write_bytes(
+            file_name,
+            output_format.encode(lines),
+            content_type=output_format.content_type,
+            content_encoding=output_format.content_encoding,
+        )
+        return file_name
+
+    async def aclose(self) -> None:
+        """Wait for in-flight uploads to finish, then close the backend."""
+        await asyncio.to_thread(self._executor.shutdown, wait=True)
+        await asyncio.to_thread(self.backend.close)
+
+
 class GCSBucketClientError(Exception):
     pass
+
+
+def get_gcs_client(request: Request) -> GCSBucketClient:
+    """FastAPI dependency returning the bucket client opened in the application lifespan."""
+    return request.app.state.gcs_client
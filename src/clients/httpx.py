@@ -1,9 +1,155 @@
+import time
+
 import httpx
+from fastapi import Request
+from prometheus_client import Counter, Histogram
+
+from settings.upstream import UpstreamSettings
+
+_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+)
+
+UPSTREAM_POOL_WAIT = Histogram(
+    "upstream_pool_wait_seconds",
+    "Time upstream requests waited for a pooled connection",
+    ["protocol"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Time from sending an upstream request to receiving its response headers, by outcome",
+    ["outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total", "Connection retries attempted by the upstream transport"
+)
+UPSTREAM_RESPONSES = Counter(
+    "upstream_responses_total",
+    "Upstream responses by negotiated HTTP version",
+    ["http_version"],
+)
+
+# The first of these trace events marks the moment a request owns a connection:
+# either a new one is being opened, or headers go out on a reused one.
+_CONNECTION_ACQUIRED_EVENTS = frozenset(
+    {
+        "connection.connect_tcp.started",
+        "http11.send_request_headers.started",
+        "http2.send_request_headers.started",
+    }
+)
+_TIMER_EXTENSION = "x35.upstream_timer"
+
+
+class _UpstreamTimer:
+    """Timing state of one upstream request, fed by event hooks and httpcore tracing."""
+
+    def __init__(self, protocol: str):
+        self.protocol = protocol
+        self.started = time.perf_counter()
+        self.connection_acquired = False
+
+    async def trace(self, event: str, info: dict) -> None:
+        if not self.connection_acquired and event in _CONNECTION_ACQUIRED_EVENTS:
+            self.connection_acquired = True
+            UPSTREAM_POOL_WAIT.labels(protocol=self.protocol).observe(
+                time.perf_counter() - self.started
+            )
+        elif event == "connection.retry.started":
+            UPSTREAM_RETRIES.inc()
+
+    def observe(self, outcome: str) -> None:
+        UPSTREAM_REQUEST_DURATION.labels(outcome=outcome).observe(
+            time.perf_counter() - self.started
+        )
+
+
+def _request_hook(protocol: str):
+    async def on_request(request: httpx.Request) -> None:
+        timer = _UpstreamTimer(protocol)
+        request.extensions[_TIMER_EXTENSION] = timer
+        request.extensions["trace"] = timer.trace
 
+    return on_request
 
-async def create_httpx_client():
+
+async def _response_hook(response: httpx.Response) -> None:
+    UPSTREAM_RESPONSES.labels(http_version=response.http_version).inc()
+    timer = response.request.extensions.get(_TIMER_EXTENSION)
+    if timer is not None:
+        timer.observe(f"{response.status_code // 100}xx")
+
+
+def record_upstream_error(error: httpx.TransportError) -> None:
+    """Record the duration of a request that failed before any response arrived.
+
+    Response hooks do not run for transport errors, so callers report them here.
+    """
+    try:
+        request = error.request
+    except RuntimeError:
+        return
+    timer = request.extensions.get(_TIMER_EXTENSION)
+    if timer is not None:
+        timer.observe(type(error).__name__)
+
+
+def create_httpx_client(
+    upstream: UpstreamSettings, transport: httpx.AsyncBaseTransport | None = None
+) -> httpx.AsyncClient:
+    """Build the long-lived, pooled client shared by all upstream calls.
+
+    Pool limits are applied to the transport: httpx ignores client-level
+    ``limits`` when an explicit transport is supplied. With ``upstream.http2``
+    many concurrent requests are multiplexed over a few connections. Passing
+    ``transport`` replaces the network, e.g. with the upstream simulator.
+    """
+    limits = httpx.Limits(
+        max_connections=upstream.max_connections,
+        max_keepalive_connections=upstream.max_keepalive_connections,
+        keepalive_expiry=upstream.keepalive_expiry,
+    )
+    protocol = "http2" if upstream.http2 else "http1.1"
     return httpx.AsyncClient(
-        timeout=httpx.Timeout(10.0, connect=5.0),
-        limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
-        transport=httpx.AsyncHTTPTransport(retries=3),
+        timeout=httpx.Timeout(
+            upstream.timeout,
+            connect=upstream.connect_timeout,
+            pool=upstream.pool_timeout,
+        ),
+        transport=transport
+        or httpx.AsyncHTTPTransport(
+            http2=upstream.http2, retries=upstream.retries, limits=limits
+        ),
+        event_hooks={
+            "request": [_request_hook(protocol)],
+            "response": [_response_hook],
+        },
     )
+
+
+def get_httpx_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the client shared by the application.
+
+    The lifespan either opens the client on startup or, in cold-start mode,
+    leaves a factory for the first request that needs it.
+    """
+    state = request.app.state
+    if state.httpx_client is None:
+        state.httpx_client = state.httpx_client_factory()
+    return state.httpx_client
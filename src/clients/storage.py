@@ -0,0 +1,432 @@
+"""Storage backends the bucket client writes objects to.
+
+Backends expose synchronous ``write`` and ``write_stream`` methods.
+``GCSBucketClient`` runs blocking backends on its thread pool and calls
+non-blocking ones inline once the data is encoded, so every backend shares
+the same concurrency limits, metrics and error handling.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Iterator, NamedTuple
+
+from settings.gcsbucket import GCSBucketSettings
+from settings.simulator import SimulatorSettings
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+
+class PreconditionFailed(Exception):
+    """A conditional write found a different generation of the object."""
+
+
+class ObjectInfo(NamedTuple):
+    generation: int
+    #: Base64-encoded MD5 of the stored bytes, as GCS reports it.
+    md5: str
+
+
+def content_md5(data: bytes) -> str:
+    """Hash ``data`` the way GCS reports an object's ``md5Hash``."""
+    return base64.b64encode(hashlib.md5(data).digest()).decode()
+
+
+class StorageBackend(ABC):
+    """Destination for uploaded objects."""
+
+    #: Whether ``write`` blocks on I/O and must run off the event loop.
+    blocking: bool = True
+
+    @abstractmethod
+    def write(
+        self,
+        file_name: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        """
+        Store ``data`` as ``file_name``, replacing any existing object.
+
+        With ``if_generation_match``, the write only happens if the object is
+        currently at that generation (``0``: does not exist), and raises
+        ``PreconditionFailed`` otherwise. Returns the new generation.
+        """
+
+    @abstractmethod
+    def stat(self, file_name: str) -> ObjectInfo | None:
+        """Return the object's generation and content hash, or None if absent."""
+
+    def write_stream(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> None:
+        """
+        Store the concatenation of ``chunks`` as ``file_name``.
+
+        Backends that can consume the stream incrementally override this; the
+        default collects it and calls ``write``.
+        """
+        self.write(file_name, b"".join(chunks), content_type, content_encoding)
+
+    def close(self) -> None:
+        """Flush anything still buffered and release resources."""
+
+
+# Resumable upload chunk size; GCS requires a multiple of 256 KiB
+GCS_STREAM_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class GCSBackend(StorageBackend):
+    """
+    Writes objects to a Google Cloud Storage bucket.
+
+    The storage client and bucket handle are created once, on first use, and
+    shared by every upload.
+    """
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self._bucket = None
+        self._bucket_lock = threading.Lock()
+
+    def _get_bucket(self):
+        if self._bucket is None:
+            with self._bucket_lock:
+                if self._bucket is None:
+                    from google.cloud import storage
+
+                    self._bucket = storage.Client().bucket(self.bucket_name)
+        return self._bucket
+
+    def _blob(self, file_name: str, content_encoding: str | None):
+        blob = self._get_bucket().blob(file_name)
+        blob.content_encoding = content_encoding
+        return blob
+
+    def write(
+        self,
+        file_name: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        blob = self._blob(file_name, content_encoding)
+        try:
+            blob.upload_from_string(
+                data,
+                content_type=content_type,
+                if_generation_match=if_generation_match,
+            )
+        except Exception as e:
+            # google.api_core.exceptions.PreconditionFailed, without importing it
+            if getattr(e, "code", None) == 412:
+                raise PreconditionFailed(file_name) from e
+            raise
+        return blob.generation
+
+    def stat(self, file_name: str) -> ObjectInfo | None:
+        blob = self._get_bucket().get_blob(file_name)
+        if blob is None:
+            return None
+        return ObjectInfo(blob.generation, blob.md5_hash)
+
+    def write_stream(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> None:
+        """
+        Upload a stream, in one request if it is small.
+
+        Up to ``GCS_STREAM_CHUNK_SIZE`` bytes are buffered. A stream that ends
+        within the buffer is sent as a single upload; a longer one switches to
+        a resumable upload sent chunk by chunk, so memory stays bounded.
+        """
+        chunks = iter(chunks)
+        head = []
+        size = 0
+        for chunk in chunks:
+            head.append(chunk)
+            size += len(chunk)
+            if size >= GCS_STREAM_CHUNK_SIZE:
+                break
+        else:
+            self.write(file_name, b"".join(head), content_type, content_encoding)
+            return
+        blob = self._blob(file_name, content_encoding)
+        blob.chunk_size = GCS_STREAM_CHUNK_SIZE
+        reader = io.BufferedReader(_ChunkReader(_chain(head, chunks)))
+        blob.upload_from_file(reader, content_type=content_type)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Writes objects as files under ``root``.
+
+    Each object is written to a temporary file in its target directory and
+    renamed into place, so readers never observe a partial object. ``fsync``
+    controls durability: ``"never"`` leaves flushing to the OS, ``"always"``
+    syncs the file and its directory before ``write`` returns, and ``"batch"``
+    syncs every object written in the last ``fsync_interval`` seconds in one
+    pass on a background thread, trading a bounded loss window for
+    throughput. Content type and encoding are not stored; the object's
+    extension carries them.
+
+    Generations are file modification times in nanoseconds. Create-only
+    writes (``if_generation_match=0``) are atomic; other preconditions are
+    checked just before the rename, which is enough for a single writer
+    process per object but not a guarantee across processes.
+    """
+
+    def __init__(self, root: str, fsync: str = "batch", fsync_interval: float = 1.0):
+        if fsync not in ("never", "always", "batch"):
+            raise ValueError(f"Unknown fsync mode: {fsync}")
+        self.root = os.path.abspath(root)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._pending: set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+        if fsync == "batch":
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="storage-fsync", daemon=True
+            )
+            self._flusher.start()
+
+    def _path(self, file_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, file_name))
+        if os.path.commonpath([self.root, path]) != self.root or path == self.root:
+            raise ValueError(f"Object name escapes the storage root: {file_name}")
+        return path
+
+    def write(
+        self,
+        file_name: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        return self._write_file(file_name, (data,), if_generation_match)
+
+    def write_stream(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> None:
+        self._write_file(file_name, chunks, None)
+
+    def stat(self, file_name: str) -> ObjectInfo | None:
+        path = self._path(file_name)
+        try:
+            with open(path, "rb") as f:
+                generation = os.fstat(f.fileno()).st_mtime_ns
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(generation, content_md5(data))
+
+    def _write_file(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        if_generation_match: int | None,
+    ) -> int:
+        path = self._path(file_name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+                if self.fsync == "always":
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+            if if_generation_match == 0:
+                # link() refuses to replace an existing file, unlike rename()
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    raise PreconditionFailed(file_name) from None
+                os.unlink(tmp_path)
+            else:
+                if if_generation_match is not None:
+                    self._check_generation(file_name, path, if_generation_match)
+                os.replace(tmp_path, path)
+            generation = os.stat(path).st_mtime_ns
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if self.fsync == "always":
+            _fsync_path(directory)
+        elif self.fsync == "batch":
+            with self._pending_lock:
+                self._pending.add(path)
+        return generation
+
+    @staticmethod
+    def _check_generation(file_name: str, path: str, expected: int) -> None:
+        try:
+            current = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            current = 0
+        if current != expected:
+            raise PreconditionFailed(file_name)
+
+    def flush(self) -> None:
+        """Sync every object written since the last flush, then their directories."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        directories = set()
+        for path in pending:
+            try:
+                _fsync_path(path)
+            except FileNotFoundError:
+                continue
+            directories.add(os.path.dirname(path))
+        for directory in directories:
+            _fsync_path(directory)
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.error("Failed to sync stored objects", extra={"error": str(e)})
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            self._stop.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+
+def _chain(head: list[bytes], rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield from head
+    yield from rest
+
+
+class _ChunkReader(io.RawIOBase):
+    """Readable file object over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._current = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._current:
+            try:
+                self._current = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._current))
+        buffer[:size] = self._current[:size]
+        self._current = self._current[size:]
+        return size
+
+
+def _fsync_path(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StoredObject(NamedTuple):
+    data: bytes
+    content_type: str
+    content_encoding: str | None = None
+    generation: int = 1
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Keeps objects in process memory.
+
+    Writes never touch the network or disk, which makes it suitable for
+    tests and for benchmarking the application's own overhead. Only the
+    ``max_objects`` most recently written objects are retained.
+    """
+
+    blocking = False
+
+    def __init__(self, max_objects: int = 10000):
+        self.max_objects = max_objects
+        self.objects: OrderedDict[str, StoredObject] = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def write(
+        self,
+        file_name: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        with self._lock:
+            if if_generation_match is not None:
+                current = self.objects.get(file_name)
+                if if_generation_match != (current.generation if current else 0):
+                    raise PreconditionFailed(file_name)
+            self._generation += 1
+            self.objects[file_name] = StoredObject(
+                data, content_type, content_encoding, self._generation
+            )
+            self.objects.move_to_end(file_name)
+            while len(self.objects) > self.max_objects:
+                self.objects.popitem(last=False)
+            return self._generation
+
+    def stat(self, file_name: str) -> ObjectInfo | None:
+        with self._lock:
+            stored = self.objects.get(file_name)
+        if stored is None:
+            return None
+        return ObjectInfo(stored.generation, content_md5(stored.data))
+
+
+def create_storage_backend(
+    gcsbucket: GCSBucketSettings, simulator: SimulatorSettings | None = None
+) -> StorageBackend:
+    """Build the storage backend selected by the bucket settings."""
+    if gcsbucket.backend == "simulated":
+        from simulator.storage import create_simulated_backend
+
+        return create_simulated_backend(simulator or SimulatorSettings())
+    if gcsbucket.backend == "local":
+        return LocalBackend(
+            gcsbucket.local_root,
+            fsync=gcsbucket.local_fsync,
+            fsync_interval=gcsbucket.local_fsync_interval,
+        )
+    if gcsbucket.backend == "memory":
+        return MemoryBackend(max_objects=gcsbucket.memory_max_objects)
+    return GCSBackend(gcsbucket.bucket_name)
@@ -0,0 +1,117 @@
+"""Fast JSON encoding and decoding shared by the whole application.
+
+Backed by orjson. Request bodies are decoded with ``loads`` through
+``FastJSONRoute`` and responses are encoded by ``ORJSONResponse``; pydantic
+still validates every model, so request contracts and the OpenAPI schema are
+unchanged.
+"""
+
+from typing import Any, AsyncIterator, Callable, Iterable
+
+import orjson
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+
+__all__ = [
+    "FastJSONRoute",
+    "ORJSONResponse",
+    "body_limited_route",
+    "dumps",
+    "iter_ndjson",
+    "loads",
+]
+
+
+def dumps(content: Any, sort_keys: bool = False) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON."""
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(content, option=option)
+
+
+def loads(content: bytes | str) -> Any:
+    return orjson.loads(content)
+
+
+async def iter_ndjson(
+    records: Iterable[Any], chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """
+    Encode ``records`` as newline-delimited JSON, one record per line.
+
+    Lines are coalesced into chunks of roughly ``chunk_size`` bytes so large
+    streams do not pay a send per record, while memory stays bounded by the
+    chunk size rather than the number of records.
+    """
+    buffer = bytearray()
+    for record in records:
+        buffer += orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def _body_too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds {limit} bytes",
+    )
+
+
+class FastJSONRequest(Request):
+    max_body_size: int | None = None
+
+    async def body(self) -> bytes:
+        if self.max_body_size is None or hasattr(self, "_body"):
+            return await super().body()
+        limit = self.max_body_size
+        declared = self.headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            raise _body_too_large(limit)
+        chunks = []
+        size = 0
+        async for chunk in self.stream():
+            size += len(chunk)
+            if size > limit:
+                raise _body_too_large(limit)
+            chunks.append(chunk)
+        self._body = b"".join(chunks)
+        return self._body
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = loads(await self.body())
+        return self._json
+
+
+class FastJSONRoute(APIRoute):
+    """Route that decodes JSON request bodies with orjson before validation."""
+
+    max_body_size: int | None = None
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        max_body_size = self.max_body_size
+
+        async def fast_json_handler(request: Request) -> Response:
+            fast_request = FastJSONRequest(request.scope, request.receive)
+            fast_request.max_body_size = max_body_size
+            return await handler(fast_request)
+
+        return fast_json_handler
+
+
+def body_limited_route(max_body_size: int) -> type[FastJSONRoute]:
+    """
+    Build a ``FastJSONRoute`` that rejects bodies over ``max_body_size`` bytes.
+
+    Oversized requests get a 413 before the body is buffered in full, whether
+    the size is declared up front or only discovered while streaming.
+    """
+    return type(
+        "BodyLimitedJSONRoute", (FastJSONRoute,), {"max_body_size": max_body_size}
+    )
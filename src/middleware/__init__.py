@@ -0,0 +1,6 @@
+"""ASGI middleware."""
+
+from .admission import AdmissionMiddleware
+from .metrics import MetricsMiddleware
+
+__all__ = ["AdmissionMiddleware", "MetricsMiddleware"]
@@ -0,0 +1,41 @@
+"""Admission control: run each request inside its route group's bulkhead."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from json_codec import ORJSONResponse
+from services.admission import AdmissionController, Overloaded
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware that admits, queues or sheds requests before routing.
+
+    A shed request is answered with 503 and ``Retry-After`` before its body is
+    read. An admitted request holds its slot until the whole response,
+    streamed or not, has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bulkhead = self.controller.bulkhead_for(scope)
+        try:
+            await bulkhead.acquire()
+        except Overloaded as e:
+            response = ORJSONResponse(
+                {"error": "Service overloaded", "details": e.reason},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
@@ -0,0 +1,90 @@
+"""Request instrumentation feeding the Prometheus HTTP metrics."""
+
+import time
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from routes.health.metrics import (
+    REQUEST_COUNT,
+    REQUEST_LATENCY,
+    REQUEST_SIZE,
+    REQUESTS_IN_PROGRESS,
+    RESPONSE_SIZE,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Return the route path template (e.g. ``/api/v1/hello``) that served ``scope``.
+
+    The raw path is never used, so label cardinality is bounded by the number of
+    routes. Requests that matched no route share a single label.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Plain Starlette routes (docs, openapi.json) do not record themselves in the scope
+    app = scope.get("app")
+    for candidate in getattr(app, "routes", ()):
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            return getattr(candidate, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording count, latency, in-flight requests and body sizes.
+
+    Implemented without ``BaseHTTPMiddleware`` so responses are not buffered or
+    wrapped in extra tasks.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            endpoint = route_template(scope)
+            REQUEST_COUNT.labels(
+                method=method, endpoint=endpoint, status=str(status_code)
+            ).inc()
+            REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(elapsed)
+            REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(request_size)
+            RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(
+                response_size
+            )
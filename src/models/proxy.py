@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,15 @@ class ProxyRequest(BaseModel):
     message: str
     name: str | None = None
     test_number: int | None = None
+
+
+class BulkWriteItem(BaseModel):
+    index: int
+    status: Literal["written", "upstream_error", "storage_error"]
+    upstream_status: int
+    object: str | None = None
+
+
+class BulkWriteResponse(BaseModel):
+    items: list[BulkWriteItem]
+    objects: list[str]
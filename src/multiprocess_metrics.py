@@ -0,0 +1,29 @@
+"""
+Shared directory for the Prometheus metrics of several worker processes.
+
+``prometheus_client`` decides whether metrics are shared between processes
+when it is imported, so this module must not import it: a process manager
+calls ``enable_multiprocess_mode`` before anything that defines metrics.
+"""
+
+import os
+import shutil
+
+MULTIPROCESS_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def enable_multiprocess_mode(path: str) -> None:
+    """
+    Prepare a clean shared directory for metrics written by several workers.
+
+    Must run in the parent process before workers start and before
+    ``prometheus_client`` is imported: each process reads
+    ``PROMETHEUS_MULTIPROC_DIR`` when it imports ``prometheus_client``.
+    """
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ[MULTIPROCESS_ENV] = path
+
+
+def is_multiprocess_mode() -> bool:
+    return MULTIPROCESS_ENV in os.environ
@@ -0,0 +1,38 @@
+"""Constant JSON responses serialized once and served with strong ETags."""
+
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+import json_codec
+
+
+class PrecompiledResponse:
+    """
+    A JSON body rendered once, up front, and replayed on every request.
+
+    The body carries a strong ETag derived from its bytes. Requests whose
+    ``If-None-Match`` lists that ETag get an empty 304 instead of the body.
+    """
+
+    def __init__(self, content: Any, cache_control: str = "no-cache"):
+        self.body = json_codec.dumps(content)
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.headers = {"ETag": self.etag, "Cache-Control": cache_control}
+
+    def is_fresh(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+    def respond(self, request: Request) -> Response:
+        if self.is_fresh(request):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers
+            )
+        return Response(
+            content=self.body, media_type="application/json", headers=self.headers
+        )
@@ -0,0 +1,465 @@
+"""
+Multi-core process manager: one preloaded app served by forked workers.
+
+Run it from ``src/`` instead of ``app.py`` on hosts with several cores::
+
+    python process_manager.py
+
+The parent imports and builds the app once, freezes the garbage collector so
+the objects it created stay on pages shared copy-on-write with the workers,
+binds the listening socket and forks ``UVICORN_WORKERS`` workers (0 starts
+one per available CPU). It then supervises them:
+
+- a worker that exits is replaced, with a growing delay if workers keep
+  dying right after they start; if one cannot start the app at all, the
+  manager stops;
+- a worker whose resident memory exceeds ``UVICORN_WORKER_MAX_MEMORY`` is
+  replaced;
+- ``SIGHUP`` replaces every worker, one at a time;
+- ``SIGTERM`` or ``SIGINT`` lets every worker finish its requests and exits.
+
+Workers always run on the asyncio event loop, whatever ``UVICORN_LOOP`` says.
+
+Replacements are started before the worker they replace is told to stop.
+The old worker then stops accepting, serves the requests on every connection
+it has already accepted, and exits once they are done. The parent keeps the
+listening socket open throughout, so connections are never refused or reset:
+any that arrive while no worker is accepting wait in the socket's backlog.
+"""
+
+import asyncio
+import gc
+import logging
+import math
+import os
+import selectors
+import signal
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import psutil
+import uvicorn
+from uvicorn.config import STARTUP_FAILURE
+
+from multiprocess_metrics import enable_multiprocess_mode
+from settings import settings
+from settings.uvicorn import UvicornSettings
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+_MANAGER_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD)
+# Workers that exit sooner than this after starting are considered crashing,
+# and are restarted after a delay that doubles up to the maximum
+_MIN_UPTIME = 1.0
+_MIN_BACKOFF = 0.5
+_MAX_BACKOFF = 30.0
+# Time allowed beyond the keep-alive and graceful timeouts, which bound how
+# long a worker drains, before a stopping worker is killed
+_KILL_GRACE = 5.0
+
+
+def _cgroup_cpu_quota(root: Path) -> float | None:
+    """CPUs allowed by the cgroup's CFS quota, or None when there is none."""
+    try:
+        # cgroup v2: "<quota> <period>", with "max" meaning unlimited
+        quota, period = (root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((root / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def available_cpus(cgroup_root: Path = _CGROUP_ROOT) -> int:
+    """CPUs this process may run on: its affinity mask, capped by any cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def uvicorn_options(uvicorn_settings: UvicornSettings) -> dict:
+    """Keyword arguments for ``uvicorn.run`` or ``uvicorn.Config`` from the settings."""
+    return {
+        "access_log": uvicorn_settings.access_log,
+        "backlog": uvicorn_settings.backlog,
+        "host": "0.0.0.0",
+        "http": uvicorn_settings.http,
+        "limit_concurrency": uvicorn_settings.max_concurrency,
+        "log_level": uvicorn_settings.log_level,
+        "loop": uvicorn_settings.loop,
+        "port": uvicorn_settings.port,
+        "proxy_headers": uvicorn_settings.proxy_headers,
+        "server_header": uvicorn_settings.server_header,
+        "timeout_graceful_shutdown": uvicorn_settings.graceful_timeout,
+        "timeout_keep_alive": uvicorn_settings.keep_alive,
+    }
+
+
+@dataclass
+class _Worker:
+    pid: int
+    ready_fd: int
+    started: float
+    ready: bool = False
+    #: When the worker was asked to stop, if it was.
+    stopping_since: float | None = None
+
+
+class _WorkerServer(uvicorn.Server):
+    """Uvicorn server that tells the manager once it is accepting connections."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self._ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self._ready_fd, b"1")
+        os.close(self._ready_fd)
+
+    async def shutdown(self, sockets=None) -> None:
+        """
+        Stop accepting, serve the requests of accepted connections, then exit.
+
+        Uvicorn's own shutdown closes every connection that has no request in
+        progress, including ones accepted moments earlier whose request is
+        still on its way; their clients see the connection reset. Here such
+        connections get up to the keep-alive timeout to send their request,
+        connections between requests are closed, and requests in progress
+        finish within the graceful timeout as before.
+
+        This reaches into uvicorn and asyncio internals (``servers``, the
+        listening sockets' readers, each protocol's ``cycle``), which hold for
+        asyncio's selector loop; the manager therefore runs its workers on
+        that loop, never on uvloop.
+        """
+        loop = asyncio.get_running_loop()
+        for server in self.servers:
+            for sock in server.sockets:
+                loop.remove_reader(sock.fileno())
+        # Connections already accepted get their transports on the next turn
+        # of the loop; closing the server before would drop them
+        await asyncio.sleep(0)
+        deadline = loop.time() + self.config.timeout_keep_alive
+        while not self.force_exit and loop.time() < deadline:
+            awaiting_request = False
+            for connection in list(self.server_state.connections):
+                if getattr(connection, "cycle", False) is None:
+                    awaiting_request = True
+                else:
+                    # Closes it if idle, or once its current response is sent
+                    connection.shutdown()
+            if not awaiting_request:
+                break
+            await asyncio.sleep(0.05)
+        await super().shutdown(sockets=sockets)
+
+
+class ProcessManager:
+    """Runs ``workers`` forked uvicorn servers of ``config.app`` on one socket."""
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        max_memory: int = 0,
+        check_interval: float = 1.0,
+    ):
+        if config.loop not in ("auto", "asyncio"):
+            logger.warning(
+                "Workers run on the asyncio event loop", extra={"loop": config.loop}
+            )
+        # The workers' graceful drain relies on asyncio's selector loop
+        config.loop = "asyncio"
+        self.config = config
+        self.workers = workers
+        self.max_memory = max_memory
+        self.check_interval = check_interval
+        self.exit_code = 0
+        self._workers: dict[int, _Worker] = {}
+        # Workers waiting to be replaced, oldest request first, and the new
+        # worker being started for the first of them
+        self._to_replace: deque[int] = deque()
+        self._replacement: _Worker | None = None
+        self._signals: deque[int] = deque()
+        self._stopping = False
+        self._backoff = 0.0
+        self._not_before = 0.0
+        self._socket = None
+        self._selector = None
+        self._wakeup = None
+
+    def run(self) -> int:
+        """Serve until asked to stop; returns the process exit code."""
+        self._socket = self.config.bind_socket()
+        self._socket.listen(self.config.backlog)
+        self._selector = selectors.DefaultSelector()
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        self._selector.register(self._wakeup[0], selectors.EVENT_READ)
+        signal.set_wakeup_fd(self._wakeup[1])
+        for sig in _MANAGER_SIGNALS:
+            signal.signal(sig, self._on_signal)
+        logger.info("Starting workers", extra={"workers": self.workers})
+
+        try:
+            self._spawn_missing()
+            gc.enable()
+            while not self._stopping:
+                for key, _ in self._selector.select(self.check_interval):
+                    if key.data is None:
+                        self._drain_wakeup()
+                    else:
+                        self._read_ready(key.data)
+                self._handle_signals()
+                self._reap()
+                self._check_memory()
+                self._replace_next()
+                self._spawn_missing()
+                self._kill_overdue()
+        finally:
+            self._shutdown()
+        return self.exit_code
+
+    def _on_signal(self, sig: int, frame) -> None:
+        self._signals.append(sig)
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while os.read(self._wakeup[0], 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _handle_signals(self) -> None:
+        while self._signals:
+            sig = self._signals.popleft()
+            if sig == signal.SIGHUP:
+                logger.info("Rolling restart of all workers")
+                for worker in self._serving():
+                    if worker.pid not in self._to_replace:
+                        self._to_replace.append(worker.pid)
+            elif sig in (signal.SIGTERM, signal.SIGINT):
+                self._stopping = True
+
+    def _serving(self) -> list[_Worker]:
+        """Workers that make up the pool: not stopping and not an extra replacement."""
+        return [
+            worker
+            for worker in self._workers.values()
+            if worker.stopping_since is None and worker is not self._replacement
+        ]
+
+    def _spawn(self) -> _Worker:
+        ready_read, ready_write = os.pipe()
+        # Objects the parent has created so far are never collected in the
+        # workers, so collections there do not write to the shared pages
+        gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            self._run_worker(ready_write)
+        os.close(ready_write)
+        os.set_blocking(ready_read, False)
+        worker = _Worker(pid=pid, ready_fd=ready_read, started=time.monotonic())
+        self._workers[pid] = worker
+        self._selector.register(ready_read, selectors.EVENT_READ, worker)
+        return worker
+
+    def _run_worker(self, ready_fd: int) -> None:
+        """Body of a forked worker; never returns."""
+        code = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            for sig in _MANAGER_SIGNALS:
+                signal.signal(sig, signal.SIG_DFL)
+            self._selector.close()
+            os.close(self._wakeup[0])
+            os.close(self._wakeup[1])
+            for worker in self._workers.values():
+                if worker.ready_fd >= 0:
+                    os.close(worker.ready_fd)
+            gc.enable()
+            server = _WorkerServer(self.config, ready_fd)
+            server.run(sockets=[self._socket])
+            code = 0 if server.started else STARTUP_FAILURE
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            logger.exception("Worker failed", extra={"pid": os.getpid()})
+        finally:
+            os._exit(code)
+
+    def _read_ready(self, worker: _Worker) -> None:
+        try:
+            data = os.read(worker.ready_fd, 1)
+        except BlockingIOError:
+            return
+        if not data:
+            # The worker closed its end without becoming ready; it is
+            # reaped when it exits
+            self._close_ready(worker)
+            return
+        worker.ready = True
+        self._backoff = 0.0
+        if worker is self._replacement:
+            self._replacement = None
+            old = self._workers.get(self._to_replace.popleft())
+            if old is not None:
+                logger.info(
+                    "Replaced worker", extra={"pid": old.pid, "replacement": worker.pid}
+                )
+                self._stop(old)
+
+    def _close_ready(self, worker: _Worker) -> None:
+        if worker.ready_fd < 0:
+            return
+        self._selector.unregister(worker.ready_fd)
+        os.close(worker.ready_fd)
+        worker.ready_fd = -1
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            if worker is None:
+                continue
+            self._close_ready(worker)
+            if pid in self._to_replace:
+                if self._to_replace[0] == pid and self._replacement is not None:
+                    # Its replacement simply takes the dead worker's place
+                    self._replacement = None
+                self._to_replace.remove(pid)
+            if worker is self._replacement:
+                self._replacement = None
+            if worker.stopping_since is not None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if not worker.ready and code == STARTUP_FAILURE:
+                logger.error("Worker failed to start the app", extra={"pid": pid})
+                self.exit_code = STARTUP_FAILURE
+                self._stopping = True
+                continue
+            uptime = time.monotonic() - worker.started
+            if uptime < _MIN_UPTIME:
+                self._backoff = min(max(self._backoff * 2, _MIN_BACKOFF), _MAX_BACKOFF)
+            self._not_before = time.monotonic() + self._backoff
+            logger.warning(
+                "Worker exited unexpectedly",
+                extra={"pid": pid, "exit_code": code, "restart_in": self._backoff},
+            )
+
+    def _check_memory(self) -> None:
+        if not self.max_memory:
+            return
+        for worker in self._serving():
+            if not worker.ready or worker.pid in self._to_replace:
+                continue
+            try:
+                rss = psutil.Process(worker.pid).memory_info().rss
+            except psutil.Error:
+                continue
+            if rss > self.max_memory:
+                logger.warning(
+                    "Worker over memory limit",
+                    extra={
+                        "pid": worker.pid,
+                        "rss_bytes": rss,
+                        "limit": self.max_memory,
+                    },
+                )
+                self._to_replace.append(worker.pid)
+
+    def _replace_next(self) -> None:
+        if self._replacement is not None or not self._to_replace:
+            return
+        if time.monotonic() < self._not_before:
+            return
+        self._replacement = self._spawn()
+
+    def _spawn_missing(self) -> None:
+        if time.monotonic() < self._not_before:
+            return
+        for _ in range(self.workers - len(self._serving())):
+            self._spawn()
+
+    def _stop(self, worker: _Worker) -> None:
+        worker.stopping_since = time.monotonic()
+        try:
+            os.kill(worker.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _kill_overdue(self) -> None:
+        deadline = (
+            time.monotonic()
+            - self.config.timeout_keep_alive
+            - (self.config.timeout_graceful_shutdown or 0)
+            - _KILL_GRACE
+        )
+        for worker in self._workers.values():
+            if worker.stopping_since is not None and worker.stopping_since < deadline:
+                logger.warning("Killing unresponsive worker", extra={"pid": worker.pid})
+                try:
+                    os.kill(worker.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _shutdown(self) -> None:
+        logger.info("Stopping workers", extra={"workers": len(self._workers)})
+        for worker in self._workers.values():
+            if worker.stopping_since is None:
+                self._stop(worker)
+        while self._workers:
+            self._reap()
+            self._kill_overdue()
+            time.sleep(0.05)
+        signal.set_wakeup_fd(-1)
+        self._selector.close()
+        for fd in self._wakeup:
+            os.close(fd)
+        self._socket.close()
+
+
+def main() -> int:
+    workers = settings.uvicorn.workers or available_cpus()
+    # Before the app is imported, so that the metrics it defines are shared
+    # between the workers
+    enable_multiprocess_mode(settings.metrics.multiprocess_dir)
+    # Delay collections while the app is built: objects freed meanwhile would
+    # leave holes in pages that the workers then share
+    gc.disable()
+    from app import create_app
+
+    config = uvicorn.Config(create_app(), **uvicorn_options(settings.uvicorn))
+    manager = ProcessManager(
+        config,
+        workers,
+        max_memory=settings.uvicorn.worker_max_memory,
+        check_interval=settings.uvicorn.worker_check_interval,
+    )
+    return manager.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,11 @@
 from .hello import router as hello_router
 from .goodbye import router as goodbye_router
 from .req_write_to_bucket import router as proxy_router
+from .proxy_httpbin import router as proxy_httpbin_router
 
 __all__ = [
     "hello_router",
     "goodbye_router",
     "proxy_router",
+    "proxy_httpbin_router",
 ]
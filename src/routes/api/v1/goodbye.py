@@ -1,10 +1,13 @@
 """Example goodbye world endpoint."""
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
 import logging
 from pydantic import BaseModel, ConfigDict
 from typing import Optional
 
+from precompiled import PrecompiledResponse
+from settings import settings
+
 
 class GoodbyeResponse(BaseModel):
     message: str
@@ -17,6 +20,11 @@ class GoodbyeResponse(BaseModel):
 router = APIRouter(tags=["Greetings"], prefix="/api/v1")
 logger = logging.getLogger(f"x35.{__name__}")
 
+_WORLD_GOODBYE = PrecompiledResponse(
+    GoodbyeResponse(message="Goodbye, World, I'm version 1!").model_dump(),
+    cache_control=f"public, max-age={settings.fastapi.greeting_cache_max_age}",
+)
+
 
 @router.get(
     "/goodbye",
@@ -25,10 +33,13 @@ logger = logging.getLogger(f"x35.{__name__}")
     description="Returns a friendly goodbye message, optionally personalized with a name",
 )
 async def goodbye(
+    request: Request,
     name: Optional[str] = Query(None, description="Name to say goodbye to"),
-) -> GoodbyeResponse:
+) -> GoodbyeResponse | Response:
     """Returns goodbye world message."""
     name = name.strip() if name else None
-    subject = name or "World"
+    if not name:
+        return _WORLD_GOODBYE.respond(request)
+    subject = name
     logger.info("goodbye endpoint called with name: %s", subject)
     return GoodbyeResponse(message=f"Goodbye, {subject}, I'm version 1!")
@@ -1,9 +1,14 @@
 """Example hello world endpoint."""
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
 import logging
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Iterator, Optional
+
+from json_codec import body_limited_route, iter_ndjson
+from precompiled import PrecompiledResponse
+from settings import settings
 
 
 class HelloResponse(BaseModel):
@@ -14,9 +19,33 @@ class HelloResponse(BaseModel):
     )
 
 
-router = APIRouter(tags=["Greetings"], prefix="/api/v1")
+class HelloBatchRequest(BaseModel):
+    names: list[
+        Annotated[str, Field(max_length=settings.fastapi.batch_max_name_length)]
+    ] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.fastapi.batch_max_names,
+        description="Names to greet",
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={"example": {"names": ["Alice", "Bob"]}}
+    )
+
+
+router = APIRouter(
+    tags=["Greetings"],
+    prefix="/api/v1",
+    route_class=body_limited_route(settings.fastapi.batch_max_body_bytes),
+)
 logger = logging.getLogger(f"x35.{__name__}")
 
+_WORLD_GREETING = PrecompiledResponse(
+    HelloResponse(message="Hello, World, I'm version 1!").model_dump(),
+    cache_control=f"public, max-age={settings.fastapi.greeting_cache_max_age}",
+)
+
 
 @router.get(
     "/hello",
@@ -25,10 +54,36 @@ logger = logging.getLogger(f"x35.{__name__}")
     description="Returns a friendly greeting message, optionally personalized with a name",
 )
 async def hello(
+    request: Request,
     name: Optional[str] = Query(None, description="Name to greet"),
-) -> HelloResponse:
+) -> HelloResponse | Response:
     """Returns hello world message."""
     name = name.strip() if name else None
-    subject = name or "World"
-    logger.info("hello endpoint called with name: %s", subject)
-    return HelloResponse(message=f"Hello, {subject}, I'm version 1!")
+    if not name:
+        return _WORLD_GREETING.respond(request)
+    logger.info("hello endpoint called with name: %s", name)
+    return HelloResponse(message=_greet(name))
+
+
+def _greet(subject: str) -> str:
+    return f"Hello, {subject}, I'm version 1!"
+
+
+def _greet_all(names: list[str]) -> Iterator[dict]:
+    for name in names:
+        yield {"name": name, "message": _greet(name.strip() or "World")}
+
+
+@router.post(
+    "/hello/batch",
+    summary="Batch hello endpoint",
+    description="Greets every name in the request, streaming one JSON object per line (NDJSON) in request order",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def hello_batch(request: HelloBatchRequest) -> StreamingResponse:
+    """Returns a hello message per name as NDJSON."""
+    logger.info("hello batch endpoint called with %d names", len(request.names))
+    return StreamingResponse(
+        iter_ndjson(_greet_all(request.names)), media_type="application/x-ndjson"
+    )
@@ -0,0 +1,42 @@
+"""Pass-through proxy to the upstream httpbin service."""
+
+import httpx
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
+from json_codec import FastJSONRoute
+from models.proxy import ProxyRequest
+from services.httpbin import proxy_request, stream_proxy_request
+from clients.httpx import get_httpx_client
+from services.cache import ResponseCache, get_response_cache
+from services.hedging import Hedger, get_hedger
+from services.resilience import UpstreamGuard, get_upstream_guard
+
+router = APIRouter(tags=["Proxy"], prefix="/api/v1", route_class=FastJSONRoute)
+
+
+@router.post(
+    "/proxy-httpbin",
+    response_class=Response,
+    summary="Proxy to httpbin",
+    description=(
+        "Posts the payload to the upstream service and returns its response body "
+        "unchanged. With `stream=true` the body is forwarded as it arrives; "
+        "streamed calls are still subject to the circuit breaker and the "
+        "concurrency limit, but are not cached or hedged."
+    ),
+)
+async def proxy_httpbin(
+    request: ProxyRequest,
+    stream: bool = Query(False, description="Stream the upstream body to the caller"),
+    client: httpx.AsyncClient = Depends(get_httpx_client),
+    cache: ResponseCache | None = Depends(get_response_cache),
+    guard: UpstreamGuard | None = Depends(get_upstream_guard),
+    hedger: Hedger | None = Depends(get_hedger),
+) -> Response:
+    """Forward the request upstream and relay the raw response."""
+    if stream:
+        return await stream_proxy_request(request, client, guard=guard)
+    result = await proxy_request(
+        request, client, cache=cache, guard=guard, hedger=hedger
+    )
+    return result.to_response()
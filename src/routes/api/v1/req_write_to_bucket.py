@@ -1,32 +1,131 @@
-import json
+from typing import Annotated
 
-from fastapi import APIRouter, status
+import httpx
+from fastapi import APIRouter, Body, Depends, Query, status
 from fastapi.responses import JSONResponse, Response
-from src.models.proxy import ProxyRequest
-from src.services.httpbin import proxy_request
+import json_codec
+from json_codec import FastJSONRoute
+from models.proxy import BulkWriteItem, BulkWriteResponse, ProxyRequest
+from services.bulk_write import write_sharded
+from services.httpbin import proxy_request, proxy_requests
+from clients.gcs_client import GCSBucketClient, get_gcs_client
+from clients.httpx import get_httpx_client
+from services.cache import ResponseCache, get_response_cache
+from services.hedging import Hedger, get_hedger
+from services.resilience import UpstreamGuard, get_upstream_guard
+from services.write_behind import (
+    WriteBehindQueue,
+    WriteBehindQueueFull,
+    get_write_behind_queue,
+)
 from settings import settings
-from clients.gcs_client import GCSBucketClient
 
-router = APIRouter(tags=["Greetings"], prefix="/api/v1")
+router = APIRouter(tags=["Greetings"], prefix="/api/v1", route_class=FastJSONRoute)
 
 
 @router.post(
     "/hello",
     summary="Write to Bucket",
     response_model=dict,
-    status_code=status.HTTP_201_CREATED
+    status_code=status.HTTP_201_CREATED,
 )
-async def request_write_to_bucket(request: ProxyRequest):
-    """
-
-    """
+async def request_write_to_bucket(
+    request: ProxyRequest,
+    client: httpx.AsyncClient = Depends(get_httpx_client),
+    cache: ResponseCache | None = Depends(get_response_cache),
+    guard: UpstreamGuard | None = Depends(get_upstream_guard),
+    hedger: Hedger | None = Depends(get_hedger),
+    gcs_client: GCSBucketClient = Depends(get_gcs_client),
+    write_behind: WriteBehindQueue | None = Depends(get_write_behind_queue),
+):
+    """Proxy the payload upstream and write the echoed JSON to the bucket."""
     # Call the proxy_request function
-    response = await proxy_request(request)
-
-    # If response is already a JSONResponse, extract the JSON data
-    response_content = json.loads(response.body.decode())
-    content = response_content.get("json", {})
-    file_name =  content.get("name",'Test') + str(content.get("test_number" , "0")) + ".json"
-    GCSBucketClient.write_to_bucket(bucket_name=settings.gcsbucket.bucket_name, file_name=file_name, file_content=content)
-    # If response is a dict, return it directly
+    result = await proxy_request(
+        request, client, cache=cache, guard=guard, hedger=hedger
+    )
+    if not result.ok:
+        # Nothing was echoed, so nothing is written; the client sees the failure
+        return result.to_response()
+
+    # The upstream body is parsed once, lazily, from the raw bytes
+    content = result.json.get("json", {})
+    if write_behind is not None:
+        # Write-behind mode: acknowledge now, upload later as part of a batch object
+        try:
+            await write_behind.put(content)
+        except WriteBehindQueueFull:
+            return JSONResponse(
+                content={"error": "Write queue is full"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+        return Response(status_code=status.HTTP_202_ACCEPTED)
+    # httpbin echoes a missing name as null
+    file_name = (
+        (content.get("name") or "Test") + str(content.get("test_number", "0")) + ".json"
+    )
+    await gcs_client.write_to_bucket(file_name=file_name, file_content=content)
     return Response(status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/hello/bulk",
+    summary="Write a batch to the bucket",
+    description="Proxies every payload upstream concurrently and writes the echoed JSON as one or more batch objects",
+    response_model=BulkWriteResponse,
+)
+async def request_write_to_bucket_bulk(
+    requests: Annotated[
+        list[ProxyRequest],
+        Body(min_length=1, max_length=settings.upstream.batch_max_items),
+    ],
+    shards: int = Query(
+        1,
+        ge=1,
+        le=settings.gcsbucket.bulk_max_shards,
+        description="Number of objects to split the batch into",
+    ),
+    client: httpx.AsyncClient = Depends(get_httpx_client),
+    cache: ResponseCache | None = Depends(get_response_cache),
+    guard: UpstreamGuard | None = Depends(get_upstream_guard),
+    hedger: Hedger | None = Depends(get_hedger),
+    gcs_client: GCSBucketClient = Depends(get_gcs_client),
+) -> BulkWriteResponse:
+    """Proxy a batch of payloads upstream and write the echoes to the bucket."""
+    results = await proxy_requests(
+        requests,
+        client,
+        settings.upstream.batch_concurrency,
+        cache=cache,
+        guard=guard,
+        hedger=hedger,
+    )
+
+    succeeded = [index for index, result in enumerate(results) if result.ok]
+    lines = [
+        json_codec.dumps(results[index].json.get("json", {})) + b"\n"
+        for index in succeeded
+    ]
+    placement = await write_sharded(
+        gcs_client, lines, shards, settings.gcsbucket.bulk_prefix
+    )
+    written = dict(zip(succeeded, placement))
+
+    items = []
+    for index, result in enumerate(results):
+        if not result.ok:
+            item_status = "upstream_error"
+        elif written[index] is None:
+            item_status = "storage_error"
+        else:
+            item_status = "written"
+        items.append(
+            BulkWriteItem(
+                index=index,
+                status=item_status,
+                upstream_status=result.status_code,
+                object=written.get(index),
+            )
+        )
+    objects = list(dict.fromkeys(name for name in placement if name is not None))
+    return BulkWriteResponse(items=items, objects=objects)
@@ -2,10 +2,12 @@
 
 from .health import router as health_router
 from .metrics import router as metrics_router
+from .profile import router as profile_router
 from .version import router as version_router
 
 __all__ = [
     "health_router",
     "metrics_router",
+    "profile_router",
     "version_router",
 ]
@@ -1,8 +1,10 @@
 """Health check endpoints for service liveness."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 
+from precompiled import PrecompiledResponse
+
 
 class HealthResponse(BaseModel):
     status: str
@@ -13,6 +15,8 @@ class HealthResponse(BaseModel):
 
 router = APIRouter(tags=["Health"])
 
+_HEALTHY = PrecompiledResponse(HealthResponse(status="ok").model_dump())
+
 
 @router.get(
     "/health",
@@ -20,6 +24,6 @@ router = APIRouter(tags=["Health"])
     summary="Health check endpoint",
     description="Returns status of service health",
 )
-async def health_check() -> HealthResponse:
+async def health_check(request: Request) -> Response:
     """Basic health check endpoint."""
-    return HealthResponse(status="ok")
+    return _HEALTHY.respond(request)
@@ -1,19 +1,30 @@
 """Prometheus metrics endpoint."""
 
-from fastapi import APIRouter, Response, HTTPException
+from fastapi import APIRouter, Request, Response
 from prometheus_client import (
     generate_latest,
+    CollectorRegistry,
     CONTENT_TYPE_LATEST,
+    REGISTRY,
     Gauge,
     Counter,
     Histogram,
 )
 import psutil
-import asyncio
+import glob
+import gzip
+import os
+import re
+import time
+
+from multiprocess_metrics import MULTIPROCESS_ENV, is_multiprocess_mode
+from settings import settings
 
 
 router = APIRouter(tags=["Health"])
 
+_LIVE_GAUGE_FILE = re.compile(r"gauge_live\w+_(\d+)\.db$")
+
 REQUEST_COUNT = Counter(
     "http_requests_total",
     "Total number of HTTP requests",
@@ -24,28 +35,97 @@ REQUEST_LATENCY = Histogram(
     "http_request_duration_seconds",
     "HTTP request latency in seconds",
     ["method", "endpoint"],
+    buckets=settings.metrics.latency_buckets,
 )
 
-MEMORY_USAGE = Gauge("memory_usage_bytes", "Memory usage in bytes")
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Number of HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
 
-CPU_USAGE = Gauge("cpu_usage_percent", "CPU usage percentage")
+REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ["method", "endpoint"],
+    buckets=settings.metrics.size_buckets,
+)
 
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ["method", "endpoint"],
+    buckets=settings.metrics.size_buckets,
+)
 
-async def update_system_metrics():
-    """Update system metrics in a non-blocking way."""
-    try:
-        metrics = await asyncio.to_thread(
-            lambda: {
-                "memory": psutil.Process().memory_info().rss,
-                "cpu": psutil.cpu_percent(),
-            }
-        )
-        MEMORY_USAGE.set(metrics["memory"])
-        CPU_USAGE.set(metrics["cpu"])
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to update system metrics: {str(e)}"
-        )
+MEMORY_USAGE = Gauge(
+    "memory_usage_bytes", "Memory usage in bytes", multiprocess_mode="liveall"
+)
+
+CPU_USAGE = Gauge(
+    "cpu_usage_percent", "CPU usage percentage", multiprocess_mode="liveall"
+)
+
+
+def mark_dead_workers() -> None:
+    """Drop live-gauge files left behind by worker processes that no longer exist."""
+    from prometheus_client import multiprocess
+
+    path = os.environ[MULTIPROCESS_ENV]
+    for file_name in glob.glob(os.path.join(path, "gauge_live*_*.db")):
+        match = _LIVE_GAUGE_FILE.search(file_name)
+        if match and not psutil.pid_exists(int(match.group(1))):
+            multiprocess.mark_process_dead(int(match.group(1)), path)
+
+
+def collect_registry():
+    """
+    Return the registry to expose.
+
+    In multiprocess mode the values of all workers are merged from the shared
+    directory, so a scrape sees the whole instance and not just one worker.
+    """
+    if not is_multiprocess_mode():
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    mark_dead_workers()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class ExpositionCache:
+    """
+    Rendered ``/metrics`` output reused for ``ttl`` seconds.
+
+    Several scrapers hitting the service within the window share one rendering,
+    and its gzip-compressed form is built at most once per rendering.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._rendered_at = float("-inf")
+        self._content = b""
+        self._gzipped: bytes | None = None
+
+    def get(self) -> bytes:
+        now = time.monotonic()
+        if now - self._rendered_at >= self.ttl:
+            self._content = generate_latest(collect_registry())
+            self._gzipped = None
+            self._rendered_at = now
+        return self._content
+
+    def get_gzipped(self) -> bytes:
+        content = self.get()
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(content, compresslevel=5)
+        return self._gzipped
+
+
+_exposition = ExpositionCache(ttl=settings.metrics.exposition_cache_ttl)
 
 
 @router.get(
@@ -54,7 +134,18 @@ async def update_system_metrics():
     summary="Get service metrics",
     description="Returns service metrics in Prometheus format",
 )
-async def metrics() -> Response:
-    """Expose service metrics in Prometheus format."""
-    await update_system_metrics()
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+async def metrics(request: Request) -> Response:
+    """Expose service metrics in Prometheus format.
+
+    System metrics are refreshed by the background sampler, not by the scrape.
+    """
+    content = _exposition.get()
+    if len(content) >= settings.metrics.gzip_min_size and "gzip" in request.headers.get(
+        "Accept-Encoding", ""
+    ):
+        return Response(
+            content=_exposition.get_gzipped(),
+            media_type=CONTENT_TYPE_LATEST,
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,72 @@
+"""Sampling CPU profiler endpoint for live workers."""
+
+import asyncio
+import hmac
+import logging
+import threading
+
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from services.profiler import StackSampler
+from settings import settings
+
+router = APIRouter(tags=["Debug"])
+logger = logging.getLogger(f"x35.{__name__}")
+
+_profile_lock = asyncio.Lock()
+
+
+def _check_token(authorization: str | None) -> None:
+    token = settings.debug.profiler_token
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiler token is not configured",
+        )
+    if authorization is None or not hmac.compare_digest(
+        authorization, f"Bearer {token}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid profiler token"
+        )
+
+
+@router.get(
+    "/debug/profile",
+    response_class=PlainTextResponse,
+    summary="Profile the running worker",
+    description=(
+        "Samples the stacks of all threads, including the event loop, for the "
+        "requested number of seconds and returns them as collapsed stacks."
+    ),
+)
+async def profile(
+    seconds: float = Query(
+        10.0,
+        gt=0,
+        le=settings.debug.profiler_max_seconds,
+        description="Duration of the profile in seconds",
+    ),
+    authorization: str | None = Header(None),
+) -> PlainTextResponse:
+    """Run the stack sampler and return flamegraph-ready collapsed stacks."""
+    _check_token(authorization)
+    if _profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A profile is already running"
+        )
+    async with _profile_lock:
+        sampler = StackSampler(
+            interval=settings.debug.profiler_interval,
+            loop_thread_id=threading.get_ident(),
+        )
+        logger.info("Starting profile", extra={"seconds": seconds})
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
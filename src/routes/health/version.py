@@ -1,9 +1,11 @@
 """Version information endpoint."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from pydantic import BaseModel
 import os
 
+from precompiled import PrecompiledResponse
+
 router = APIRouter(tags=["Health"])
 
 
@@ -22,16 +24,23 @@ class VersionResponse(BaseModel):
         }
 
 
+# Build metadata is baked into the image environment, so it cannot change
+# for the lifetime of the process.
+_VERSION = PrecompiledResponse(
+    VersionResponse(
+        git_commit=os.getenv("GIT_COMMIT", "unknown"),
+        build_timestamp=os.getenv("BUILD_TIMESTAMP", "unknown"),
+        build_log_url=os.getenv("BUILD_LOG_URL", "unknown"),
+    ).model_dump()
+)
+
+
 @router.get(
     "/version",
     response_model=VersionResponse,
     summary="Get service version and build information",
     description="Returns git commit, build timestamp, and build log details of the service.",
 )
-async def get_version() -> VersionResponse:
+async def get_version(request: Request) -> Response:
     """Retrieve service version and build information."""
-    return VersionResponse(
-        git_commit=os.getenv("GIT_COMMIT", "unknown"),
-        build_timestamp=os.getenv("BUILD_TIMESTAMP", "unknown"),
-        build_log_url=os.getenv("BUILD_LOG_URL", "unknown"),
-    )
+    return _VERSION.respond(request)
@@ -0,0 +1,235 @@
+"""Admission control: per-route-group bulkheads that shed load when queues stand."""
+
+import asyncio
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import Match
+from starlette.types import Scope
+
+from settings.admission import AdmissionSettings
+
+PRIORITY_LANE = "priority"
+DEFAULT_GROUP = "default"
+
+# Distinct (method, path) pairs whose route group is remembered; beyond it,
+# e.g. under a scan of random paths, requests are matched against the routes
+_GROUP_CACHE_SIZE = 4096
+
+ADMISSION_INFLIGHT = Gauge(
+    "admission_inflight",
+    "Requests currently running, by route group",
+    ["group"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUED = Gauge(
+    "admission_queued",
+    "Requests waiting for a slot, by route group",
+    ["group"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_OVERLOADED = Gauge(
+    "admission_overloaded",
+    "Whether a route group's queue has stood for a whole interval (1) or not (0)",
+    ["group"],
+    multiprocess_mode="liveall",
+)
+ADMISSION_QUEUE_DELAY = Histogram(
+    "admission_queue_delay_seconds",
+    "Time admitted requests waited for a slot, by route group",
+    ["group"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+ADMISSION_SHED = Counter(
+    "admission_shed_total",
+    "Requests rejected with 503 by admission control, by route group and reason",
+    ["group", "reason"],
+)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Bulkhead:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one route group.
+
+    Up to ``max_concurrency`` requests run at once and up to ``max_queue`` more
+    wait for a slot; any further request is shed at once. A freed slot goes
+    straight to the oldest waiter. While the queue drains regularly, a request
+    waits at most ``max_wait``. Once it has not been empty for ``interval``
+    seconds the queue is standing rather than absorbing a burst, the group is
+    overloaded, and new requests wait at most ``target_delay``: work that
+    cannot start soon is shed early, before it adds to everyone's latency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait: float = 1.0,
+        target_delay: float = 0.05,
+        interval: float = 0.1,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.target_delay = target_delay
+        self.interval = interval
+        self.inflight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._drained_at = time.monotonic()
+        self._overloaded = False
+        self._inflight_gauge = ADMISSION_INFLIGHT.labels(group=name)
+        self._queued_gauge = ADMISSION_QUEUED.labels(group=name)
+        self._queue_delay = ADMISSION_QUEUE_DELAY.labels(group=name)
+        self._inflight_gauge.set(0)
+        self._queued_gauge.set(0)
+        ADMISSION_OVERLOADED.labels(group=name).set(0)
+
+    @property
+    def overloaded(self) -> bool:
+        overloaded = (
+            bool(self._waiters) and time.monotonic() - self._drained_at >= self.interval
+        )
+        if overloaded != self._overloaded:
+            self._overloaded = overloaded
+            ADMISSION_OVERLOADED.labels(group=self.name).set(int(overloaded))
+        return overloaded
+
+    async def acquire(self) -> None:
+        """Wait for a slot, or raise ``Overloaded`` if the request must be shed."""
+        if self.inflight < self.max_concurrency and not self._waiters:
+            self.inflight += 1
+            self._inflight_gauge.inc()
+            self._drained_at = time.monotonic()
+            self._queue_delay.observe(0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            ADMISSION_SHED.labels(group=self.name, reason="queue_full").inc()
+            raise Overloaded("queue_full")
+        timeout = self.target_delay if self.overloaded else self.max_wait
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self._queued_gauge.inc()
+        started = time.monotonic()
+        expiry = loop.call_later(timeout, self._expire, waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # The slot was handed over just as the request was abandoned
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            expiry.cancel()
+        self._queue_delay.observe(time.monotonic() - started)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            self._queued_gauge.dec()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+        self._inflight_gauge.dec()
+        self._drained_at = time.monotonic()
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        if self._remove(waiter):
+            waiter.set_exception(Overloaded("queue_timeout"))
+            ADMISSION_SHED.labels(group=self.name, reason="queue_timeout").inc()
+
+    def _remove(self, waiter: asyncio.Future) -> bool:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return False
+        self._queued_gauge.dec()
+        return True
+
+
+class AdmissionController:
+    """
+    Maps each request to the bulkhead of its route group.
+
+    ``groups`` assigns endpoint functions to groups; requests for any other
+    route, or for none, use the ``default`` group's bulkhead.
+    """
+
+    def __init__(
+        self,
+        bulkheads: dict[str, Bulkhead],
+        groups: dict,
+        retry_after: int = 1,
+    ):
+        self.bulkheads = bulkheads
+        self.groups = groups
+        self.retry_after = retry_after
+        self._cache: dict[tuple[str, str], Bulkhead] = {}
+
+    def bulkhead_for(self, scope: Scope) -> Bulkhead:
+        key = (scope["method"], scope["path"])
+        bulkhead = self._cache.get(key)
+        if bulkhead is None:
+            bulkhead = self.bulkheads[self._match(scope)]
+            if len(self._cache) < _GROUP_CACHE_SIZE:
+                self._cache[key] = bulkhead
+        return bulkhead
+
+    def _match(self, scope: Scope) -> str:
+        for route in getattr(scope.get("app"), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return self.groups.get(getattr(route, "endpoint", None), DEFAULT_GROUP)
+        return DEFAULT_GROUP
+
+
+def create_admission_controller(
+    admission: AdmissionSettings, routers: dict[str, list]
+) -> AdmissionController:
+    """
+    Build bulkheads for the configured groups and assign the routers' endpoints.
+
+    ``routers`` maps a group name (``priority``, ``greetings``, ``bucket`` or
+    ``proxy``) to the routers whose routes belong to it.
+    """
+    limits = {
+        PRIORITY_LANE: admission.priority_concurrency,
+        "greetings": admission.greetings_concurrency,
+        "bucket": admission.bucket_concurrency,
+        "proxy": admission.proxy_concurrency,
+        DEFAULT_GROUP: admission.default_concurrency,
+    }
+    bulkheads = {
+        group: Bulkhead(
+            group,
+            max_concurrency=limit,
+            max_queue=admission.queue_size,
+            max_wait=admission.max_queue_wait,
+            target_delay=admission.target_queue_delay,
+            interval=admission.interval,
+        )
+        for group, limit in limits.items()
+    }
+    groups = {
+        route.endpoint: group
+        for group, group_routers in routers.items()
+        for router in group_routers
+        for route in router.routes
+    }
+    return AdmissionController(bulkheads, groups, retry_after=admission.retry_after)
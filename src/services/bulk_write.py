@@ -0,0 +1,72 @@
+"""Sharded uploads for bulk write requests."""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+from clients.gcs_client import GCSBucketClient
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+
+def shard_bounds(count: int, shards: int) -> list[range]:
+    """
+    Split ``count`` items into at most ``shards`` contiguous, near-equal ranges.
+
+    Never returns an empty range, so asking for more shards than items yields
+    one shard per item.
+    """
+    shards = max(1, min(shards, count))
+    size, extra = divmod(count, shards)
+    bounds = []
+    start = 0
+    for shard in range(shards):
+        stop = start + size + (1 if shard < extra else 0)
+        bounds.append(range(start, stop))
+        start = stop
+    return bounds
+
+
+async def write_sharded(
+    gcs_client: GCSBucketClient, lines: list[bytes], shards: int, prefix: str
+) -> list[str | None]:
+    """
+    Upload NDJSON ``lines`` as up to ``shards`` objects, concurrently, in the
+    client's output format.
+
+    Returns, for every line, the name of the object it was written to, or
+    ``None`` if that object's upload failed.
+    """
+    if not lines:
+        return []
+    bounds = shard_bounds(len(lines), shards)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    batch_id = uuid.uuid4().hex[:8]
+    stems = [
+        f"{prefix}{timestamp}-{batch_id}-{shard:04d}-of-{len(bounds):04d}"
+        for shard in range(len(bounds))
+    ]
+    outcomes = await asyncio.gather(
+        *(
+            gcs_client.write_lines(stem, lines[bound.start : bound.stop])
+            for stem, bound in zip(stems, bounds)
+        ),
+        return_exceptions=True,
+    )
+
+    placement: list[str | None] = [None] * len(lines)
+    for stem, bound, outcome in zip(stems, bounds, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(
+                "Failed to write bulk shard",
+                extra={
+                    "file_name": stem,
+                    "payloads": len(bound),
+                    "error": str(outcome),
+                },
+            )
+            continue
+        for index in bound:
+            placement[index] = outcome
+    return placement
@@ -0,0 +1,104 @@
+"""In-memory TTL/LRU cache with single-flight coalescing of concurrent misses."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+
+CACHE_HITS = Counter("cache_hits_total", "Cache lookups served from memory", ["cache"])
+CACHE_MISSES = Counter(
+    "cache_misses_total", "Cache lookups that triggered a fetch", ["cache"]
+)
+CACHE_COALESCED = Counter(
+    "cache_coalesced_total",
+    "Cache lookups that joined a fetch already in flight for the same key",
+    ["cache"],
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total", "Entries removed from the cache", ["cache", "reason"]
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries currently held in the cache",
+    ["cache"],
+    multiprocess_mode="livesum",
+)
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache whose entries expire ``ttl`` seconds after being stored.
+
+    Concurrent lookups for a key that is not cached share a single fetch: the
+    first caller starts it and every other caller awaits the same result. The
+    fetch runs as its own task, so a caller that is cancelled does not cancel it
+    for the others.
+    """
+
+    def __init__(self, ttl: float, max_size: int, name: str = "upstream"):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            CACHE_EVICTIONS.labels(cache=self.name, reason="expired").inc()
+            CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.labels(cache=self.name, reason="capacity").inc()
+        CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the cached value for ``key``, fetching it at most once at a time."""
+        value = self.get(key)
+        if value is not None:
+            CACHE_HITS.labels(cache=self.name).inc()
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            CACHE_COALESCED.labels(cache=self.name).inc()
+        else:
+            CACHE_MISSES.labels(cache=self.name).inc()
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+
+            def _done(task: asyncio.Task) -> None:
+                self._inflight.pop(key, None)
+                if not task.cancelled() and task.exception() is None:
+                    if cacheable(task.result()):
+                        self.set(key, task.result())
+
+            task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+
+def get_response_cache(request: Request) -> ResponseCache | None:
+    """FastAPI dependency returning the upstream response cache, or None when disabled."""
+    return getattr(request.app.state, "response_cache", None)
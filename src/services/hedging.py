@@ -0,0 +1,149 @@
+"""Hedged requests: race a second attempt against a slow first one."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+
+from settings.upstream import UpstreamSettings
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+T = TypeVar("T")
+
+HEDGES_SENT = Counter("upstream_hedges_sent_total", "Hedge attempts sent upstream")
+HEDGE_WINS = Counter(
+    "upstream_hedge_wins_total", "Hedge attempts that answered before the first attempt"
+)
+HEDGES_SKIPPED = Counter(
+    "upstream_hedges_skipped_total",
+    "Hedge attempts not sent because the hedge budget was exhausted",
+)
+HEDGE_DELAY = Gauge(
+    "upstream_hedge_delay_seconds",
+    "Current delay before a hedge attempt is sent",
+    multiprocess_mode="liveall",
+)
+
+
+class Hedger:
+    """
+    Sends a second, identical attempt when the first one is slower than usual.
+
+    The hedge fires once the first attempt has been running longer than the
+    ``percentile`` of recently observed latencies. The first successful answer
+    wins and the other attempt is cancelled. A token budget caps hedges at
+    ``budget_ratio`` of calls so a slow upstream is not hit with twice the load.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.05,
+        budget_ratio: float = 0.05,
+        window: int = 1000,
+        min_samples: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget_ratio = budget_ratio
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._delay = min_delay
+        self._since_refresh = 0
+        self._tokens = 0.0
+        self._max_tokens = max(1.0, budget_ratio * window)
+        HEDGE_DELAY.set(min_delay)
+
+    @property
+    def delay(self) -> float:
+        return self._delay
+
+    def record(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._since_refresh += 1
+        # Re-sorting the window on every call would cost more than it saves, so
+        # the delay is first computed once ``min_samples`` latencies are known
+        # and then refreshed after every ``min_samples`` more
+        if (
+            self._since_refresh >= self.min_samples
+            and len(self._latencies) >= self.min_samples
+        ):
+            ordered = sorted(self._latencies)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self._delay = max(self.min_delay, ordered[index])
+            self._since_refresh = 0
+
+    def _take_token(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    async def call(
+        self,
+        fetch: Callable[[], Awaitable[T]],
+        is_failure: Callable[[T], bool],
+    ) -> T:
+        """Run ``fetch``, hedging it with a second attempt if it is slow."""
+        self._tokens = min(self._max_tokens, self._tokens + self.budget_ratio)
+        delay = self.delay
+        HEDGE_DELAY.set(delay)
+
+        async def attempt() -> T:
+            started = time.monotonic()
+            result = await fetch()
+            if not is_failure(result):
+                self.record(time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(attempt())
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            if not self._take_token():
+                HEDGES_SKIPPED.inc()
+                return await primary
+
+            HEDGES_SENT.inc()
+            hedge = asyncio.ensure_future(attempt())
+            pending = {primary, hedge}
+            result = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if not is_failure(result):
+                        if task is hedge:
+                            HEDGE_WINS.inc()
+                        return result
+            return result
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def create_hedger(upstream: UpstreamSettings) -> Hedger | None:
+    """Build the hedger described by the settings, or None when hedging is off."""
+    if not upstream.hedge_enabled:
+        return None
+    return Hedger(
+        percentile=upstream.hedge_percentile,
+        min_delay=upstream.hedge_min_delay,
+        budget_ratio=upstream.hedge_budget_ratio,
+        window=upstream.hedge_window,
+        min_samples=upstream.hedge_min_samples,
+    )
+
+
+def get_hedger(request: Request) -> Hedger | None:
+    """FastAPI dependency returning the upstream hedger, or None when disabled."""
+    return getattr(request.app.state, "hedger", None)
@@ -1,51 +1,289 @@
+import asyncio
+import hashlib
 import logging
-from fastapi.responses import JSONResponse
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import httpx
+from fastapi.responses import Response, StreamingResponse
 from httpx import HTTPStatusError, TransportError
-from src.models.proxy import ProxyRequest
-from src.clients.httpx import create_httpx_client
+from starlette.background import BackgroundTask
+import json_codec
+from clients.httpx import record_upstream_error
+from models.proxy import ProxyRequest
+from services.cache import ResponseCache
+from services.hedging import Hedger
+from services.resilience import UpstreamGuard, UpstreamRejected
+from settings import settings
 
 logger = logging.getLogger(f"x35.{__name__}")
 
 
-# NOTE: Client lifecycle consideration
-# Currently creating a new client per request for simplicity. For high-traffic production
-# scenarios, consider using a global client with FastAPI lifecycle events or more sophisticated
-# client management. See Also:
+@dataclass
+class UpstreamResult:
+    """
+    Outcome of a proxied call.
+
+    ``content`` holds the upstream body exactly as received; ``json`` parses it
+    on first access only, so callers that just forward the bytes never decode them.
+    """
+
+    status_code: int
+    content: bytes
+    media_type: str = "application/json"
+
+    @classmethod
+    def error(cls, content: dict, status_code: int) -> "UpstreamResult":
+        return cls(
+            status_code=status_code,
+            content=json_codec.dumps(content),
+        )
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @cached_property
+    def json(self):
+        return json_codec.loads(self.content)
+
+    def to_response(self) -> Response:
+        """Return the raw upstream bytes without re-encoding them."""
+        return Response(
+            content=self.content,
+            status_code=self.status_code,
+            media_type=self.media_type,
+        )
+
+
+def _build_request(request: ProxyRequest, client: httpx.AsyncClient) -> httpx.Request:
+    return client.build_request(
+        "POST",
+        settings.upstream.url,
+        content=request.model_dump_json(),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def cache_key(request: ProxyRequest) -> str:
+    """Hash of the validated payload; equal models always give the same key."""
+    canonical = json_codec.dumps(request.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(canonical).hexdigest()
+
+
+# NOTE: Client lifecycle
+# The client is created once in the application lifespan (see ``app.create_app``) and
+# injected by the route, so connections, TLS sessions and DNS lookups are reused across
+# requests. See Also:
 #   - httpx Clients: https://www.python-httpx.org/advanced/clients/
 #   - FastAPI Events: https://fastapi.tiangolo.com/advanced/events/
-async def proxy_request(request: ProxyRequest):
-    try:
-        async with await create_httpx_client() as client:
-            response = await client.post(
-                "https://httpbin.org/post",
-                json=request.model_dump(),
-                headers={"Content-Type": "application/json"},
-            )
-            response.raise_for_status()
-            logger.info(
-                "Successfully proxied request to httpbin",
-                extra={
-                    "status_code": response.status_code,
-                    "response_time": response.elapsed.total_seconds(),
-                },
-            )
-            return JSONResponse(
-                content=response.json(), status_code=response.status_code
+async def proxy_request(
+    request: ProxyRequest,
+    client: httpx.AsyncClient,
+    cache: ResponseCache | None = None,
+    guard: UpstreamGuard | None = None,
+    hedger: Hedger | None = None,
+) -> UpstreamResult:
+    """
+    Post ``request`` upstream and return the result.
+
+    With a ``cache``, identical payloads are answered from memory while the
+    entry is fresh, and concurrent identical payloads share one upstream call.
+    Only successful results are stored. With a ``guard``, calls fail fast with
+    503 while the circuit is open or the adaptive concurrency limit is reached.
+    With a ``hedger``, a slow call is raced against a second identical one.
+    """
+    if cache is None:
+        return await _guarded_fetch(request, client, guard, hedger)
+    return await cache.get_or_fetch(
+        cache_key(request),
+        lambda: _guarded_fetch(request, client, guard, hedger),
+        cacheable=lambda result: result.ok,
+    )
+
+
+async def proxy_requests(
+    requests: list[ProxyRequest],
+    client: httpx.AsyncClient,
+    concurrency: int,
+    cache: ResponseCache | None = None,
+    guard: UpstreamGuard | None = None,
+    hedger: Hedger | None = None,
+) -> list[UpstreamResult]:
+    """
+    Post every request upstream, at most ``concurrency`` at a time.
+
+    Results are returned in input order. Each call goes through
+    ``proxy_request``, so failures come back as error results rather than
+    exceptions and the cache, guard and hedger apply per item.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(request: ProxyRequest) -> UpstreamResult:
+        async with slots:
+            return await proxy_request(
+                request, client, cache=cache, guard=guard, hedger=hedger
             )
+
+    return await asyncio.gather(*(bounded(request) for request in requests))
+
+
+def _is_failure(result: UpstreamResult) -> bool:
+    return result.status_code >= 500
+
+
+async def _guarded_fetch(
+    request: ProxyRequest,
+    client: httpx.AsyncClient,
+    guard: UpstreamGuard | None,
+    hedger: Hedger | None,
+) -> UpstreamResult:
+    def fetch():
+        if hedger is None:
+            return _fetch(request, client)
+        return hedger.call(lambda: _fetch(request, client), is_failure=_is_failure)
+
+    if guard is None:
+        return await fetch()
+    try:
+        return await guard.call(fetch, is_failure=_is_failure)
+    except UpstreamRejected as e:
+        logger.warning("Upstream call rejected", extra={"reason": e.reason})
+        return UpstreamResult.error(
+            {"error": "Upstream unavailable", "details": e.reason}, status_code=503
+        )
+
+
+async def _fetch(request: ProxyRequest, client: httpx.AsyncClient) -> UpstreamResult:
+    try:
+        response = await client.send(_build_request(request, client))
+        response.raise_for_status()
+        logger.info(
+            "Successfully proxied request to httpbin",
+            extra={
+                "status_code": response.status_code,
+                "response_time": response.elapsed.total_seconds(),
+            },
+        )
+        return UpstreamResult(
+            status_code=response.status_code,
+            content=response.content,
+            media_type=response.headers.get("Content-Type", "application/json"),
+        )
     except HTTPStatusError as e:
         logger.error(
             "HTTP error occurred", extra={"status_code": e.response.status_code}
         )
-        return JSONResponse(
-            content={"error": "Upstream service error", "details": str(e)},
+        return UpstreamResult.error(
+            {"error": "Upstream service error", "details": str(e)},
             status_code=e.response.status_code,
         )
     except TransportError as e:
+        record_upstream_error(e)
         logger.error("Transport error occurred", extra={"error": str(e)})
-        return JSONResponse(
-            content={"error": "Connection error", "details": str(e)},
-            status_code=503,
+        return UpstreamResult.error(
+            {"error": "Connection error", "details": str(e)}, status_code=503
         )
     except Exception as e:
         logger.error("Unexpected error occurred", extra={"error": str(e)})
-        return JSONResponse(content={"error": "Internal server error"}, status_code=500)
+        return UpstreamResult.error({"error": "Internal server error"}, status_code=500)
+
+
+async def stream_proxy_request(
+    request: ProxyRequest,
+    client: httpx.AsyncClient,
+    guard: UpstreamGuard | None = None,
+) -> Response:
+    """
+    Forward the upstream body to the caller chunk by chunk as it arrives.
+
+    The body is never held in memory as a whole. Errors that happen before the
+    first byte is sent are reported like ``proxy_request`` reports them. With
+    a ``guard``, the call is admitted like any other and holds its place until
+    the stream is closed, and its outcome is recorded then. Streams are
+    neither cached nor hedged.
+    """
+    if guard is not None:
+        try:
+            guard.acquire()
+        except UpstreamRejected as e:
+            logger.warning("Upstream call rejected", extra={"reason": e.reason})
+            return UpstreamResult.error(
+                {"error": "Upstream unavailable", "details": e.reason}, status_code=503
+            ).to_response()
+    started = time.monotonic()
+    # Outcome of the call for the guard: None until it is known
+    failed: bool | None = None
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if guard is not None and not released:
+            released = True
+            guard.release(time.monotonic() - started, failed)
+
+    try:
+        response = await client.send(_build_request(request, client), stream=True)
+    except TransportError as e:
+        failed = True
+        release()
+        record_upstream_error(e)
+        logger.error("Transport error occurred", extra={"error": str(e)})
+        return UpstreamResult.error(
+            {"error": "Connection error", "details": str(e)}, status_code=503
+        ).to_response()
+    except Exception as e:
+        failed = True
+        release()
+        logger.error("Unexpected error occurred", extra={"error": str(e)})
+        return UpstreamResult.error(
+            {"error": "Internal server error"}, status_code=500
+        ).to_response()
+    except BaseException:
+        release()
+        raise
+
+    if response.is_error:
+        failed = response.status_code >= 500
+        try:
+            await response.aclose()
+        finally:
+            release()
+        logger.error("HTTP error occurred", extra={"status_code": response.status_code})
+        return UpstreamResult.error(
+            {
+                "error": "Upstream service error",
+                "details": f"Upstream responded with {response.status_code}",
+            },
+            status_code=response.status_code,
+        ).to_response()
+
+    async def body():
+        nonlocal failed
+        try:
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        except Exception:
+            # The response is abandoned without running its background task
+            failed = True
+            try:
+                await response.aclose()
+            finally:
+                release()
+            raise
+        failed = False
+
+    async def close() -> None:
+        # Runs once the response is over, even if the caller disconnected
+        try:
+            await response.aclose()
+        finally:
+            release()
+
+    return StreamingResponse(
+        body(),
+        status_code=response.status_code,
+        media_type=response.headers.get("Content-Type", "application/json"),
+        background=BackgroundTask(close),
+    )
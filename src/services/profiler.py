@@ -0,0 +1,65 @@
+"""Low-overhead statistical stack sampler producing collapsed stacks."""
+
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class StackSampler:
+    """
+    Samples the stacks of every thread on a fixed interval from a helper thread.
+
+    Results are rendered in the collapsed format (``frame;frame;frame count``)
+    understood by flamegraph.pl, speedscope and similar tools. Each stack is
+    rooted at its thread name; the thread running the asyncio event loop is
+    reported as ``event-loop``.
+    """
+
+    def __init__(self, interval: float = 0.005, loop_thread_id: int | None = None):
+        self.interval = interval
+        self.loop_thread_id = loop_thread_id
+        self.samples = 0
+        self._stacks: collections.Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _thread_name(self, thread_id: int, names: dict[int, str]) -> str:
+        if thread_id == self.loop_thread_id:
+            return "event-loop"
+        return names.get(thread_id, f"thread-{thread_id}")
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(
+                        f"{code.co_qualname} ({os.path.basename(code.co_filename)})"
+                    )
+                    frame = frame.f_back
+                frames.append(self._thread_name(thread_id, names))
+                self._stacks[";".join(reversed(frames))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Return the collected samples as collapsed stacks, most frequent first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self._stacks.most_common()
+        )
@@ -0,0 +1,279 @@
+"""Circuit breaker and adaptive concurrency limit for upstream calls."""
+
+import logging
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+
+from settings.upstream import UpstreamSettings
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+T = TypeVar("T")
+
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 = closed, 1 = open, 2 = half-open)",
+    ["name"],
+    multiprocess_mode="liveall",
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ["name", "state"],
+)
+CONCURRENCY_LIMIT = Gauge(
+    "upstream_concurrency_limit",
+    "Current adaptive limit on in-flight upstream calls",
+    multiprocess_mode="liveall",
+)
+CONCURRENCY_INFLIGHT = Gauge(
+    "upstream_inflight",
+    "Upstream calls currently in flight",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_REJECTED = Counter(
+    "upstream_rejected_total",
+    "Upstream calls failed fast without being sent",
+    ["reason"],
+)
+
+
+class UpstreamRejected(Exception):
+    """Raised when a call is refused before reaching the upstream."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and calls
+    fail fast. Once ``recovery_timeout`` seconds have passed it lets up to
+    ``half_open_max_calls`` probe calls through; a successful probe closes the
+    circuit again and a failed one re-opens it. Successes of calls that
+    were already in flight when the circuit opened are ignored.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    _STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        name: str = "upstream",
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.name = name
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # Starting closed is not a transition, so only the gauge is set
+        self._state = self.CLOSED
+        CIRCUIT_STATE.labels(name=self.name).set(self._STATE_VALUES[self.CLOSED])
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.recovery_timeout
+        ):
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+        if state != self.CLOSED:
+            self._half_open_calls = 0
+        CIRCUIT_STATE.labels(name=self.name).set(self._STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(name=self.name, state=state).inc()
+
+    def allow(self) -> bool:
+        """Return whether a call may proceed, reserving a probe slot when half-open."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state == self.OPEN:
+            # A call let through before the circuit opened says nothing about
+            # recovery; only a probe made while half-open may close it
+            return
+        self._failures = 0
+        if self._state == self.HALF_OPEN:
+            logger.info("Circuit closed", extra={"circuit": self.name})
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self._failures >= self.failure_threshold
+        ):
+            logger.warning(
+                "Circuit opened",
+                extra={"circuit": self.name, "failures": self._failures},
+            )
+            self._set_state(self.OPEN)
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without an outcome."""
+        if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on concurrent upstream calls.
+
+    The limit grows by one for every fast, successful call made while the limit
+    was nearly in use, and is multiplied by ``backoff_ratio`` when a call
+    fails or takes longer than ``latency_threshold`` seconds. It backs off at
+    most once per round trip: calls already in flight at the last decrease
+    were sent under the old limit, so their failures do not cut it again.
+    Calls beyond the limit are rejected rather than queued.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 1000,
+        latency_threshold: float = 1.0,
+        backoff_ratio: float = 0.9,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self._limit = float(initial_limit)
+        self._decreased_at = float("-inf")
+        self.inflight = 0
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        if self.inflight >= self.limit:
+            return False
+        self.inflight += 1
+        CONCURRENCY_INFLIGHT.set(self.inflight)
+        return True
+
+    def release(self, latency: float, failed: bool) -> None:
+        was_saturated = self.inflight * 2 >= self.limit
+        self.inflight -= 1
+        CONCURRENCY_INFLIGHT.set(self.inflight)
+        if failed or latency > self.latency_threshold:
+            now = time.monotonic()
+            if now - latency >= self._decreased_at:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._decreased_at = now
+        elif was_saturated:
+            self._limit = min(self.max_limit, self._limit + 1)
+        CONCURRENCY_LIMIT.set(self.limit)
+
+
+class UpstreamGuard:
+    """Applies the circuit breaker and the adaptive limit around one upstream call."""
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker | None = None,
+        limiter: AdaptiveLimiter | None = None,
+    ):
+        self.breaker = breaker
+        self.limiter = limiter
+
+    def acquire(self) -> None:
+        """
+        Reserve a call, or raise ``UpstreamRejected`` if it must fail fast.
+
+        Every successful ``acquire`` must be followed by one ``release``.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            UPSTREAM_REJECTED.labels(reason="circuit_open").inc()
+            raise UpstreamRejected("circuit_open")
+        if self.limiter is not None and not self.limiter.try_acquire():
+            if self.breaker is not None:
+                self.breaker.release()
+            UPSTREAM_REJECTED.labels(reason="concurrency_limit").inc()
+            raise UpstreamRejected("concurrency_limit")
+
+    def release(self, latency: float, failed: bool | None) -> None:
+        """
+        Record the outcome of a reserved call; ``failed`` is None when it ended
+        without one, for instance because it was cancelled.
+        """
+        if self.limiter is not None:
+            self.limiter.release(latency, bool(failed))
+        if self.breaker is not None:
+            if failed is None:
+                self.breaker.release()
+            elif failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    async def call(
+        self,
+        fetch: Callable[[], Awaitable[T]],
+        is_failure: Callable[[T], bool],
+    ) -> T:
+        """Run ``fetch`` or raise ``UpstreamRejected`` if it must fail fast."""
+        self.acquire()
+        started = time.monotonic()
+        failed = None
+        try:
+            result = await fetch()
+            failed = is_failure(result)
+            return result
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(time.monotonic() - started, failed)
+
+
+def create_upstream_guard(upstream: UpstreamSettings) -> UpstreamGuard:
+    """Build the guard described by the breaker and limiter settings."""
+    breaker = None
+    if upstream.breaker_enabled:
+        breaker = CircuitBreaker(
+            failure_threshold=upstream.breaker_failure_threshold,
+            recovery_timeout=upstream.breaker_recovery_timeout,
+            half_open_max_calls=upstream.breaker_half_open_max_calls,
+        )
+    limiter = None
+    if upstream.limiter_enabled:
+        limiter = AdaptiveLimiter(
+            initial_limit=upstream.limiter_initial_limit,
+            min_limit=upstream.limiter_min_limit,
+            max_limit=upstream.limiter_max_limit,
+            latency_threshold=upstream.limiter_latency_threshold,
+            backoff_ratio=upstream.limiter_backoff_ratio,
+        )
+    return UpstreamGuard(breaker=breaker, limiter=limiter)
+
+
+def get_upstream_guard(request: Request) -> UpstreamGuard | None:
+    """FastAPI dependency returning the upstream guard, or None when disabled."""
+    return getattr(request.app.state, "upstream_guard", None)
@@ -0,0 +1,131 @@
+"""Background sampler for process, event-loop and garbage-collector metrics."""
+
+import asyncio
+import gc
+import logging
+import time
+
+import psutil
+from prometheus_client import Counter, Gauge, Histogram
+
+from routes.health.metrics import CPU_USAGE, MEMORY_USAGE
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Delay between when the sampler was due to wake up and when it actually ran",
+    multiprocess_mode="liveall",
+)
+OPEN_FDS = Gauge(
+    "open_fds", "Open file descriptors of the process", multiprocess_mode="liveall"
+)
+THREADS = Gauge(
+    "threads", "Number of threads in the process", multiprocess_mode="liveall"
+)
+GC_COLLECTIONS = Counter(
+    "gc_collections_total", "Garbage collections run, by generation", ["generation"]
+)
+GC_COLLECTED = Counter(
+    "gc_collected_objects_total",
+    "Objects freed by the garbage collector, by generation",
+    ["generation"],
+)
+GC_PAUSE = Histogram(
+    "gc_pause_seconds",
+    "Time the process was paused by a garbage collection, by generation",
+    ["generation"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+)
+
+_GC_GENERATIONS = len(gc.get_count())
+# Pauses kept between two samples; collections beyond it are still counted
+_MAX_PENDING_GC_PAUSES = 10_000
+
+
+class SystemMetricsSampler:
+    """
+    Samples process metrics on a fixed interval instead of on every scrape.
+
+    One ``psutil.Process`` is reused so CPU usage is always measured over the
+    same window. The sampler also measures event-loop lag from how late it
+    wakes up, and times garbage collections through ``gc.callbacks``.
+
+    The GC callback only records into plain attributes, and the collections
+    are published with the next sample: a collection can start while the
+    interrupted code holds prometheus_client's lock, which in multiprocess
+    mode is not reentrant, so updating a metric from the callback could
+    deadlock the process.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.interval = interval
+        self._process = psutil.Process()
+        self._task: asyncio.Task | None = None
+        self._gc_started = 0.0
+        self._gc_pauses: list[tuple[int, float]] = []
+        self._gc_collections = [0] * _GC_GENERATIONS
+        self._gc_collected = [0] * _GC_GENERATIONS
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+            return
+        pause = time.perf_counter() - self._gc_started
+        generation = info["generation"]
+        self._gc_collections[generation] += 1
+        self._gc_collected[generation] += info["collected"]
+        if len(self._gc_pauses) < _MAX_PENDING_GC_PAUSES:
+            self._gc_pauses.append((generation, pause))
+
+    def _publish_gc(self) -> None:
+        # Collections during the swap are recorded in the lists being published
+        pauses, self._gc_pauses = self._gc_pauses, []
+        collections, self._gc_collections = (
+            self._gc_collections,
+            [0] * _GC_GENERATIONS,
+        )
+        collected, self._gc_collected = self._gc_collected, [0] * _GC_GENERATIONS
+        for generation, pause in pauses:
+            GC_PAUSE.labels(generation=str(generation)).observe(pause)
+        for generation in range(_GC_GENERATIONS):
+            if collections[generation]:
+                labels = {"generation": str(generation)}
+                GC_COLLECTIONS.labels(**labels).inc(collections[generation])
+                GC_COLLECTED.labels(**labels).inc(collected[generation])
+
+    def sample(self) -> None:
+        self._publish_gc()
+        with self._process.oneshot():
+            MEMORY_USAGE.set(self._process.memory_info().rss)
+            OPEN_FDS.set(self._process.num_fds())
+            THREADS.set(self._process.num_threads())
+        CPU_USAGE.set(psutil.cpu_percent())
+
+    def start(self) -> None:
+        gc.callbacks.append(self._on_gc)
+        # Primes the CPU counters; later calls measure since the previous sample
+        self.sample()
+        self._task = asyncio.create_task(self._run(), name="system-metrics-sampler")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.set(max(0.0, loop.time() - due))
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error("Failed to sample system metrics", extra={"error": str(e)})
+
+    async def aclose(self) -> None:
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self._publish_gc()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
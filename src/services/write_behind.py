@@ -0,0 +1,211 @@
+"""Write-behind queue packing many bucket payloads into NDJSON batch objects."""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+
+import json_codec
+from clients.gcs_client import GCSBucketClient
+
+logger = logging.getLogger(f"x35.{__name__}")
+
+WRITE_BEHIND_QUEUE_DEPTH = Gauge(
+    "write_behind_queue_depth",
+    "Payloads waiting to be packed into a batch object",
+    multiprocess_mode="livesum",
+)
+WRITE_BEHIND_REJECTED = Counter(
+    "write_behind_rejected_total", "Payloads rejected because the queue was full"
+)
+WRITE_BEHIND_BATCHES = Counter(
+    "write_behind_batches_total", "Batch objects written, by outcome", ["outcome"]
+)
+WRITE_BEHIND_PAYLOADS = Counter(
+    "write_behind_payloads_total",
+    "Payloads flushed in batch objects, by outcome",
+    ["outcome"],
+)
+WRITE_BEHIND_RETRIES = Counter(
+    "write_behind_retries_total", "Batch object uploads retried after a failure"
+)
+WRITE_BEHIND_DEAD_LETTERED = Counter(
+    "write_behind_dead_lettered_payloads_total",
+    "Acknowledged payloads whose batch could not be uploaded after every retry",
+)
+
+_STOP = object()
+
+
+class WriteBehindQueueFull(Exception):
+    pass
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-memory queue flushed to the bucket by a background task.
+
+    A batch is written as one object, in the bucket client's output format,
+    once it reaches ``max_batch_count`` payloads, ``max_batch_bytes`` encoded
+    NDJSON bytes, or ``max_batch_age`` seconds since its first payload
+    arrived. Closing the queue flushes everything that
+    was accepted.
+
+    Payloads have already been acknowledged, so a failed upload is retried
+    up to ``max_retries`` times, waiting ``retry_backoff`` seconds and twice
+    as long before each further retry. Meanwhile the queue keeps filling and
+    eventually rejects new payloads. A batch that still cannot be uploaded is
+    dead-lettered: saved under ``dead_letter_dir`` when one is set, and
+    counted and logged in any case.
+    """
+
+    def __init__(
+        self,
+        gcs_client: GCSBucketClient,
+        max_queue_size: int = 10000,
+        max_batch_count: int = 500,
+        max_batch_bytes: int = 4 * 1024 * 1024,
+        max_batch_age: float = 2.0,
+        enqueue_timeout: float = 0.0,
+        prefix: str = "batches/",
+        max_retries: int = 5,
+        retry_backoff: float = 0.5,
+        dead_letter_dir: str | None = None,
+    ):
+        self._gcs_client = gcs_client
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._max_batch_count = max_batch_count
+        self._max_batch_bytes = max_batch_bytes
+        self._max_batch_age = max_batch_age
+        self._enqueue_timeout = enqueue_timeout
+        self._prefix = prefix
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        self._dead_letter_dir = dead_letter_dir
+        self._closing = False
+        self._flusher: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._flusher = asyncio.create_task(self._run(), name="write-behind-flusher")
+
+    async def put(self, content) -> None:
+        """Queue ``content`` for a later batch upload, or raise if the queue is full."""
+        if self._closing:
+            raise WriteBehindQueueFull("Write-behind queue is shutting down")
+        line = json_codec.dumps(content) + b"\n"
+        try:
+            if self._enqueue_timeout > 0:
+                await asyncio.wait_for(self._queue.put(line), self._enqueue_timeout)
+            else:
+                self._queue.put_nowait(line)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            WRITE_BEHIND_REJECTED.inc()
+            raise WriteBehindQueueFull("Write-behind queue is full") from None
+        WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def aclose(self) -> None:
+        """
+        Stop accepting payloads and wait until every queued payload is flushed,
+        retried or dead-lettered.
+        """
+        self._closing = True
+        if self._flusher is None:
+            return
+        await self._queue.put(_STOP)
+        await self._flusher
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            size = len(item)
+            deadline = time.monotonic() + self._max_batch_age
+            while len(batch) < self._max_batch_count and size < self._max_batch_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                size += len(item)
+            WRITE_BEHIND_QUEUE_DEPTH.set(self._queue.qsize())
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[bytes]) -> None:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        file_name = f"{self._prefix}{timestamp}-{uuid.uuid4().hex[:8]}"
+        for attempt in range(self._max_retries + 1):
+            if attempt:
+                WRITE_BEHIND_RETRIES.inc()
+                await asyncio.sleep(self._retry_backoff * 2 ** (attempt - 1))
+            try:
+                # The same name on every attempt: a retry never adds an object
+                written = await self._gcs_client.write_lines(file_name, batch)
+            except Exception as e:
+                logger.warning(
+                    "Failed to write batch object",
+                    extra={
+                        "file_name": file_name,
+                        "payloads": len(batch),
+                        "attempt": attempt + 1,
+                        "error": str(e),
+                    },
+                )
+                continue
+            WRITE_BEHIND_BATCHES.labels(outcome="success").inc()
+            WRITE_BEHIND_PAYLOADS.labels(outcome="success").inc(len(batch))
+            logger.info(
+                "Wrote batch object",
+                extra={"file_name": written, "payloads": len(batch)},
+            )
+            return
+        WRITE_BEHIND_BATCHES.labels(outcome="error").inc()
+        WRITE_BEHIND_PAYLOADS.labels(outcome="error").inc(len(batch))
+        await self._dead_letter(file_name, batch)
+
+    async def _dead_letter(self, file_name: str, batch: list[bytes]) -> None:
+        WRITE_BEHIND_DEAD_LETTERED.inc(len(batch))
+        path = None
+        if self._dead_letter_dir is not None:
+            path = os.path.join(self._dead_letter_dir, file_name + ".ndjson")
+            try:
+                await asyncio.to_thread(_write_file, path, batch)
+            except OSError as e:
+                logger.error(
+                    "Failed to save dead-lettered batch",
+                    extra={"path": path, "error": str(e)},
+                )
+                path = None
+        logger.error(
+            "Gave up writing batch object",
+            extra={
+                "file_name": file_name,
+                "payloads": len(batch),
+                "attempts": self._max_retries + 1,
+                "dead_letter_path": path,
+            },
+        )
+
+
+def _write_file(path: str, lines: list[bytes]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.writelines(lines)
+
+
+def get_write_behind_queue(request: Request) -> WriteBehindQueue | None:
+    """FastAPI dependency returning the write-behind queue, or None when disabled."""
+    return getattr(request.app.state, "write_behind", None)
@@ -1,6 +1,11 @@
 from .fastapi import FastAPISettings
 from .uvicorn import UvicornSettings
+from .upstream import UpstreamSettings
 from .gcsbucket import GCSBucketSettings
+from .metrics import MetricsSettings
+from .debug import DebugSettings
+from .simulator import SimulatorSettings
+from .admission import AdmissionSettings
 
 
 class Settings:
@@ -13,7 +18,12 @@ class Settings:
     def __init__(self):
         self.fastapi = FastAPISettings()
         self.uvicorn = UvicornSettings()
+        self.upstream = UpstreamSettings()
         self.gcsbucket = GCSBucketSettings()
+        self.metrics = MetricsSettings()
+        self.debug = DebugSettings()
+        self.simulator = SimulatorSettings()
+        self.admission = AdmissionSettings()
 
 
 settings = Settings()
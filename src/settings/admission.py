@@ -0,0 +1,78 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class AdmissionSettings(BaseSettings):
+    """
+    Configuration for admission control and load shedding.
+
+    Automatically loads values from environment variables with the `ADMISSION_` prefix.
+    Every route group gets its own concurrency limit (bulkhead) and wait queue;
+    requests beyond both are answered with 503 and Retry-After. The limits plus
+    queue sizes of all groups should stay below `UVICORN_MAX_CONCURRENCY`, so
+    Uvicorn itself never rejects the health probes' reserved lane.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="ADMISSION_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    enabled: bool = Field(
+        default=True,
+        description="Enable admission control and load shedding.",
+    )
+    priority_concurrency: int = Field(
+        default=32,
+        ge=1,
+        description="Concurrent requests reserved for /health, /version and /metrics.",
+    )
+    greetings_concurrency: int = Field(
+        default=256,
+        ge=1,
+        description="Concurrent requests allowed for the greeting endpoints.",
+    )
+    bucket_concurrency: int = Field(
+        default=32,
+        ge=1,
+        description="Concurrent requests allowed for the write-to-bucket endpoints.",
+    )
+    proxy_concurrency: int = Field(
+        default=128,
+        ge=1,
+        description="Concurrent requests allowed for the upstream proxy endpoint.",
+    )
+    default_concurrency: int = Field(
+        default=64,
+        ge=1,
+        description="Concurrent requests allowed for any other route.",
+    )
+    queue_size: int = Field(
+        default=64,
+        ge=0,
+        description="Requests each group lets wait for a free slot; more are shed at once.",
+    )
+    max_queue_wait: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds a request may wait for a slot while its group keeps up.",
+    )
+    target_queue_delay: float = Field(
+        default=0.05,
+        gt=0,
+        description=(
+            "Seconds a request may wait for a slot once its group is overloaded, "
+            "i.e. once its queue has not emptied for a whole interval."
+        ),
+    )
+    interval: float = Field(
+        default=0.1,
+        gt=0,
+        description="Seconds a group's queue must stay non-empty before it counts as overloaded.",
+    )
+    retry_after: int = Field(
+        default=1,
+        ge=0,
+        description="Retry-After, in seconds, sent with shed requests.",
+    )
@@ -0,0 +1,37 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class DebugSettings(BaseSettings):
+    """
+    Configuration for live debugging endpoints.
+
+    Automatically loads values from environment variables with the `DEBUG_` prefix.
+    Everything is disabled by default.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="DEBUG_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    profiler_enabled: bool = Field(
+        default=False,
+        description="Mount the /debug/profile sampling profiler endpoint.",
+    )
+    profiler_token: str | None = Field(
+        default=None,
+        description=(
+            "Bearer token required to call /debug/profile. The endpoint refuses "
+            "every call while no token is configured."
+        ),
+    )
+    profiler_interval: float = Field(
+        default=0.005,
+        description="Seconds between two stack samples.",
+    )
+    profiler_max_seconds: float = Field(
+        default=60.0,
+        description="Longest profile that can be requested.",
+    )
@@ -21,3 +21,26 @@ class FastAPISettings(BaseSettings):
         default=True,
         description="Enable or disable FastAPI documentation endpoints (/docs and /redoc).",
     )
+    greeting_cache_max_age: int = Field(
+        default=300,
+        description="Seconds clients may cache the constant (unnamed) greeting responses.",
+    )
+    batch_max_names: int = Field(
+        default=10000,
+        description="Maximum number of names accepted by the batch greeting endpoints.",
+    )
+    batch_max_name_length: int = Field(
+        default=256,
+        description="Maximum length of a single name in a batch greeting request.",
+    )
+    batch_max_body_bytes: int = Field(
+        default=1024 * 1024,
+        description="Maximum request body size, in bytes, for the batch greeting endpoints.",
+    )
+    cold_start_mode: bool = Field(
+        default=False,
+        description=(
+            "Open the upstream HTTP client on first use instead of at startup, so "
+            "the app is ready to serve sooner and only upstream requests pay for it."
+        ),
+    )
@@ -1,8 +1,147 @@
-from pydantic import Field
+from typing import Literal
+
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+
 class GCSBucketSettings(BaseSettings):
-    bucket_name: str = Field(
-        default="test-python-shailen"
+    """
+    Configuration for the Google Cloud Storage bucket writer.
 
-    )
\ No newline at end of file
+    Automatically loads values from environment variables with the `GCSBUCKET_` prefix.
+    The bucket name is also read from the legacy `BUCKET_NAME` variable.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="GCSBUCKET_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    bucket_name: str = Field(
+        default="test-python-shailen",
+        validation_alias=AliasChoices("GCSBUCKET_BUCKET_NAME", "BUCKET_NAME"),
+        description="Name of the bucket payloads are written to.",
+    )
+    backend: Literal["gcs", "local", "memory", "simulated"] = Field(
+        default="gcs",
+        description=(
+            "Where objects are written: the GCS bucket, files under `local_root`, "
+            "process memory (for tests and benchmarks), or a simulated bucket "
+            "configured by the `SIMULATOR_STORAGE_*` settings."
+        ),
+    )
+    local_root: str = Field(
+        default="/tmp/x35-bucket",
+        description="Directory objects are written under when using the local backend.",
+    )
+    local_fsync: Literal["never", "always", "batch"] = Field(
+        default="batch",
+        description=(
+            "Local backend durability: never sync, sync every object before "
+            "acknowledging it, or sync written objects together every "
+            "`local_fsync_interval` seconds."
+        ),
+    )
+    local_fsync_interval: float = Field(
+        default=1.0,
+        description="Seconds between batched syncs when `local_fsync` is `batch`.",
+    )
+    memory_max_objects: int = Field(
+        default=10000,
+        description="Number of most recent objects the memory backend retains.",
+    )
+    format: Literal["ndjson", "ndjson.gz", "ndjson.zst", "parquet"] = Field(
+        default="ndjson",
+        description=(
+            "Format of batch objects. Compressed formats also compress single "
+            "JSON documents and set Content-Encoding; zstd needs `zstandard` and "
+            "parquet needs `pyarrow`."
+        ),
+    )
+    compression_level: int | None = Field(
+        default=None,
+        description="Compression level for gzip or zstd; the codec default when unset.",
+    )
+    parquet_row_group_size: int = Field(
+        default=10000,
+        description="Payloads per Parquet row group.",
+    )
+    dedup_enabled: bool = Field(
+        default=False,
+        description=(
+            "Skip single-document uploads whose bytes match the last upload to "
+            "the same object name."
+        ),
+    )
+    dedup_max_entries: int = Field(
+        default=100000,
+        description="Number of object names whose last content hash is remembered.",
+    )
+    conditional_writes: bool = Field(
+        default=False,
+        description=(
+            "With dedup, upload with generation preconditions so workers re-check "
+            "an object another worker changed instead of blindly overwriting it."
+        ),
+    )
+    max_workers: int = Field(
+        default=8,
+        description="Size of the thread pool running blocking uploads off the event loop.",
+    )
+    write_behind_enabled: bool = Field(
+        default=False,
+        description=(
+            "Acknowledge writes with 202 and upload them later, packed into NDJSON "
+            "batch objects, instead of one upload per request."
+        ),
+    )
+    write_behind_queue_size: int = Field(
+        default=10000,
+        description="Maximum number of payloads buffered in memory before rejecting writes.",
+    )
+    write_behind_enqueue_timeout: float = Field(
+        default=0.0,
+        description="Seconds a request waits for queue space before being rejected with 503.",
+    )
+    write_behind_max_batch_count: int = Field(
+        default=500,
+        description="Flush a batch once it holds this many payloads.",
+    )
+    write_behind_max_batch_bytes: int = Field(
+        default=4 * 1024 * 1024,
+        description="Flush a batch once its encoded size reaches this many bytes.",
+    )
+    write_behind_max_batch_age: float = Field(
+        default=2.0,
+        description="Flush a batch once its oldest payload has waited this many seconds.",
+    )
+    write_behind_prefix: str = Field(
+        default="batches/",
+        description="Object name prefix for NDJSON batch objects.",
+    )
+    write_behind_max_retries: int = Field(
+        default=5,
+        ge=0,
+        description="Times a failed batch upload is retried before the batch is dead-lettered.",
+    )
+    write_behind_retry_backoff: float = Field(
+        default=0.5,
+        gt=0,
+        description="Seconds before the first retry of a failed batch upload; doubles on each retry.",
+    )
+    write_behind_dead_letter_dir: str = Field(
+        default="",
+        description=(
+            "Local directory where batches that could not be uploaded are saved as "
+            "NDJSON files. Empty only counts and logs them."
+        ),
+    )
+    bulk_prefix: str = Field(
+        default="bulk/",
+        description="Object name prefix for NDJSON objects written by bulk requests.",
+    )
+    bulk_max_shards: int = Field(
+        default=16,
+        description="Maximum number of objects a single bulk request may be split into.",
+    )
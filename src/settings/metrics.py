@@ -0,0 +1,59 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class MetricsSettings(BaseSettings):
+    """
+    Configuration for Prometheus metrics collection.
+
+    Automatically loads values from environment variables with the `METRICS_` prefix.
+    List values are given as JSON, e.g. `METRICS_LATENCY_BUCKETS=[0.01, 0.1, 1]`.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="METRICS_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    latency_buckets: list[float] = Field(
+        default=[
+            0.005,
+            0.01,
+            0.025,
+            0.05,
+            0.075,
+            0.1,
+            0.25,
+            0.5,
+            0.75,
+            1.0,
+            2.5,
+            5.0,
+            10.0,
+        ],
+        description="Histogram buckets, in seconds, for HTTP request latency.",
+    )
+    size_buckets: list[float] = Field(
+        default=[100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000],
+        description="Histogram buckets, in bytes, for HTTP request and response sizes.",
+    )
+    multiprocess_dir: str = Field(
+        default="/tmp/prometheus_multiproc",
+        description=(
+            "Directory shared by worker processes to aggregate metrics when "
+            "Uvicorn runs more than one worker. Wiped on startup."
+        ),
+    )
+    sampler_interval: float = Field(
+        default=5.0,
+        description="Seconds between samples of memory, CPU, event-loop lag, FDs and threads.",
+    )
+    exposition_cache_ttl: float = Field(
+        default=1.0,
+        description="Seconds a rendered /metrics output is reused. 0 renders on every scrape.",
+    )
+    gzip_min_size: int = Field(
+        default=4096,
+        description="Compress /metrics output of at least this many bytes for clients accepting gzip.",
+    )
@@ -0,0 +1,98 @@
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+LatencyDistribution = Literal["none", "fixed", "lognormal", "long_tail"]
+
+
+class SimulatorSettings(BaseSettings):
+    """
+    Configuration for the local upstream and storage simulator.
+
+    Automatically loads values from environment variables with the `SIMULATOR_` prefix.
+    The simulator is off by default. Set `upstream_enabled` to answer upstream calls
+    in process, or `GCSBUCKET_BACKEND=simulated` to write to a simulated bucket.
+    Latencies are in seconds; rates are probabilities between 0 and 1.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="SIMULATOR_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    seed: int | None = Field(
+        default=None,
+        description="Seed for the simulator's random draws, for reproducible runs.",
+    )
+
+    upstream_enabled: bool = Field(
+        default=False,
+        description="Answer upstream calls with the in-process simulator instead of the network.",
+    )
+    upstream_latency: LatencyDistribution = Field(
+        default="lognormal",
+        description="Shape of the simulated upstream response time.",
+    )
+    upstream_latency_median: float = Field(
+        default=0.05,
+        description="Median simulated upstream response time (the exact time for `fixed`).",
+    )
+    upstream_latency_sigma: float = Field(
+        default=0.5,
+        description="Spread of the lognormal body of the upstream latency.",
+    )
+    upstream_tail_probability: float = Field(
+        default=0.01,
+        description="Probability an upstream call lands in the long tail (`long_tail` only).",
+    )
+    upstream_tail_multiplier: float = Field(
+        default=20.0,
+        description="How many times slower than the median a long-tail upstream call is, at least.",
+    )
+    upstream_error_rate: float = Field(
+        default=0.0,
+        description="Probability an upstream call answers with `upstream_error_status`.",
+    )
+    upstream_error_status: int = Field(
+        default=503,
+        description="Status code of simulated upstream errors.",
+    )
+    upstream_reset_rate: float = Field(
+        default=0.0,
+        description="Probability an upstream call has its connection reset.",
+    )
+    upstream_max_rps: float = Field(
+        default=0.0,
+        description="Upstream throughput cap in requests per second; 0 means unlimited.",
+    )
+
+    storage_latency: LatencyDistribution = Field(
+        default="lognormal",
+        description="Shape of the simulated bucket upload time.",
+    )
+    storage_latency_median: float = Field(
+        default=0.03,
+        description="Median simulated upload time (the exact time for `fixed`).",
+    )
+    storage_latency_sigma: float = Field(
+        default=0.5,
+        description="Spread of the lognormal body of the upload latency.",
+    )
+    storage_tail_probability: float = Field(
+        default=0.01,
+        description="Probability an upload lands in the long tail (`long_tail` only).",
+    )
+    storage_tail_multiplier: float = Field(
+        default=20.0,
+        description="How many times slower than the median a long-tail upload is, at least.",
+    )
+    storage_error_rate: float = Field(
+        default=0.0,
+        description="Probability a simulated upload fails.",
+    )
+    storage_bandwidth: float = Field(
+        default=0.0,
+        description="Simulated bucket bandwidth in bytes per second; 0 means unlimited.",
+    )
@@ -0,0 +1,142 @@
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class UpstreamSettings(BaseSettings):
+    """
+    Configuration for the shared upstream HTTP client used by the proxy service.
+
+    Automatically loads values from environment variables with the `UPSTREAM_` prefix.
+    Defaults are provided for all settings, ensuring that the proxy works even if
+    no environment variables are explicitly set.
+    """
+
+    model_config = SettingsConfigDict(
+        env_prefix="UPSTREAM_",
+        validate_assignment=True,
+        extra="forbid",
+    )
+
+    url: str = Field(
+        default="https://httpbin.org/post",
+        description="Upstream endpoint that proxied requests are posted to.",
+    )
+    max_connections: int = Field(
+        default=100,
+        description="Maximum number of concurrent connections in the shared pool.",
+    )
+    max_keepalive_connections: int = Field(
+        default=20,
+        description="Maximum number of idle connections kept open for reuse.",
+    )
+    keepalive_expiry: float = Field(
+        default=30.0,
+        description="Seconds an idle keep-alive connection is kept before being closed.",
+    )
+    timeout: float = Field(
+        default=10.0,
+        description="Default timeout in seconds for reading, writing and pool acquisition.",
+    )
+    connect_timeout: float = Field(
+        default=5.0,
+        description="Timeout in seconds for establishing a new upstream connection.",
+    )
+    pool_timeout: float = Field(
+        default=5.0,
+        description="Timeout in seconds to wait for a free connection from the pool.",
+    )
+    http2: bool = Field(
+        default=False,
+        description=(
+            "Use HTTP/2 for upstream calls so concurrent requests share a few "
+            "multiplexed connections instead of queueing for a free one."
+        ),
+    )
+    retries: int = Field(
+        default=3,
+        description="Number of connection retries performed by the transport.",
+    )
+    cache_enabled: bool = Field(
+        default=False,
+        description="Cache successful upstream responses for identical payloads.",
+    )
+    cache_ttl: float = Field(
+        default=5.0,
+        description="Seconds a cached upstream response stays valid.",
+    )
+    cache_max_size: int = Field(
+        default=1024,
+        description="Maximum number of cached upstream responses (least recently used are evicted).",
+    )
+    breaker_enabled: bool = Field(
+        default=True,
+        description="Fail fast with 503 while the upstream is known to be failing.",
+    )
+    breaker_failure_threshold: int = Field(
+        default=5,
+        description="Consecutive upstream failures that open the circuit.",
+    )
+    breaker_recovery_timeout: float = Field(
+        default=30.0,
+        description="Seconds the circuit stays open before probe calls are let through.",
+    )
+    breaker_half_open_max_calls: int = Field(
+        default=1,
+        description="Concurrent probe calls allowed while the circuit is half-open.",
+    )
+    limiter_enabled: bool = Field(
+        default=False,
+        description="Adapt the number of in-flight upstream calls to upstream latency (AIMD).",
+    )
+    limiter_initial_limit: int = Field(
+        default=20, description="Starting limit on in-flight upstream calls."
+    )
+    limiter_min_limit: int = Field(
+        default=1, description="Lowest value the adaptive limit can shrink to."
+    )
+    limiter_max_limit: int = Field(
+        default=1000, description="Highest value the adaptive limit can grow to."
+    )
+    limiter_latency_threshold: float = Field(
+        default=1.0,
+        description="Upstream latency in seconds above which the limit is reduced.",
+    )
+    limiter_backoff_ratio: float = Field(
+        default=0.9,
+        description=(
+            "Factor applied to the limit on a slow or failed upstream call, "
+            "at most once per round trip."
+        ),
+    )
+    hedge_enabled: bool = Field(
+        default=False,
+        description="Send a second attempt when the first is slower than usual.",
+    )
+    hedge_percentile: float = Field(
+        default=95.0,
+        description="Latency percentile after which a hedge attempt is sent.",
+    )
+    hedge_min_delay: float = Field(
+        default=0.05,
+        description="Lower bound (and warm-up value) for the hedge delay, in seconds.",
+    )
+    hedge_budget_ratio: float = Field(
+        default=0.05,
+        description="Maximum share of calls that may be hedged (0.05 = 5% extra load).",
+    )
+    hedge_window: int = Field(
+        default=1000,
+        description="Number of recent upstream latencies used to compute the percentile.",
+    )
+    hedge_min_samples: int = Field(
+        default=20,
+        description="Samples required before the percentile replaces the minimum delay.",
+    )
+    batch_concurrency: int = Field(
+        default=16,
+        description="Maximum upstream calls in flight for a single bulk write request.",
+    )
+    batch_max_items: int = Field(
+        default=1000,
+        description="Maximum number of payloads accepted by a single bulk write request.",
+    )
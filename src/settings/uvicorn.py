@@ -38,7 +38,7 @@ class UvicornSettings(BaseSettings):
     )
     loop: str = Field(
         default="auto",
-        description="Event loop implementation. 'auto' selects the best available.",
+        description="Event loop implementation. 'auto' selects the best available. The process manager always uses 'asyncio'.",
     )
     max_concurrency: int = Field(
         default=1000,
@@ -61,8 +61,30 @@ class UvicornSettings(BaseSettings):
     )
     workers: int = Field(
         default=1,
+        ge=0,
         description=(
-            "Number of worker processes. Use 1 in containerized environments like Kubernetes "
-            "where horizontal scaling is preferred."
+            "Number of worker processes; 0 starts one per CPU available to the process "
+            "(its CPU affinity, capped by any cgroup CPU quota). Use 1 in containerized "
+            "environments like Kubernetes where horizontal scaling is preferred."
         ),
     )
+    graceful_timeout: float = Field(
+        default=30.0,
+        description=(
+            "Seconds a stopping worker may spend finishing in-flight requests "
+            "before it is terminated."
+        ),
+    )
+    worker_max_memory: int = Field(
+        default=0,
+        ge=0,
+        description=(
+            "Resident memory, in bytes, above which the process manager replaces a "
+            "worker. Pages shared with the preloaded parent count too. 0 disables it."
+        ),
+    )
+    worker_check_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between the process manager's checks of its workers.",
+    )
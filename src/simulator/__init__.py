@@ -0,0 +1,29 @@
+"""
+Local stand-ins for the upstream and the bucket.
+
+Both draw response times from configurable latency distributions and inject
+errors, connection resets and throughput caps, so the service can be
+measured against slow or failing dependencies without leaving the machine.
+The upstream runs in process (``SIMULATOR_UPSTREAM_ENABLED``) or on a local
+port (``python -m simulator``); the bucket is selected with
+``GCSBUCKET_BACKEND=simulated``.
+"""
+
+from .faults import FaultProfile, LatencyModel, Throttle
+from .storage import SimulatedBackend, create_simulated_backend
+from .upstream import (
+    SimulatedUpstreamTransport,
+    create_simulated_transport,
+    create_upstream_app,
+)
+
+__all__ = [
+    "FaultProfile",
+    "LatencyModel",
+    "SimulatedBackend",
+    "SimulatedUpstreamTransport",
+    "Throttle",
+    "create_simulated_backend",
+    "create_simulated_transport",
+    "create_upstream_app",
+]
@@ -0,0 +1,30 @@
+"""Serve the simulated upstream on a local port.
+
+Usage: ``python -m simulator [--host HOST] [--port PORT]``, configured with
+the ``SIMULATOR_UPSTREAM_*`` environment variables. Point the service at it
+with ``UPSTREAM_URL=http://HOST:PORT/post``.
+"""
+
+import argparse
+
+import uvicorn
+
+from settings import settings
+from simulator.upstream import create_upstream_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulated upstream server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_upstream_app(settings.simulator),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Latency distributions, fault injection and throughput caps."""
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class LatencyModel:
+    """
+    Distribution simulated response times are drawn from.
+
+    - ``none``: no delay.
+    - ``fixed``: always ``median``.
+    - ``lognormal``: lognormal around ``median`` with shape ``sigma``.
+    - ``long_tail``: lognormal, except that a ``tail_probability`` share of
+      draws is at least ``tail_multiplier`` times the median, Pareto
+      distributed beyond that.
+    """
+
+    distribution: str = "fixed"
+    median: float = 0.0
+    sigma: float = 0.5
+    tail_probability: float = 0.01
+    tail_multiplier: float = 20.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "none" or self.median <= 0:
+            return 0.0
+        if self.distribution == "fixed":
+            return self.median
+        if self.distribution == "lognormal":
+            return rng.lognormvariate(math.log(self.median), self.sigma)
+        if self.distribution == "long_tail":
+            if rng.random() < self.tail_probability:
+                return self.median * self.tail_multiplier * rng.paretovariate(1.5)
+            return rng.lognormvariate(math.log(self.median), self.sigma)
+        raise ValueError(f"Unknown latency distribution: {self.distribution}")
+
+
+class Throttle:
+    """
+    Thread-safe throughput cap of ``rate`` units per second.
+
+    ``reserve(amount)`` books capacity and returns how long the caller must
+    wait before its work may proceed, so async and blocking callers can both
+    share it. A rate of 0 disables the cap.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._next_free = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + amount / self.rate
+            return self._next_free - now
+
+
+@dataclass
+class Outcome:
+    """What a simulated call does: wait ``delay`` seconds, then ``fault`` or succeed."""
+
+    delay: float
+    #: ``None`` for success, ``"error"`` or ``"reset"``.
+    fault: str | None = None
+
+
+class FaultProfile:
+    """Draws the latency and fault of each simulated call."""
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        reset_rate: float = 0.0,
+        throttle: Throttle | None = None,
+        rng: random.Random | None = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.throttle = throttle if throttle is not None else Throttle(0)
+        self._rng = rng if rng is not None else random.Random()
+        self._rng_lock = threading.Lock()
+
+    def draw(self, amount: float = 1.0) -> Outcome:
+        """Decide the next call's outcome; ``amount`` is charged to the throttle."""
+        with self._rng_lock:
+            delay = self.latency.sample(self._rng)
+            roll = self._rng.random()
+        delay += self.throttle.reserve(amount)
+        if roll < self.reset_rate:
+            return Outcome(delay, "reset")
+        if roll < self.reset_rate + self.error_rate:
+            return Outcome(delay, "error")
+        return Outcome(delay)
@@ -0,0 +1,78 @@
+"""Simulated bucket with configurable latency, failures and bandwidth."""
+
+import random
+import time
+from typing import Iterable
+
+from clients.storage import MemoryBackend, ObjectInfo, StorageBackend
+from settings.simulator import SimulatorSettings
+from simulator.faults import FaultProfile, LatencyModel, Throttle
+
+
+class SimulatedStorageError(Exception):
+    pass
+
+
+class SimulatedBackend(StorageBackend):
+    """
+    Storage backend that behaves like a slow, unreliable bucket.
+
+    Objects are kept by an inner ``MemoryBackend``. Each write first sleeps
+    for a delay drawn from ``profile``, plus the time needed to push the
+    bytes through the profile's throttle (bytes per second), then either
+    fails or stores the object. Writes block, so they run on the bucket
+    client's thread pool exactly like real uploads.
+    """
+
+    def __init__(self, profile: FaultProfile, inner: MemoryBackend | None = None):
+        self.profile = profile
+        self.inner = inner if inner is not None else MemoryBackend()
+
+    def _simulate(self, file_name: str, size: int) -> None:
+        outcome = self.profile.draw(size)
+        if outcome.delay:
+            time.sleep(outcome.delay)
+        if outcome.fault is not None:
+            raise SimulatedStorageError(f"Simulated upload failure for {file_name}")
+
+    def write(
+        self,
+        file_name: str,
+        data: bytes,
+        content_type: str,
+        content_encoding: str | None = None,
+        if_generation_match: int | None = None,
+    ) -> int | None:
+        self._simulate(file_name, len(data))
+        return self.inner.write(
+            file_name, data, content_type, content_encoding, if_generation_match
+        )
+
+    def write_stream(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        content_type: str,
+        content_encoding: str | None = None,
+    ) -> None:
+        self.write(file_name, b"".join(chunks), content_type, content_encoding)
+
+    def stat(self, file_name: str) -> ObjectInfo | None:
+        return self.inner.stat(file_name)
+
+
+def create_simulated_backend(simulator: SimulatorSettings) -> SimulatedBackend:
+    return SimulatedBackend(
+        FaultProfile(
+            LatencyModel(
+                simulator.storage_latency,
+                median=simulator.storage_latency_median,
+                sigma=simulator.storage_latency_sigma,
+                tail_probability=simulator.storage_tail_probability,
+                tail_multiplier=simulator.storage_tail_multiplier,
+            ),
+            error_rate=simulator.storage_error_rate,
+            throttle=Throttle(simulator.storage_bandwidth),
+            rng=random.Random(simulator.seed),
+        )
+    )
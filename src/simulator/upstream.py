@@ -0,0 +1,156 @@
+"""Simulated upstream answering like httpbin's ``/post``."""
+
+import asyncio
+import random
+
+import httpx
+
+import json_codec
+from settings.simulator import SimulatorSettings
+from simulator.faults import FaultProfile, LatencyModel, Throttle
+
+
+def upstream_profile(simulator: SimulatorSettings) -> FaultProfile:
+    """Build the upstream fault profile described by the simulator settings."""
+    return FaultProfile(
+        LatencyModel(
+            simulator.upstream_latency,
+            median=simulator.upstream_latency_median,
+            sigma=simulator.upstream_latency_sigma,
+            tail_probability=simulator.upstream_tail_probability,
+            tail_multiplier=simulator.upstream_tail_multiplier,
+        ),
+        error_rate=simulator.upstream_error_rate,
+        reset_rate=simulator.upstream_reset_rate,
+        throttle=Throttle(simulator.upstream_max_rps),
+        rng=random.Random(simulator.seed),
+    )
+
+
+def echo_body(method: str, url: str, headers: dict, content: bytes) -> bytes:
+    """Render the JSON document httpbin returns for a request."""
+    try:
+        parsed = json_codec.loads(content) if content else None
+    except ValueError:
+        parsed = None
+    return json_codec.dumps(
+        {
+            "args": {},
+            "data": content.decode("utf-8", errors="replace"),
+            "files": {},
+            "form": {},
+            "headers": headers,
+            "json": parsed,
+            "method": method,
+            "origin": "127.0.0.1",
+            "url": url,
+        }
+    )
+
+
+def _error_body(status_code: int) -> bytes:
+    return json_codec.dumps(
+        {"error": "Simulated upstream error", "status": status_code}
+    )
+
+
+class SimulatedUpstreamTransport(httpx.AsyncBaseTransport):
+    """
+    In-process httpx transport standing in for the upstream.
+
+    Every request is answered after a delay drawn from ``profile``: with an
+    httpbin-style echo, with ``error_status``, or by failing as if the
+    connection had been reset.
+    """
+
+    def __init__(self, profile: FaultProfile, error_status: int = 503):
+        self.profile = profile
+        self.error_status = error_status
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        outcome = self.profile.draw()
+        if outcome.delay:
+            await asyncio.sleep(outcome.delay)
+        if outcome.fault == "reset":
+            raise httpx.ReadError(
+                "Connection reset by peer (simulated)", request=request
+            )
+        if outcome.fault == "error":
+            status_code = self.error_status
+            body = _error_body(status_code)
+        else:
+            status_code = 200
+            body = echo_body(
+                request.method, str(request.url), dict(request.headers), content
+            )
+        return httpx.Response(
+            status_code,
+            headers={"Content-Type": "application/json"},
+            stream=httpx.ByteStream(body),
+            request=request,
+        )
+
+
+def create_simulated_transport(
+    simulator: SimulatorSettings,
+) -> SimulatedUpstreamTransport:
+    return SimulatedUpstreamTransport(
+        upstream_profile(simulator), error_status=simulator.upstream_error_status
+    )
+
+
+def create_upstream_app(simulator: SimulatorSettings):
+    """
+    ASGI app serving the simulated upstream on a real port.
+
+    Any path answers like httpbin's ``/post``. A simulated reset sends the
+    response headers and then aborts, so the client sees the connection drop
+    mid-response.
+    """
+    profile = upstream_profile(simulator)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                else:
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        content = b"".join(chunks)
+
+        outcome = profile.draw()
+        if outcome.delay:
+            await asyncio.sleep(outcome.delay)
+        if outcome.fault == "error":
+            status_code = simulator.upstream_error_status
+            body = _error_body(status_code)
+        else:
+            status_code = 200
+            headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+            url = f"http://{headers.get('host', 'localhost')}{scope['path']}"
+            body = echo_body(scope["method"], url, headers, content)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        if outcome.fault == "reset":
+            raise ConnectionResetError("Simulated connection reset")
+        await send({"type": "http.response.body", "body": body})
+
+    return app
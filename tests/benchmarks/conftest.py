@@ -0,0 +1,71 @@
+"""
+Load-testing and benchmark suite for the ASGI app.
+
+Tests marked ``benchmark`` only run with ``X35_BENCHMARKS=1``; the rest of
+this directory tests the load generator itself and always runs. Other
+settings, all optional:
+
+- ``X35_BENCH_TARGET``: ``asgi`` (default) drives ``create_app()`` in
+  process; ``uvicorn`` serves it from a real local uvicorn server.
+- ``X35_BENCH_MODES``: comma-separated load modes, ``closed,fixed`` by default.
+- ``X35_BENCH_DURATION``, ``X35_BENCH_CONCURRENCY``, ``X35_BENCH_RPS``:
+  seconds per run, closed-loop concurrency and fixed-mode request rate.
+- ``X35_BENCH_OUTPUT``: where results are saved as JSON
+  (``benchmark-results.json``).
+- ``X35_BENCH_BASELINE``: baseline to compare against
+  (``tests/benchmarks/baseline.json``); a run fails when it regresses by
+  more than ``X35_BENCH_THRESHOLD`` (``0.2``, i.e. 20%).
+- ``X35_BENCH_UPDATE_BASELINE=1``: record this run as the new baseline.
+- ``X35_BENCH_SIMULATE=1``: give the simulated upstream and bucket the
+  latency and faults configured by the ``SIMULATOR_*`` variables; by default
+  they answer instantly.
+
+Baselines are machine specific, so none is checked in: record one on the
+machine that will run the comparison.
+"""
+
+import json
+import os
+
+import pytest
+
+from harness import CONFIG, RESULTS, BenchConfig, load_baseline, result_key
+
+BENCHMARKS_ENABLED = os.getenv("X35_BENCHMARKS") == "1"
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: load test, only run with X35_BENCHMARKS=1"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if BENCHMARKS_ENABLED:
+        return
+    skip = pytest.mark.skip(reason="set X35_BENCHMARKS=1 to run benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not RESULTS:
+        return
+    CONFIG.output.write_text(json.dumps(RESULTS, indent=2) + "\n")
+    if CONFIG.update_baseline:
+        baseline = load_baseline()
+        baseline.update({result_key(result): result for result in RESULTS})
+        CONFIG.baseline.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + "\n"
+        )
+
+
+@pytest.fixture
+def bench_config() -> BenchConfig:
+    return CONFIG
+
+
+@pytest.fixture
+def bench_results() -> list[dict]:
+    return RESULTS
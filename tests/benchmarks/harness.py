@@ -0,0 +1,68 @@
+"""Configuration, result bookkeeping and server helpers for the benchmark suite."""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class BenchConfig:
+    target: str = os.getenv("X35_BENCH_TARGET", "asgi")
+    modes: list[str] = field(
+        default_factory=lambda: os.getenv("X35_BENCH_MODES", "closed,fixed").split(",")
+    )
+    duration: float = float(os.getenv("X35_BENCH_DURATION", "3"))
+    concurrency: int = int(os.getenv("X35_BENCH_CONCURRENCY", "32"))
+    rps: float = float(os.getenv("X35_BENCH_RPS", "200"))
+    output: Path = Path(os.getenv("X35_BENCH_OUTPUT", "benchmark-results.json"))
+    baseline: Path = Path(
+        os.getenv("X35_BENCH_BASELINE", Path(__file__).parent / "baseline.json")
+    )
+    threshold: float = float(os.getenv("X35_BENCH_THRESHOLD", "0.2"))
+    update_baseline: bool = os.getenv("X35_BENCH_UPDATE_BASELINE") == "1"
+    simulate: bool = os.getenv("X35_BENCH_SIMULATE") == "1"
+
+
+CONFIG = BenchConfig()
+RESULTS: list[dict] = []
+
+
+def result_key(result: dict) -> str:
+    return f"{result['target']}/{result['scenario']}/{result['mode']}"
+
+
+def load_baseline() -> dict:
+    if not CONFIG.baseline.exists():
+        return {}
+    return json.loads(CONFIG.baseline.read_text())
+
+
+class UvicornThread:
+    """Serves an ASGI app from a real uvicorn server on a background thread."""
+
+    def __init__(self, app):
+        import uvicorn
+
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"
+        )
+        self.server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        (server,) = self.server.servers
+        port = server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
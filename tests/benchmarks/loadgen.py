@@ -0,0 +1,177 @@
+"""Async load generator and regression check for the benchmark suite."""
+
+import asyncio
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable
+
+import psutil
+
+# A request sender returns the HTTP status code of one request
+Sender = Callable[[], Awaitable[int]]
+
+
+@dataclass
+class LoadResult:
+    scenario: str
+    mode: str
+    requests: int
+    errors: int
+    duration: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    peak_rss_bytes: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def percentile(latencies: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``latencies``; 0 when there are none."""
+    if not latencies:
+        return 0.0
+    ordered = sorted(latencies)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class _RSSSampler:
+    """Tracks the process's peak resident set size while a run is in progress."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._process = psutil.Process()
+        self._task = None
+
+    def _sample(self) -> None:
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+    async def _run(self) -> None:
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> int:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+        return self.peak
+
+
+async def _closed_loop(send: Sender, duration: float, concurrency: int, record) -> None:
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await send()
+            record(started, status)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def _fixed_rate(send: Sender, duration: float, rps: float, record) -> None:
+    start = time.perf_counter()
+    total = int(duration * rps)
+    tasks = []
+
+    async def one(scheduled: float) -> None:
+        status = await send()
+        # Measured from the scheduled start, so a stalled server is not
+        # hidden by requests that were simply sent late
+        record(scheduled, status)
+
+    for i in range(total):
+        scheduled = start + i / rps
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(scheduled)))
+    await asyncio.gather(*tasks)
+
+
+async def run_load(
+    scenario: str,
+    send: Sender,
+    mode: str = "closed",
+    duration: float = 3.0,
+    concurrency: int = 32,
+    rps: float = 200.0,
+) -> LoadResult:
+    """
+    Drive ``send`` for ``duration`` seconds and summarise the run.
+
+    ``closed`` mode keeps ``concurrency`` requests in flight back to back and
+    measures capacity. ``fixed`` mode issues ``rps`` requests per second
+    regardless of how fast they complete and measures latency under a known
+    load. Responses with status 400 and above count as errors.
+    """
+    latencies: list[float] = []
+    errors = 0
+
+    def record(started: float, status: int) -> None:
+        nonlocal errors
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors += 1
+
+    sampler = _RSSSampler()
+    sampler.start()
+    started = time.perf_counter()
+    if mode == "closed":
+        await _closed_loop(send, duration, concurrency, record)
+    elif mode == "fixed":
+        await _fixed_rate(send, duration, rps, record)
+    else:
+        raise ValueError(f"Unknown load mode: {mode}")
+    elapsed = time.perf_counter() - started
+    peak_rss = await sampler.stop()
+
+    return LoadResult(
+        scenario=scenario,
+        mode=mode,
+        requests=len(latencies),
+        errors=errors,
+        duration=elapsed,
+        throughput=len(latencies) / elapsed if elapsed else 0.0,
+        p50=percentile(latencies, 50),
+        p95=percentile(latencies, 95),
+        p99=percentile(latencies, 99),
+        peak_rss_bytes=peak_rss,
+    )
+
+
+def find_regressions(result: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare a result with its baseline and describe every regression.
+
+    Throughput may drop, and p99 latency grow, by at most ``threshold``
+    (a fraction) before it counts as a regression. Throughput is only
+    compared for closed-loop runs, where it measures capacity; a fixed-rate
+    run's throughput is set by the generator.
+    """
+    problems = []
+    if result["mode"] == "closed":
+        floor = baseline["throughput"] * (1 - threshold)
+        if result["throughput"] < floor:
+            problems.append(
+                f"throughput {result['throughput']:.0f} req/s is below "
+                f"{floor:.0f} req/s (baseline {baseline['throughput']:.0f})"
+            )
+    ceiling = baseline["p99"] * (1 + threshold)
+    if result["p99"] > ceiling:
+        problems.append(
+            f"p99 {result['p99'] * 1000:.2f} ms is above {ceiling * 1000:.2f} ms "
+            f"(baseline {baseline['p99'] * 1000:.2f} ms)"
+        )
+    return problems
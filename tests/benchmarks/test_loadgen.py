@@ -0,0 +1,57 @@
+"""Tests for the benchmark load generator and regression check."""
+
+import asyncio
+
+import pytest
+
+from loadgen import find_regressions, percentile, run_load
+
+
+def test_percentile_nearest_rank():
+    latencies = [float(i) for i in range(1, 101)]
+    assert percentile(latencies, 50) == 50.0
+    assert percentile(latencies, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_closed_loop_keeps_concurrency_in_flight():
+    in_flight = 0
+    peak = 0
+
+    async def send():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return 200
+
+    result = await run_load("fake", send, mode="closed", duration=0.2, concurrency=4)
+    assert peak == 4
+    assert result.requests >= 40
+    assert result.errors == 0
+    assert result.p50 >= 0.01
+    assert result.peak_rss_bytes > 0
+
+
+@pytest.mark.asyncio
+async def test_fixed_rate_issues_requests_on_schedule():
+    async def send():
+        return 503
+
+    result = await run_load("fake", send, mode="fixed", duration=0.5, rps=40)
+    assert result.requests == 20
+    assert result.errors == 20
+
+
+def test_find_regressions():
+    baseline = {"mode": "closed", "throughput": 1000.0, "p99": 0.010}
+    ok = {"mode": "closed", "throughput": 900.0, "p99": 0.011}
+    slow = {"mode": "closed", "throughput": 700.0, "p99": 0.020}
+    assert find_regressions(ok, baseline, 0.2) == []
+    assert len(find_regressions(slow, baseline, 0.2)) == 2
+    # A fixed-rate run's throughput is set by the generator, not the app
+    assert find_regressions({**slow, "mode": "fixed"}, baseline, 0.2) == [
+        find_regressions(slow, baseline, 0.2)[1]
+    ]
@@ -0,0 +1,99 @@
+"""Throughput and latency benchmarks for the main endpoints."""
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from clients.gcs_client import GCSBucketClient, get_gcs_client
+from clients.httpx import get_httpx_client
+from harness import CONFIG, UvicornThread, load_baseline, result_key
+from loadgen import find_regressions, run_load
+from settings.simulator import SimulatorSettings
+from simulator import create_simulated_backend, create_simulated_transport
+from src.app import create_app
+
+pytestmark = pytest.mark.benchmark
+
+SCENARIOS = {
+    "hello_default": ("GET", "/api/v1/hello", None),
+    "hello_named": ("GET", "/api/v1/hello?name=bench", None),
+    "hello_write": (
+        "POST",
+        "/api/v1/hello",
+        {"message": "bench", "name": "bench", "test_number": 1},
+    ),
+    "health": ("GET", "/health", None),
+    "metrics": ("GET", "/metrics", None),
+}
+
+
+def simulator_settings(bench_config) -> SimulatorSettings:
+    """
+    Dependency behaviour for the run.
+
+    By default the upstream and bucket answer instantly, so the benchmarks
+    measure the app itself. With X35_BENCH_SIMULATE=1 they follow the
+    SIMULATOR_* environment variables instead, e.g. to measure how the
+    service holds up when a dependency is slow or failing.
+    """
+    if bench_config.simulate:
+        return SimulatorSettings()
+    return SimulatorSettings(upstream_latency="none", storage_latency="none")
+
+
+@pytest_asyncio.fixture
+async def bench_client(bench_config):
+    """
+    Client for the app under test, with the upstream and bucket simulated in
+    process so the benchmarks never touch the network.
+    """
+    simulator = simulator_settings(bench_config)
+    app = create_app()
+    upstream = httpx.AsyncClient(transport=create_simulated_transport(simulator))
+    gcs_client = GCSBucketClient("bench", backend=create_simulated_backend(simulator))
+    app.dependency_overrides[get_httpx_client] = lambda: upstream
+    app.dependency_overrides[get_gcs_client] = lambda: gcs_client
+    limits = httpx.Limits(max_connections=bench_config.concurrency)
+
+    if bench_config.target == "uvicorn":
+        with UvicornThread(app) as base_url:
+            async with AsyncClient(base_url=base_url, limits=limits) as client:
+                yield client
+    else:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            yield client
+    await gcs_client.aclose()
+    await upstream.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", CONFIG.modes)
+@pytest.mark.parametrize("scenario", SCENARIOS)
+async def test_endpoint_load(bench_client, bench_config, bench_results, scenario, mode):
+    method, url, body = SCENARIOS[scenario]
+
+    async def send() -> int:
+        response = await bench_client.request(method, url, json=body)
+        return response.status_code
+
+    result = await run_load(
+        scenario,
+        send,
+        mode=mode,
+        duration=bench_config.duration,
+        concurrency=bench_config.concurrency,
+        rps=bench_config.rps,
+    )
+    summary = {"target": bench_config.target, **result.to_dict()}
+    bench_results.append(summary)
+
+    assert result.requests > 0
+    assert result.errors == 0, f"{result.errors} of {result.requests} requests failed"
+    baseline = load_baseline().get(result_key(summary))
+    if baseline is not None and not bench_config.update_baseline:
+        regressions = find_regressions(summary, baseline, bench_config.threshold)
+        assert not regressions, f"{result_key(summary)}: " + "; ".join(regressions)
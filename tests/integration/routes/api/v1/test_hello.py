@@ -1,9 +1,12 @@
 """Integration tests for v1 hello endpoint."""
 
+import json
+
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from src.app import create_app
+from settings import settings
 
 
 @pytest_asyncio.fixture
@@ -47,3 +50,85 @@ class TestHelloEndpoint:
         response = await async_client.get(f"/api/v1/hello?name={name}")
         assert response.status_code == 200
         assert response.json() == {"message": "Hello, World, I'm version 1!"}
+
+    @pytest.mark.asyncio
+    async def test_hello_default_is_revalidated_with_etag(self, async_client):
+        """
+        Test that the default greeting carries an ETag and honours If-None-Match.
+        """
+        response = await async_client.get("/api/v1/hello")
+        etag = response.headers["etag"]
+        assert "max-age" in response.headers["cache-control"]
+
+        cached = await async_client.get(
+            "/api/v1/hello", headers={"If-None-Match": f'W/"stale", {etag}'}
+        )
+        assert cached.status_code == 304
+
+        named = await async_client.get("/api/v1/hello?name=Alice")
+        assert "etag" not in named.headers
+
+
+class TestHelloBatchEndpoint:
+    @pytest.mark.asyncio
+    async def test_hello_batch_streams_ndjson(self, async_client):
+        """
+        Test that every name gets one NDJSON line, in request order.
+        """
+        response = await async_client.post(
+            "/api/v1/hello/batch", json={"names": ["Alice", " ", "Bob"]}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [
+            {"name": "Alice", "message": "Hello, Alice, I'm version 1!"},
+            {"name": " ", "message": "Hello, World, I'm version 1!"},
+            {"name": "Bob", "message": "Hello, Bob, I'm version 1!"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_hello_batch_large(self, async_client):
+        """
+        Test a batch large enough to span several streamed chunks.
+        """
+        names = [f"name-{i}" for i in range(5000)]
+        response = await async_client.post("/api/v1/hello/batch", json={"names": names})
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert len(lines) == len(names)
+        assert json.loads(lines[-1])["name"] == "name-4999"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "names", [[], ["x" * (settings.fastapi.batch_max_name_length + 1)]]
+    )
+    async def test_hello_batch_rejects_invalid_items(self, async_client, names):
+        """
+        Test that empty batches and oversized names fail validation.
+        """
+        response = await async_client.post("/api/v1/hello/batch", json={"names": names})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_hello_batch_rejects_oversized_body(self, async_client):
+        """
+        Test that bodies over the configured limit are refused with 413.
+        """
+        body = b'{"names": ["' + b"x" * settings.fastapi.batch_max_body_bytes + b'"]}'
+        response = await async_client.post(
+            "/api/v1/hello/batch",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 413
+
+        async def chunked():
+            yield body
+
+        response = await async_client.post(
+            "/api/v1/hello/batch",
+            content=chunked(),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 413
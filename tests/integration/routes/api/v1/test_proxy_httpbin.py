@@ -1,21 +1,83 @@
 """Integration tests for v1 proxy-httpbin endpoint."""
 
+import asyncio
+
+import httpx
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from clients.httpx import get_httpx_client
+from services.resilience import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    UpstreamGuard,
+    get_upstream_guard,
+)
+from settings import settings
 from src.app import create_app
 
+UPSTREAM_BODY = b'{"json": {"message": "test message"},  "origin": "1.2.3.4"}'
+
 
 @pytest_asyncio.fixture
-async def async_client():
+async def async_client(monkeypatch):
     """
     Create an async test client for the FastAPI app.
-    Routes requests to the FastAPI app without actual networking.
+    Routes requests to the FastAPI app without actual networking; the
+    upstream is answered by the in-process simulator.
     """
+    monkeypatch.setattr(settings.simulator, "upstream_enabled", True)
+    monkeypatch.setattr(settings.simulator, "upstream_latency", "none")
     app = create_app()
     transport = ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            yield client
+
+
+def upstream_handler(request: httpx.Request) -> httpx.Response:
+    if b"fail" in request.content:
+        return httpx.Response(502, stream=httpx.ByteStream(b"bad gateway"))
+    return httpx.Response(
+        200,
+        stream=httpx.ByteStream(UPSTREAM_BODY),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+@pytest.fixture
+def upstream_calls():
+    return []
+
+
+@pytest.fixture
+def guard():
+    return UpstreamGuard(
+        breaker=CircuitBreaker(failure_threshold=2),
+        limiter=AdaptiveLimiter(initial_limit=5),
+    )
+
+
+@pytest_asyncio.fixture
+async def mocked_client(upstream_calls, guard):
+    """
+    Create an async test client whose upstream is served by a mock transport.
+    """
+    app = create_app()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request)
+        return upstream_handler(request)
+
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[get_upstream_guard] = lambda: guard
+    app.dependency_overrides[get_httpx_client] = lambda: upstream
+    transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://testserver") as client:
         yield client
+    await upstream.aclose()
 
 
 class TestProxyHttpbinEndpoint:
@@ -38,3 +100,109 @@ class TestProxyHttpbinEndpoint:
 
         response = await async_client.post("/api/v1/proxy-httpbin", json=invalid_data)
         assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream", ["false", "true"])
+    async def test_proxy_returns_upstream_bytes_unchanged(self, mocked_client, stream):
+        """
+        The upstream body is relayed byte for byte, buffered or streamed.
+        """
+        response = await mocked_client.post(
+            f"/api/v1/proxy-httpbin?stream={stream}", json={"message": "test message"}
+        )
+        assert response.status_code == 200
+        assert response.content == UPSTREAM_BODY
+        assert response.headers["Content-Type"] == "application/json"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream", ["false", "true"])
+    async def test_proxy_upstream_error(self, mocked_client, stream):
+        response = await mocked_client.post(
+            f"/api/v1/proxy-httpbin?stream={stream}", json={"message": "fail"}
+        )
+        assert response.status_code == 502
+        assert response.json()["error"] == "Upstream service error"
+
+    @pytest.mark.asyncio
+    async def test_streamed_failures_open_the_circuit(
+        self, mocked_client, upstream_calls, guard
+    ):
+        """
+        Streamed calls feed the breaker and fail fast once it is open.
+        """
+        for _ in range(2):
+            response = await mocked_client.post(
+                "/api/v1/proxy-httpbin?stream=true", json={"message": "fail"}
+            )
+            assert response.status_code == 502
+        assert guard.breaker.state == CircuitBreaker.OPEN
+
+        response = await mocked_client.post(
+            "/api/v1/proxy-httpbin?stream=true", json={"message": "test message"}
+        )
+        assert response.status_code == 503
+        assert response.json()["details"] == "circuit_open"
+        assert len(upstream_calls) == 2
+        assert guard.limiter.inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_holds_a_limiter_slot_until_closed(self, guard):
+        gate = asyncio.Event()
+
+        class GatedStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield UPSTREAM_BODY[:10]
+                await gate.wait()
+                yield UPSTREAM_BODY[10:]
+
+        app = create_app()
+        upstream = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, stream=GatedStream())
+            )
+        )
+        app.dependency_overrides[get_httpx_client] = lambda: upstream
+        app.dependency_overrides[get_upstream_guard] = lambda: guard
+        transport = ASGITransport(app=app)
+        async with AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            pending = asyncio.create_task(
+                client.post("/api/v1/proxy-httpbin?stream=true", json={"message": "m"})
+            )
+            await asyncio.sleep(0.05)
+            assert guard.limiter.inflight == 1
+            gate.set()
+            response = await pending
+        await upstream.aclose()
+
+        assert response.content == UPSTREAM_BODY
+        assert guard.limiter.inflight == 0
+        assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_stream_failing_midway_is_recorded_as_failure(self, guard):
+        class BrokenStream(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield UPSTREAM_BODY[:10]
+                raise httpx.ReadError("connection lost")
+
+        app = create_app()
+        upstream = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, stream=BrokenStream())
+            )
+        )
+        app.dependency_overrides[get_httpx_client] = lambda: upstream
+        app.dependency_overrides[get_upstream_guard] = lambda: guard
+        transport = ASGITransport(app=app, raise_app_exceptions=False)
+        async with AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            await client.post(
+                "/api/v1/proxy-httpbin?stream=true", json={"message": "m"}
+            )
+        await upstream.aclose()
+
+        assert guard.limiter.inflight == 0
+        assert guard.breaker._failures == 1
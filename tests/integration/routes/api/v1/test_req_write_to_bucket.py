@@ -0,0 +1,288 @@
+"""Integration tests for v1 write-to-bucket endpoint."""
+
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from clients.gcs_client import get_gcs_client
+from clients.httpx import get_httpx_client
+from services.resilience import CircuitBreaker, UpstreamGuard, get_upstream_guard
+from services.write_behind import WriteBehindQueue, get_write_behind_queue
+from src.app import create_app
+
+
+class RecordingGCSClient:
+    def __init__(self):
+        self.objects = {}
+
+    async def write_to_bucket(self, file_name, file_content):
+        self.objects[file_name] = file_content
+
+    async def write_bytes(self, file_name, data, content_type="application/json"):
+        self.objects[file_name] = data
+
+    async def write_lines(self, file_stem, lines):
+        file_name = file_stem + ".ndjson"
+        await self.write_bytes(file_name, b"".join(lines))
+        return file_name
+
+
+def failing_upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(502, stream=httpx.ByteStream(b"bad gateway"))
+
+
+def open_breaker_guard() -> UpstreamGuard:
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    return UpstreamGuard(breaker=breaker)
+
+
+def echo_upstream(request: httpx.Request) -> httpx.Response:
+    """Mimic httpbin's /post by echoing the JSON body under the `json` key."""
+    body = json.dumps({"json": json.loads(request.content)}).encode()
+    # A streamed body is read and closed by the client, which sets `elapsed`.
+    return httpx.Response(
+        200, stream=httpx.ByteStream(body), headers={"Content-Type": "application/json"}
+    )
+
+
+@pytest.fixture
+def gcs_client():
+    return RecordingGCSClient()
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+@pytest_asyncio.fixture
+async def async_client(app, gcs_client):
+    """
+    Create an async test client with the upstream and bucket dependencies replaced.
+    """
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(echo_upstream))
+    app.dependency_overrides[get_httpx_client] = lambda: upstream
+    app.dependency_overrides[get_gcs_client] = lambda: gcs_client
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+    await upstream.aclose()
+
+
+class TestWriteToBucketEndpoint:
+    @pytest.mark.asyncio
+    async def test_write_to_bucket(self, async_client, gcs_client):
+        """
+        The upstream echo is written to the bucket under name + test_number.
+        """
+        test_data = {"message": "test message", "name": "test", "test_number": 42}
+
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 201
+        assert gcs_client.objects == {"test42.json": test_data}
+
+    @pytest.mark.asyncio
+    async def test_write_without_name(self, app, async_client, gcs_client):
+        """
+        A payload without a name is echoed back with a null name, and is still
+        written, directly and in write-behind mode.
+        """
+        test_data = {"message": "no name", "test_number": 7}
+
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 201
+        (file_name,) = gcs_client.objects
+        assert file_name == "Test7.json"
+        assert gcs_client.objects[file_name]["name"] is None
+
+        queue = WriteBehindQueue(gcs_client, max_batch_age=60)
+        queue.start()
+        app.dependency_overrides[get_write_behind_queue] = lambda: queue
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 202
+        await queue.aclose()
+        (batch,) = (v for k, v in gcs_client.objects.items() if k != file_name)
+        assert json.loads(batch) == {**test_data, "name": None}
+
+    @pytest.mark.asyncio
+    async def test_write_to_bucket_invalid_request(self, async_client):
+        response = await async_client.post("/api/v1/hello", json={"message": 123})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_write_behind_acknowledges_and_batches(
+        self, app, async_client, gcs_client
+    ):
+        """
+        In write-behind mode writes are accepted with 202 and flushed as NDJSON.
+        """
+        queue = WriteBehindQueue(gcs_client, max_batch_age=60)
+        queue.start()
+        app.dependency_overrides[get_write_behind_queue] = lambda: queue
+        for i in range(3):
+            test_data = {"message": "m", "name": "test", "test_number": i}
+            response = await async_client.post("/api/v1/hello", json=test_data)
+            assert response.status_code == 202
+        assert gcs_client.objects == {}
+
+        await queue.aclose()
+        (batch,) = gcs_client.objects.values()
+        assert [json.loads(line)["test_number"] for line in batch.splitlines()] == [
+            0,
+            1,
+            2,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_write_behind_full_queue_returns_503(self, app, async_client):
+        queue = WriteBehindQueue(RecordingGCSClient(), max_queue_size=1)
+        app.dependency_overrides[get_write_behind_queue] = lambda: queue
+        test_data = {"message": "m", "name": "test"}
+        assert (
+            await async_client.post("/api/v1/hello", json=test_data)
+        ).status_code == 202
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_upstream_error_is_returned_and_nothing_written(
+        self, app, async_client, gcs_client
+    ):
+        upstream = httpx.AsyncClient(transport=httpx.MockTransport(failing_upstream))
+        app.dependency_overrides[get_httpx_client] = lambda: upstream
+        test_data = {"message": "m", "name": "test", "test_number": 1}
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        await upstream.aclose()
+
+        assert response.status_code == 502
+        assert gcs_client.objects == {}
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_is_returned_and_nothing_written(
+        self, app, async_client, gcs_client
+    ):
+        """
+        Neither a direct write nor a write-behind batch receives an empty payload.
+        """
+        guard = open_breaker_guard()
+        queue = WriteBehindQueue(gcs_client, max_batch_age=60)
+        app.dependency_overrides[get_upstream_guard] = lambda: guard
+        test_data = {"message": "m", "name": "test", "test_number": 1}
+
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 503
+        assert response.json()["details"] == "circuit_open"
+
+        app.dependency_overrides[get_write_behind_queue] = lambda: queue
+        response = await async_client.post("/api/v1/hello", json=test_data)
+        assert response.status_code == 503
+        await queue.aclose()
+        assert gcs_client.objects == {}
+
+    @pytest.mark.asyncio
+    async def test_malformed_json_is_rejected(self, async_client):
+        """
+        Bodies decoded by the fast JSON codec still fail validation with 422.
+        """
+        response = await async_client.post(
+            "/api/v1/hello",
+            content=b'{"message": ',
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+class TestBulkWriteToBucketEndpoint:
+    @pytest.mark.asyncio
+    async def test_bulk_write_shards(self, async_client, gcs_client):
+        """
+        Test that a batch is proxied and written as the requested number of objects.
+        """
+        payloads = [{"message": "hi", "name": f"n{i}"} for i in range(5)]
+        response = await async_client.post("/api/v1/hello/bulk?shards=2", json=payloads)
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["status"] for item in data["items"]] == ["written"] * 5
+        assert len(data["objects"]) == 2
+        assert sorted(gcs_client.objects) == sorted(data["objects"])
+        written = b"".join(gcs_client.objects[name] for name in data["objects"])
+        assert [json.loads(line)["name"] for line in written.splitlines()] == [
+            f"n{i}" for i in range(5)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_reports_upstream_failures(
+        self, app, async_client, gcs_client
+    ):
+        """
+        Test that items the upstream rejects are reported and not written.
+        """
+
+        def flaky_upstream(request: httpx.Request) -> httpx.Response:
+            if json.loads(request.content)["name"] == "bad":
+                return httpx.Response(500, stream=httpx.ByteStream(b"boom"))
+            return echo_upstream(request)
+
+        upstream = httpx.AsyncClient(transport=httpx.MockTransport(flaky_upstream))
+        app.dependency_overrides[get_httpx_client] = lambda: upstream
+        response = await async_client.post(
+            "/api/v1/hello/bulk",
+            json=[{"message": "a", "name": "ok"}, {"message": "b", "name": "bad"}],
+        )
+        await upstream.aclose()
+
+        items = response.json()["items"]
+        assert items[0]["status"] == "written"
+        assert items[1] == {
+            "index": 1,
+            "status": "upstream_error",
+            "upstream_status": 500,
+            "object": None,
+        }
+        (only_object,) = gcs_client.objects.values()
+        assert json.loads(only_object)["name"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_with_open_breaker_writes_nothing(
+        self, app, async_client, gcs_client
+    ):
+        guard = open_breaker_guard()
+        app.dependency_overrides[get_upstream_guard] = lambda: guard
+        response = await async_client.post(
+            "/api/v1/hello/bulk", json=[{"message": "a", "name": "x"}]
+        )
+        data = response.json()
+        assert data["items"][0]["status"] == "upstream_error"
+        assert data["items"][0]["upstream_status"] == 503
+        assert data["objects"] == []
+        assert gcs_client.objects == {}
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_reports_storage_failures(self, async_client, gcs_client):
+        """
+        Test that a failed shard upload marks its items as storage errors.
+        """
+
+        async def failing_write_bytes(file_name, data, content_type=None):
+            raise RuntimeError("bucket unavailable")
+
+        gcs_client.write_bytes = failing_write_bytes
+        response = await async_client.post(
+            "/api/v1/hello/bulk", json=[{"message": "a", "name": "x"}]
+        )
+        data = response.json()
+        assert data["items"][0]["status"] == "storage_error"
+        assert data["objects"] == []
+
+    @pytest.mark.asyncio
+    async def test_bulk_write_rejects_empty_batch(self, async_client):
+        """
+        Test that an empty batch fails validation.
+        """
+        response = await async_client.post("/api/v1/hello/bulk", json=[])
+        assert response.status_code == 422
@@ -48,3 +48,20 @@ class TestHelloEndpoint:
         response = await async_client.get(f"/api/v2/hello?name={name}")
         assert response.status_code == 200
         assert response.json() == {"message": "Yo, World, what's up! I'm version 2!"}
+
+
+class TestHelloBatchEndpoint:
+    @pytest.mark.asyncio
+    async def test_hello_batch_streams_ndjson(self, async_client):
+        """
+        Test that the v2 batch endpoint uses the v2 greeting.
+        """
+        response = await async_client.post(
+            "/api/v2/hello/batch", json={"names": ["Alice", "Bob"]}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text.splitlines() == [
+            '{"name":"Alice","message":"Yo, Alice, what\'s up! I\'m version 2!"}',
+            '{"name":"Bob","message":"Yo, Bob, what\'s up! I\'m version 2!"}',
+        ]
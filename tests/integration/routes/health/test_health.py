@@ -20,3 +20,14 @@ class TestHealthEndpoint:
         response = await async_client.get("/health")
         assert response.status_code == 200
         assert response.json() == {"status": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_health_check_etag(self, async_client):
+        response = await async_client.get("/health")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+
+        cached = await async_client.get("/health", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
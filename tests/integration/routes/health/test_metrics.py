@@ -1,8 +1,11 @@
 """Integration tests for metrics endpoint."""
 
+import gzip
+
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from routes.health import metrics as metrics_module
 from src.app import create_app
 
 
@@ -21,3 +24,50 @@ class TestMetricsEndpoint:
         assert response.status_code == 200
         assert "memory_usage_bytes" in response.text
         assert "cpu_usage_percent" in response.text
+
+    @pytest.mark.asyncio
+    async def test_requests_are_labelled_by_route_template(
+        self, async_client, monkeypatch
+    ):
+        """
+        Requests are recorded under their route template, never the raw path.
+        """
+        monkeypatch.setattr(metrics_module._exposition, "ttl", 0)
+        await async_client.get("/api/v1/hello?name=Metrics")
+        await async_client.get("/no/such/path/12345")
+
+        response = await async_client.get("/metrics")
+        assert (
+            'http_requests_total{endpoint="/api/v1/hello",method="GET",status="200"}'
+            in response.text
+        )
+        assert 'endpoint="<unmatched>",method="GET",status="404"' in response.text
+        assert "12345" not in response.text
+        assert 'http_request_duration_seconds_bucket{endpoint="/api/v1/hello"' in (
+            response.text
+        )
+        assert 'http_response_size_bytes_count{endpoint="/api/v1/hello"' in (
+            response.text
+        )
+        assert 'http_requests_in_progress{method="GET"}' in response.text
+
+    @pytest.mark.asyncio
+    async def test_exposition_is_cached_between_scrapes(
+        self, async_client, monkeypatch
+    ):
+        monkeypatch.setattr(metrics_module._exposition, "ttl", 60)
+        first = await async_client.get("/metrics")
+        await async_client.get("/api/v1/hello?name=Cached")
+        second = await async_client.get("/metrics")
+        assert first.content == second.content
+
+    @pytest.mark.asyncio
+    async def test_large_exposition_is_gzipped(self, async_client, monkeypatch):
+        monkeypatch.setattr(metrics_module.settings.metrics, "gzip_min_size", 1)
+        response = await async_client.get(
+            "/metrics", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        # httpx decodes the body transparently; check the raw bytes were gzip
+        assert "memory_usage_bytes" in response.text
+        assert gzip.decompress(metrics_module._exposition.get_gzipped())
@@ -0,0 +1,43 @@
+"""Integration tests for the profiler endpoint."""
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from settings import settings
+from src.app import create_app
+
+
+@pytest_asyncio.fixture
+async def async_client(monkeypatch):
+    monkeypatch.setattr(settings.debug, "profiler_enabled", True)
+    monkeypatch.setattr(settings.debug, "profiler_token", "secret")
+    app = create_app()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+class TestProfileEndpoint:
+    @pytest.mark.asyncio
+    async def test_profile_returns_collapsed_stacks(self, async_client):
+        response = await async_client.get(
+            "/debug/profile?seconds=0.1", headers={"Authorization": "Bearer secret"}
+        )
+        assert response.status_code == 200
+        assert int(response.headers["X-Profile-Samples"]) > 0
+        lines = response.text.splitlines()
+        assert any(line.startswith("event-loop;") for line in lines)
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    @pytest.mark.asyncio
+    async def test_profile_requires_token(self, async_client):
+        response = await async_client.get("/debug/profile?seconds=0.1")
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_profile_is_disabled_by_default(self, monkeypatch):
+        monkeypatch.setattr(settings.debug, "profiler_enabled", False)
+        transport = ASGITransport(app=create_app())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/debug/profile?seconds=0.1")
+        assert response.status_code == 404
@@ -0,0 +1,196 @@
+"""Unit tests for admission control and load shedding."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from clients.gcs_client import get_gcs_client
+from clients.httpx import get_httpx_client
+from services.admission import Bulkhead, Overloaded
+from settings import settings
+from src.app import create_app
+
+
+def _shed(group, reason):
+    return (
+        REGISTRY.get_sample_value(
+            "admission_shed_total", {"group": group, "reason": reason}
+        )
+        or 0
+    )
+
+
+class TestBulkhead:
+    @pytest.mark.asyncio
+    async def test_admits_up_to_limit_then_sheds_when_queue_full(self):
+        bulkhead = Bulkhead("test_full", max_concurrency=2, max_queue=0)
+        await bulkhead.acquire()
+        await bulkhead.acquire()
+        assert bulkhead.inflight == 2
+
+        with pytest.raises(Overloaded) as exc_info:
+            await bulkhead.acquire()
+        assert exc_info.value.reason == "queue_full"
+
+        bulkhead.release()
+        await bulkhead.acquire()
+        assert bulkhead.inflight == 2
+
+    @pytest.mark.asyncio
+    async def test_freed_slot_goes_to_oldest_waiter(self):
+        bulkhead = Bulkhead("test_fifo", max_concurrency=1, max_queue=2)
+        await bulkhead.acquire()
+        order = []
+
+        async def wait(name):
+            await bulkhead.acquire()
+            order.append(name)
+
+        first = asyncio.create_task(wait("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+
+        bulkhead.release()
+        await first
+        assert order == ["first"]
+        assert bulkhead.inflight == 1
+        bulkhead.release()
+        await second
+        assert order == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_waiter_is_shed_after_max_wait(self):
+        before = _shed("test_timeout", "queue_timeout")
+        bulkhead = Bulkhead(
+            "test_timeout", max_concurrency=1, max_queue=1, max_wait=0.01
+        )
+        await bulkhead.acquire()
+
+        with pytest.raises(Overloaded) as exc_info:
+            await bulkhead.acquire()
+        assert exc_info.value.reason == "queue_timeout"
+        assert _shed("test_timeout", "queue_timeout") == before + 1
+
+        # The expired waiter no longer holds a place in the queue
+        bulkhead.release()
+        assert bulkhead.inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_standing_queue_sheds_new_requests_early(self):
+        bulkhead = Bulkhead(
+            "test_overload",
+            max_concurrency=1,
+            max_queue=2,
+            max_wait=5.0,
+            target_delay=0.01,
+            interval=0.02,
+        )
+        await bulkhead.acquire()
+        patient = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0.03)
+        assert bulkhead.overloaded
+
+        with pytest.raises(Overloaded):
+            await asyncio.wait_for(bulkhead.acquire(), timeout=1.0)
+        assert not patient.done()
+
+        bulkhead.release()
+        await patient
+        bulkhead.release()
+        assert not bulkhead.overloaded
+        assert bulkhead.inflight == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_a_slot(self):
+        bulkhead = Bulkhead("test_cancel", max_concurrency=1, max_queue=1)
+        await bulkhead.acquire()
+        waiter = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        bulkhead.release()
+        assert bulkhead.inflight == 0
+        await bulkhead.acquire()
+        assert bulkhead.inflight == 1
+
+
+class StubGCSClient:
+    async def write_to_bucket(self, file_name, file_content):
+        pass
+
+
+@pytest.fixture
+def upstream_gate():
+    return asyncio.Event()
+
+
+@pytest.fixture
+def admission_app(monkeypatch, upstream_gate):
+    """
+    App whose bucket writes block on ``upstream_gate``, with room for one of them.
+    """
+    monkeypatch.setattr(settings.admission, "bucket_concurrency", 1)
+    monkeypatch.setattr(settings.admission, "queue_size", 0)
+
+    async def blocked_upstream(request: httpx.Request) -> httpx.Response:
+        await upstream_gate.wait()
+        body = json.dumps({"json": json.loads(request.content)}).encode()
+        return httpx.Response(
+            200,
+            stream=httpx.ByteStream(body),
+            headers={"Content-Type": "application/json"},
+        )
+
+    app = create_app()
+    upstream = httpx.AsyncClient(transport=httpx.MockTransport(blocked_upstream))
+    app.dependency_overrides[get_httpx_client] = lambda: upstream
+    app.dependency_overrides[get_gcs_client] = lambda: StubGCSClient()
+    return app
+
+
+class TestAdmissionMiddleware:
+    @pytest.mark.asyncio
+    async def test_full_bulkhead_sheds_only_its_own_group(
+        self, admission_app, upstream_gate
+    ):
+        """
+        Slow bucket writes are shed with 503 and Retry-After, while greetings
+        and health probes are still served.
+        """
+        payload = {"message": "slow", "name": "write", "test_number": 1}
+        before = _shed("bucket", "queue_full")
+        transport = ASGITransport(app=admission_app)
+        async with AsyncClient(
+            transport=transport, base_url="http://testserver"
+        ) as client:
+            blocked = asyncio.create_task(client.post("/api/v1/hello", json=payload))
+            await asyncio.sleep(0.05)
+
+            shed = await client.post("/api/v1/hello", json=payload)
+            assert shed.status_code == 503
+            assert shed.headers["retry-after"] == "1"
+            assert shed.json() == {
+                "error": "Service overloaded",
+                "details": "queue_full",
+            }
+            assert _shed("bucket", "queue_full") == before + 1
+
+            assert (await client.get("/health")).status_code == 200
+            assert (await client.get("/api/v1/hello")).status_code == 200
+
+            upstream_gate.set()
+            assert (await blocked).status_code == 201
+            assert (await client.post("/api/v1/hello", json=payload)).status_code == 201
+
+    @pytest.mark.asyncio
+    async def test_disabled_admission_adds_no_middleware(self, monkeypatch):
+        monkeypatch.setattr(settings.admission, "enabled", False)
+        app = create_app()
+        assert all(m.cls.__name__ != "AdmissionMiddleware" for m in app.user_middleware)
@@ -0,0 +1,36 @@
+"""Unit tests for sharded bulk uploads."""
+
+import pytest
+
+from clients.gcs_client import GCSBucketClient
+from clients.storage import MemoryBackend
+from services.bulk_write import shard_bounds, write_sharded
+
+
+@pytest.mark.parametrize(
+    "count, shards, expected",
+    [
+        (5, 1, [range(0, 5)]),
+        (5, 2, [range(0, 3), range(3, 5)]),
+        (2, 4, [range(0, 1), range(1, 2)]),
+    ],
+)
+def test_shard_bounds(count, shards, expected):
+    assert shard_bounds(count, shards) == expected
+
+
+@pytest.mark.asyncio
+async def test_write_sharded_places_every_line():
+    backend = MemoryBackend()
+    client = GCSBucketClient("unused", backend=backend)
+    lines = [f"{i}\n".encode() for i in range(7)]
+    placement = await write_sharded(client, lines, 3, "bulk/")
+    await client.aclose()
+
+    assert len(backend.objects) == 3
+    assert all(name.startswith("bulk/") for name in backend.objects)
+    for index, name in enumerate(placement):
+        assert lines[index] in backend.objects[name].data
+    assert {stored.content_type for stored in backend.objects.values()} == {
+        "application/x-ndjson"
+    }
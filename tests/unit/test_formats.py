@@ -0,0 +1,164 @@
+"""Unit tests for batch object output formats."""
+
+import gzip
+import io
+import json
+import sys
+import threading
+
+import pytest
+
+from clients import storage
+from clients.formats import (
+    GzipNDJSON,
+    OutputFormat,
+    Parquet,
+    ZstdNDJSON,
+    create_output_format,
+)
+from clients.gcs_client import GCSBucketClient
+from clients.storage import GCSBackend, MemoryBackend
+from settings.gcsbucket import GCSBucketSettings
+
+
+def ndjson_lines(count):
+    return [
+        json.dumps({"i": i, "name": f"n{i}"}).encode() + b"\n" for i in range(count)
+    ]
+
+
+class TestNDJSONFormats:
+    def test_plain_ndjson_passes_lines_through(self):
+        lines = ndjson_lines(3)
+        assert b"".join(OutputFormat().encode(lines)) == b"".join(lines)
+
+    def test_gzip_round_trips_and_streams(self):
+        lines = ndjson_lines(20000)
+        chunks = list(GzipNDJSON().encode(lines))
+        assert len(chunks) > 1
+        assert gzip.decompress(b"".join(chunks)) == b"".join(lines)
+
+    def test_gzip_document_gets_suffix_and_encoding(self):
+        suffix, data, content_encoding = GzipNDJSON().encode_document(b"{}")
+        assert (suffix, content_encoding) == (".gz", "gzip")
+        assert gzip.decompress(data) == b"{}"
+
+    def test_zstd_round_trips(self):
+        zstandard = pytest.importorskip("zstandard")
+        lines = ndjson_lines(100)
+        data = b"".join(ZstdNDJSON().encode(lines))
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+        assert reader.read() == b"".join(lines)
+
+    def test_parquet_round_trips(self):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+
+        lines = ndjson_lines(25)
+        data = b"".join(Parquet(row_group_size=10).encode(lines))
+        table = pq.read_table(io.BytesIO(data))
+        assert table.num_rows == 25
+        assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+        assert table.column("name").to_pylist()[-1] == "n24"
+
+    @pytest.mark.parametrize(
+        "module, output_format", [("zstandard", ZstdNDJSON), ("pyarrow", Parquet)]
+    )
+    def test_missing_optional_dependency_is_reported(
+        self, monkeypatch, module, output_format
+    ):
+        monkeypatch.setitem(sys.modules, module, None)
+        with pytest.raises(RuntimeError, match=module):
+            output_format()
+
+    def test_create_output_format(self):
+        assert type(create_output_format(GCSBucketSettings())) is OutputFormat
+        gzip_format = create_output_format(
+            GCSBucketSettings(format="ndjson.gz", compression_level=0)
+        )
+        assert isinstance(gzip_format, GzipNDJSON) and gzip_format.level == 0
+
+
+class TestClientOutputFormat:
+    @pytest.mark.asyncio
+    async def test_write_lines_uses_format_metadata(self):
+        backend = MemoryBackend()
+        client = GCSBucketClient("unused", backend=backend, output_format=GzipNDJSON())
+        lines = ndjson_lines(3)
+        name = await client.write_lines("batches/x", lines)
+        await client.write_to_bucket("single.json", {"a": 1})
+        await client.aclose()
+
+        assert name == "batches/x.ndjson.gz"
+        stored = backend.objects[name]
+        assert stored.content_type == "application/x-ndjson"
+        assert stored.content_encoding == "gzip"
+        assert gzip.decompress(stored.data) == b"".join(lines)
+        single = backend.objects["single.json.gz"]
+        assert single.content_type == "application/json"
+        assert gzip.decompress(single.data) == b'{"a":1}'
+
+    @pytest.mark.asyncio
+    async def test_compression_runs_off_the_event_loop_for_memory_backend(self):
+        """
+        Encoding cost, not the backend, decides whether encoding runs on the
+        writer pool.
+        """
+        encoded_on = []
+
+        class RecordingGzip(GzipNDJSON):
+            def _compressor(self):
+                encoded_on.append(threading.current_thread().name)
+                return super()._compressor()
+
+        backend = MemoryBackend()
+        client = GCSBucketClient(
+            "unused", backend=backend, output_format=RecordingGzip()
+        )
+        await client.write_lines("batches/x", ndjson_lines(3))
+        await client.write_to_bucket("single.json", {"a": 1})
+        await client.aclose()
+
+        assert len(encoded_on) == 2
+        assert all(name.startswith("gcs-writer") for name in encoded_on)
+        assert gzip.decompress(backend.objects["single.json.gz"].data) == b'{"a":1}'
+
+
+class FakeBlob:
+    def __init__(self, uploads, name):
+        self.uploads = uploads
+        self.name = name
+        self.generation = None
+        self.content_encoding = None
+        self.chunk_size = None
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        self.uploads.append(("single", self.name, data, self.content_encoding))
+
+    def upload_from_file(self, file_obj, content_type=None):
+        self.uploads.append(
+            ("resumable", self.name, file_obj.read(), self.content_encoding)
+        )
+
+
+class FakeBucket:
+    def __init__(self):
+        self.uploads = []
+
+    def blob(self, name):
+        return FakeBlob(self.uploads, name)
+
+
+class TestGCSBackendStreaming:
+    def test_small_stream_is_a_single_upload(self):
+        backend = GCSBackend("bucket")
+        backend._bucket = FakeBucket()
+        backend.write_stream("a", [b"x", b"y"], "text/plain", "gzip")
+        assert backend._bucket.uploads == [("single", "a", b"xy", "gzip")]
+
+    def test_large_stream_switches_to_resumable_upload(self, monkeypatch):
+        monkeypatch.setattr(storage, "GCS_STREAM_CHUNK_SIZE", 4)
+        backend = GCSBackend("bucket")
+        backend._bucket = FakeBucket()
+        backend.write_stream("a", [b"ab", b"cd", b"ef", b"g"], "text/plain")
+        assert backend._bucket.uploads == [("resumable", "a", b"abcdefg", None)]
@@ -0,0 +1,119 @@
+"""Unit tests for the asynchronous bucket client."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from clients.gcs_client import GCSBucketClient, GCSBucketClientError
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.generation = None
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        self.bucket.upload(self.name, data)
+
+
+class FakeBucket:
+    """Records uploads and simulates a slow, blocking network call."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.objects = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def upload(self, name, data):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("boom")
+            self.objects[name] = data
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_client(bucket, max_workers=2):
+    client = GCSBucketClient("test-bucket", max_workers=max_workers)
+    client.backend._bucket = bucket
+    return client
+
+
+class TestGCSBucketClient:
+    @pytest.mark.asyncio
+    async def test_write_to_bucket_serializes_json(self):
+        bucket = FakeBucket()
+        client = make_client(bucket)
+        await client.write_to_bucket("a.json", {"name": "a"})
+        await client.aclose()
+        assert bucket.objects == {"a.json": b'{"name":"a"}'}
+
+    @pytest.mark.asyncio
+    async def test_upload_does_not_block_event_loop(self):
+        """
+        Other coroutines keep running while a blocking upload is in progress.
+        """
+        bucket = FakeBucket(delay=0.2)
+        client = make_client(bucket)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await client.write_to_bucket("slow.json", {})
+        task.cancel()
+        await client.aclose()
+        assert ticks >= 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_uploads_are_bounded_by_pool(self):
+        bucket = FakeBucket(delay=0.05)
+        client = make_client(bucket, max_workers=2)
+        await asyncio.gather(
+            *(client.write_to_bucket(f"{i}.json", {"i": i}) for i in range(6))
+        )
+        await client.aclose()
+        assert len(bucket.objects) == 6
+        assert bucket.peak <= 2
+
+    @pytest.mark.asyncio
+    async def test_upload_failure_raises_client_error(self):
+        client = make_client(FakeBucket(fail=True))
+        with pytest.raises(GCSBucketClientError):
+            await client.write_to_bucket("a.json", {})
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_upload_duration_and_bytes_are_recorded_by_outcome(self):
+        def sample(name, outcome):
+            return REGISTRY.get_sample_value(name, {"outcome": outcome}) or 0
+
+        before = sample("gcs_upload_bytes_sum", "success")
+        before_errors = sample("gcs_upload_duration_seconds_count", "error")
+        client = make_client(FakeBucket())
+        await client.write_bytes("a.bin", b"x" * 100)
+        failing = make_client(FakeBucket(fail=True))
+        with pytest.raises(GCSBucketClientError):
+            await failing.write_bytes("a.bin", b"x")
+        await client.aclose()
+        await failing.aclose()
+        assert sample("gcs_upload_bytes_sum", "success") - before == 100
+        assert sample("gcs_upload_duration_seconds_count", "error") - before_errors == 1
@@ -0,0 +1,95 @@
+"""Unit tests for hedged upstream requests."""
+
+import asyncio
+
+import pytest
+from services.hedging import Hedger
+
+
+def never_fails(result):
+    return False
+
+
+class TestHedger:
+    @pytest.mark.asyncio
+    async def test_fast_call_is_not_hedged(self):
+        hedger = Hedger(min_delay=0.05, budget_ratio=1.0)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return "ok"
+
+        assert await hedger.call(fetch, never_fails) == "ok"
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_call_is_hedged_and_loser_cancelled(self):
+        hedger = Hedger(min_delay=0.01, budget_ratio=1.0)
+        delays = [0.5, 0.0]
+        cancelled = []
+
+        async def fetch():
+            delay = delays.pop(0)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.append(delay)
+                raise
+            return delay
+
+        assert await hedger.call(fetch, never_fails) == 0.0
+        await asyncio.sleep(0)
+        assert cancelled == [0.5]
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_hedges(self):
+        """
+        With a 50% budget at most every other slow call gets a hedge.
+        """
+        hedger = Hedger(min_delay=0.001, budget_ratio=0.5)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        for _ in range(4):
+            await hedger.call(fetch, never_fails)
+        assert calls == 6
+
+    @pytest.mark.asyncio
+    async def test_failed_first_answer_waits_for_the_other(self):
+        hedger = Hedger(min_delay=0.01, budget_ratio=1.0)
+        results = [(0.02, "error"), (0.03, "ok")]
+
+        async def fetch():
+            delay, result = results.pop(0)
+            await asyncio.sleep(delay)
+            return result
+
+        assert await hedger.call(fetch, lambda r: r == "error") == "ok"
+
+    def test_delay_tracks_latency_percentile(self):
+        hedger = Hedger(percentile=90, min_delay=0.001, min_samples=10)
+        for i in range(1, 101):
+            hedger.record(i / 100)
+        assert hedger.delay == pytest.approx(0.91, abs=0.02)
+
+    def test_delay_is_refreshed_every_min_samples_even_when_at_minimum(self):
+        """
+        A fast upstream keeps the delay at its minimum; that alone must not
+        make every call re-sort the window.
+        """
+        hedger = Hedger(percentile=90, min_delay=1.0, min_samples=10)
+        for _ in range(10):
+            hedger.record(0.001)
+        assert hedger.delay == 1.0
+        for _ in range(9):
+            hedger.record(5.0)
+        assert hedger.delay == 1.0
+        hedger.record(5.0)
+        assert hedger.delay == 5.0
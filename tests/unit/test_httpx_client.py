@@ -0,0 +1,124 @@
+"""Unit tests for the shared upstream HTTP client."""
+
+import asyncio
+import socket
+
+import httpx
+import pytest
+from clients.httpx import create_httpx_client, record_upstream_error
+from prometheus_client import REGISTRY
+from settings import settings
+from settings.upstream import UpstreamSettings
+from src.app import create_app
+
+
+class TestCreateHttpxClient:
+    def test_client_uses_configured_pool(self):
+        """
+        Pool size and keep-alive expiry come from UpstreamSettings.
+        """
+        upstream = UpstreamSettings(
+            max_connections=42, max_keepalive_connections=7, keepalive_expiry=12.5
+        )
+        client = create_httpx_client(upstream)
+        pool = client._transport._pool
+        assert pool._max_connections == 42
+        assert pool._max_keepalive_connections == 7
+        assert pool._keepalive_expiry == 12.5
+
+    def test_client_uses_configured_timeouts(self):
+        upstream = UpstreamSettings(timeout=3.0, connect_timeout=1.0, pool_timeout=2.0)
+        client = create_httpx_client(upstream)
+        assert client.timeout.read == 3.0
+        assert client.timeout.connect == 1.0
+        assert client.timeout.pool == 2.0
+
+    def test_http2_is_opt_in(self):
+        assert not create_httpx_client(UpstreamSettings())._transport._pool._http2
+        client = create_httpx_client(UpstreamSettings(http2=True))
+        assert client._transport._pool._http2
+
+    @pytest.mark.asyncio
+    async def test_pool_wait_and_duration_are_recorded_per_request(self):
+        """
+        Every request records its pool wait and its duration by outcome.
+        """
+
+        async def handle(reader, writer):
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        pool_wait = ("upstream_pool_wait_seconds_count", {"protocol": "http1.1"})
+        duration = ("upstream_request_duration_seconds_count", {"outcome": "2xx"})
+        before = _sample(*pool_wait), _sample(*duration)
+        async with create_httpx_client(UpstreamSettings(retries=0)) as client:
+            for _ in range(3):
+                response = await client.get(f"http://127.0.0.1:{port}/")
+                assert response.text == "ok"
+        server.close()
+        assert _sample(*pool_wait) - before[0] == 3
+        assert _sample(*duration) - before[1] == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_and_transport_errors_are_recorded(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        retries = ("upstream_retries_total", {})
+        errors = (
+            "upstream_request_duration_seconds_count",
+            {"outcome": "ConnectError"},
+        )
+        before = _sample(*retries), _sample(*errors)
+        async with create_httpx_client(UpstreamSettings(retries=2)) as client:
+            with pytest.raises(httpx.ConnectError) as exc_info:
+                await client.get(f"http://127.0.0.1:{port}/")
+        record_upstream_error(exc_info.value)
+        assert _sample(*retries) - before[0] == 2
+        assert _sample(*errors) - before[1] == 1
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestClientLifespan:
+    @pytest.mark.asyncio
+    async def test_lifespan_opens_and_closes_shared_client(self):
+        """
+        One client is created on startup and closed on shutdown.
+        """
+        app = create_app()
+        async with app.router.lifespan_context(app):
+            client = app.state.httpx_client
+            assert not client.is_closed
+        assert client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_cold_start_mode_opens_client_on_first_use(self, monkeypatch):
+        """
+        In cold-start mode the client is opened by the first request that needs it.
+        """
+        monkeypatch.setattr(settings.fastapi, "cold_start_mode", True)
+        monkeypatch.setattr(settings.simulator, "upstream_enabled", True)
+        monkeypatch.setattr(settings.simulator, "upstream_latency", "none")
+        app = create_app()
+        body = {"message": "cold", "name": "start", "test_number": 1}
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://testserver"
+            ) as client:
+                assert (await client.get("/health")).status_code == 200
+                assert app.state.httpx_client is None
+                response = await client.post("/api/v1/proxy-httpbin", json=body)
+                assert response.status_code == 200
+                opened = app.state.httpx_client
+                assert opened is not None
+                await client.post("/api/v1/proxy-httpbin", json=body)
+                assert app.state.httpx_client is opened
+        assert opened.is_closed
@@ -0,0 +1,57 @@
+"""Unit tests for multi-worker metrics aggregation."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parents[2] / "src")
+
+WORKER = """
+import os
+print(os.getpid())
+from routes.health.metrics import MEMORY_USAGE, REQUEST_COUNT
+REQUEST_COUNT.labels(method="GET", endpoint="/health", status="200").inc({count})
+MEMORY_USAGE.set({count})
+"""
+
+SCRAPE = """
+from prometheus_client import generate_latest
+from routes.health.metrics import collect_registry
+print(generate_latest(collect_registry()).decode())
+"""
+
+
+def run(code, multiproc_dir):
+    env = {**os.environ, "PYTHONPATH": SRC, "PROMETHEUS_MULTIPROC_DIR": multiproc_dir}
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+class TestMultiprocessMetrics:
+    def test_counters_are_summed_across_workers(self, tmp_path):
+        """
+        A scrape served by one worker reports the requests of every worker.
+        """
+        run(WORKER.format(count=2), str(tmp_path))
+        run(WORKER.format(count=3), str(tmp_path))
+        output = run(SCRAPE, str(tmp_path))
+        assert (
+            'http_requests_total{endpoint="/health",method="GET",status="200"} 5.0'
+            in output
+        )
+
+    def test_gauges_of_dead_workers_are_dropped(self, tmp_path):
+        """
+        Per-worker gauges carry a pid label and disappear once the worker exits.
+        """
+        pid = run(WORKER.format(count=7), str(tmp_path)).strip()
+        assert list(tmp_path.glob(f"gauge_liveall_{pid}.db"))
+        output = run(SCRAPE, str(tmp_path))
+        assert f'memory_usage_bytes{{pid="{pid}"}}' not in output
+        assert not list(tmp_path.glob(f"gauge_liveall_{pid}.db"))
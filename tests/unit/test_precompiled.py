@@ -0,0 +1,48 @@
+"""Unit tests for precompiled constant responses."""
+
+from starlette.requests import Request
+
+from precompiled import PrecompiledResponse
+
+
+def make_request(if_none_match=None):
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_body_serialized_once_with_stable_etag():
+    first = PrecompiledResponse({"status": "ok"})
+    second = PrecompiledResponse({"status": "ok"})
+    assert first.body == b'{"status":"ok"}'
+    assert first.etag == second.etag
+    assert first.etag != PrecompiledResponse({"status": "down"}).etag
+
+
+def test_respond_returns_body_without_validator():
+    precompiled = PrecompiledResponse({"status": "ok"}, cache_control="max-age=60")
+    response = precompiled.respond(make_request())
+    assert response.status_code == 200
+    assert response.body == precompiled.body
+    assert response.headers["etag"] == precompiled.etag
+    assert response.headers["cache-control"] == "max-age=60"
+
+
+def test_respond_not_modified_on_matching_etag():
+    precompiled = PrecompiledResponse({"status": "ok"})
+    for header in (
+        precompiled.etag,
+        f"W/{precompiled.etag}",
+        f'"x", {precompiled.etag}',
+        "*",
+    ):
+        response = precompiled.respond(make_request(header))
+        assert response.status_code == 304
+        assert response.body == b""
+
+
+def test_respond_full_body_on_mismatched_etag():
+    precompiled = PrecompiledResponse({"status": "ok"})
+    response = precompiled.respond(make_request('"other"'))
+    assert response.status_code == 200
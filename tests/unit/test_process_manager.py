@@ -0,0 +1,241 @@
+"""Unit tests for the multi-core process manager."""
+
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import psutil
+import pytest
+import uvicorn
+
+from process_manager import ProcessManager, _Worker, available_cpus, uvicorn_options
+from settings.uvicorn import UvicornSettings
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+# A manager serving a tiny app that answers with its worker's pid; /slow sends
+# the pid as a header and holds the body back until the release file exists
+MANAGER_SCRIPT = textwrap.dedent(
+    """
+    import asyncio
+    import os
+    import sys
+
+    import uvicorn
+
+    from process_manager import ProcessManager
+
+
+    async def app(scope, receive, send):
+        pid = str(os.getpid()).encode()
+        headers = [(b"x-pid", pid)]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        if scope["path"] == "/slow":
+            while not os.path.exists(sys.argv[2]):
+                await asyncio.sleep(0.01)
+        await send({"type": "http.response.body", "body": pid})
+
+
+    config = uvicorn.Config(
+        app,
+        host="127.0.0.1",
+        port=int(sys.argv[1]),
+        lifespan="off",
+        log_level="warning",
+        timeout_graceful_shutdown=2,
+    )
+    sys.exit(ProcessManager(config, workers=2, check_interval=0.05).run())
+    """
+)
+
+
+class TestAvailableCpus:
+    @pytest.fixture(autouse=True)
+    def four_cpus(self, monkeypatch):
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2, 3})
+
+    def test_affinity_without_quota(self, tmp_path):
+        assert available_cpus(tmp_path) == 4
+
+    def test_cgroup_v2_quota_rounds_up(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("150000 100000\n")
+        assert available_cpus(tmp_path) == 2
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        assert available_cpus(tmp_path) == 4
+
+    def test_cgroup_v1_quota(self, tmp_path):
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("50000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        assert available_cpus(tmp_path) == 1
+
+    def test_quota_above_affinity(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("800000 100000\n")
+        assert available_cpus(tmp_path) == 4
+
+
+def test_uvicorn_options_follow_settings():
+    options = uvicorn_options(
+        UvicornSettings(port=9000, keep_alive=7, max_concurrency=50, graceful_timeout=3)
+    )
+    assert options["port"] == 9000
+    assert options["timeout_keep_alive"] == 7
+    assert options["limit_concurrency"] == 50
+    assert options["timeout_graceful_shutdown"] == 3
+    uvicorn.Config(app=None, **options)
+
+
+def test_workers_always_run_on_the_asyncio_loop():
+    config = uvicorn.Config(app=None, loop="uvloop")
+    ProcessManager(config, workers=1)
+    assert config.loop == "asyncio"
+
+
+def test_worker_over_memory_limit_is_queued_for_replacement():
+    manager = ProcessManager(uvicorn.Config(app=None), workers=1, max_memory=1)
+    worker = _Worker(pid=os.getpid(), ready_fd=-1, started=0.0, ready=True)
+    manager._workers[worker.pid] = worker
+
+    manager._check_memory()
+    manager._check_memory()
+
+    assert list(manager._to_replace) == [worker.pid]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get_pid(port: int) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        connection.request("GET", "/")
+        return int(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def _wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("condition not met in time")
+
+
+def _workers(manager: psutil.Process) -> set[int]:
+    return {child.pid for child in manager.children()}
+
+
+def _start_manager(tmp_path: Path) -> tuple[subprocess.Popen, int]:
+    script = tmp_path / "manager.py"
+    script.write_text(MANAGER_SCRIPT)
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(script), str(port), str(tmp_path / "release")],
+        env={**os.environ, "PYTHONPATH": str(SRC)},
+    )
+    return process, port
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_rolling_restart_and_respawn_without_refused_connections(tmp_path):
+    process, port = _start_manager(tmp_path)
+    manager = psutil.Process(process.pid)
+    try:
+        _wait_for(lambda: len(_workers(manager)) == 2)
+        _wait_for(lambda: _get_pid(port) in _workers(manager))
+        original = _workers(manager)
+
+        failures = []
+        served = set()
+        done = threading.Event()
+
+        def load():
+            while not done.is_set():
+                try:
+                    served.add(_get_pid(port))
+                except OSError as e:
+                    failures.append(e)
+
+        client = threading.Thread(target=load)
+        client.start()
+        try:
+            os.kill(process.pid, signal.SIGHUP)
+            _wait_for(
+                lambda: len(_workers(manager)) == 2
+                and not _workers(manager) & original
+                and served - original
+            )
+        finally:
+            done.set()
+            client.join()
+        assert not failures
+
+        # A worker that dies is replaced
+        crashed = next(iter(_workers(manager)))
+        os.kill(crashed, signal.SIGKILL)
+        _wait_for(
+            lambda: len(_workers(manager)) == 2 and crashed not in _workers(manager)
+        )
+        _wait_for(lambda: _get_pid(port))
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_stopping_worker_finishes_its_request_in_flight(tmp_path):
+    """
+    A worker told to stop by a rolling restart serves the response it is in
+    the middle of before it exits.
+    """
+    process, port = _start_manager(tmp_path)
+    manager = psutil.Process(process.pid)
+    try:
+        _wait_for(lambda: len(_workers(manager)) == 2)
+        _wait_for(lambda: _get_pid(port) in _workers(manager))
+        original = _workers(manager)
+
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        connection.request("GET", "/slow")
+        response = connection.getresponse()
+        busy = int(response.getheader("x-pid"))
+        assert busy in original
+
+        os.kill(process.pid, signal.SIGHUP)
+        # Both replacements are serving, so both old workers have been told
+        # to stop; the busy one is still waiting for its response to finish
+        _wait_for(lambda: len(_workers(manager) - original) == 2)
+        time.sleep(0.2)
+        assert busy in _workers(manager)
+
+        (tmp_path / "release").touch()
+        assert response.status == 200
+        assert int(response.read()) == busy
+        connection.close()
+        _wait_for(lambda: busy not in _workers(manager))
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
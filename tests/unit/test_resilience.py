@@ -0,0 +1,162 @@
+"""Unit tests for the upstream circuit breaker and adaptive limiter."""
+
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from models.proxy import ProxyRequest
+from services.httpbin import proxy_request
+from services.resilience import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    UpstreamGuard,
+    UpstreamRejected,
+)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        for _ in range(2):
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_late_success_does_not_close_an_open_circuit(self):
+        """
+        A call let through before the circuit opened, and succeeding after,
+        leaves it open.
+        """
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        assert breaker.allow()
+        assert breaker.allow()
+        assert breaker.allow()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+
+    def test_starting_closed_is_not_counted_as_a_transition(self):
+        def closed_transitions():
+            return (
+                REGISTRY.get_sample_value(
+                    "circuit_breaker_transitions_total",
+                    {"name": "test_initial", "state": "closed"},
+                )
+                or 0
+            )
+
+        before = closed_transitions()
+        breaker = CircuitBreaker(name="test_initial")
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert closed_transitions() == before
+
+    def test_half_open_probe_closes_or_reopens(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr("services.resilience.time.monotonic", lambda: now)
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        breaker.record_failure()
+        now += 11
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        now += 11
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestAdaptiveLimiter:
+    def test_rejects_beyond_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=2)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+
+    def test_slow_calls_shrink_and_fast_calls_grow_limit(self):
+        limiter = AdaptiveLimiter(
+            initial_limit=10, latency_threshold=0.5, backoff_ratio=0.5
+        )
+        limiter.try_acquire()
+        limiter.release(latency=1.0, failed=False)
+        assert limiter.limit == 5
+        for _ in range(5):
+            limiter.try_acquire()
+        limiter.release(latency=0.1, failed=False)
+        assert limiter.limit == 6
+
+    def test_burst_of_slow_calls_backs_off_once(self):
+        """
+        Calls that were in flight together only cut the limit once; a call
+        started after that decrease may cut it again.
+        """
+        limiter = AdaptiveLimiter(
+            initial_limit=10, latency_threshold=0.5, backoff_ratio=0.5
+        )
+        for _ in range(8):
+            limiter.try_acquire()
+        for _ in range(8):
+            limiter.release(latency=1.0, failed=False)
+        assert limiter.limit == 5
+        limiter.try_acquire()
+        limiter.release(latency=0.0, failed=True)
+        assert limiter.limit == 2
+
+    def test_limit_never_drops_below_minimum(self):
+        limiter = AdaptiveLimiter(initial_limit=2, min_limit=1, backoff_ratio=0.1)
+        for _ in range(3):
+            limiter.try_acquire()
+            limiter.release(latency=0.0, failed=True)
+        assert limiter.limit == 1
+
+
+class TestUpstreamGuard:
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_fails_fast(self):
+        guard = UpstreamGuard(limiter=AdaptiveLimiter(initial_limit=1))
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        first = asyncio.create_task(guard.call(slow, is_failure=lambda r: False))
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamRejected):
+            await guard.call(slow, is_failure=lambda r: False)
+        assert await first == "ok"
+
+    @pytest.mark.asyncio
+    async def test_proxy_request_fails_fast_when_circuit_open(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500, stream=httpx.ByteStream(b"down"))
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        guard = UpstreamGuard(breaker=CircuitBreaker(failure_threshold=2))
+        request = ProxyRequest(message="m")
+        for _ in range(2):
+            assert (
+                await proxy_request(request, client, guard=guard)
+            ).status_code == 500
+        result = await proxy_request(request, client, guard=guard)
+        assert result.status_code == 503
+        assert result.json["details"] == "circuit_open"
+        assert len(calls) == 2
@@ -0,0 +1,105 @@
+"""Unit tests for the upstream response cache."""
+
+import asyncio
+
+import httpx
+import pytest
+from models.proxy import ProxyRequest
+from services.cache import ResponseCache
+from services.httpbin import cache_key, proxy_request
+
+
+def counting_client(status_code=200, delay=0.0):
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(status_code, stream=httpx.ByteStream(b'{"json": {}}'))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), calls
+
+
+class TestResponseCache:
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        cache = ResponseCache(ttl=10, max_size=10)
+        now = 1000.0
+        monkeypatch.setattr("services.cache.time.monotonic", lambda: now)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        now += 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(ttl=60, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_fetch(self):
+        cache = ResponseCache(ttl=60, max_size=10)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("k", fetch) for _ in range(10))
+        )
+        assert results == ["value"] * 10
+        assert calls == 1
+        assert await cache.get_or_fetch("k", fetch) == "value"
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_fetch(self):
+        cache = ResponseCache(ttl=60, max_size=10)
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return "value"
+
+        first = asyncio.create_task(cache.get_or_fetch("k", fetch))
+        second = asyncio.create_task(cache.get_or_fetch("k", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "value"
+
+
+class TestProxyRequestCaching:
+    def test_cache_key_is_canonical(self):
+        assert cache_key(ProxyRequest(message="m")) == cache_key(
+            ProxyRequest(message="m", name=None)
+        )
+        assert cache_key(ProxyRequest(message="m")) != cache_key(
+            ProxyRequest(message="n")
+        )
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_call_upstream_once(self):
+        client, calls = counting_client(delay=0.01)
+        cache = ResponseCache(ttl=60, max_size=10)
+        request = ProxyRequest(message="m", name="a", test_number=1)
+        results = await asyncio.gather(
+            *(proxy_request(request, client, cache=cache) for _ in range(5))
+        )
+        assert {result.status_code for result in results} == {200}
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_upstream_errors_are_not_cached(self):
+        client, calls = counting_client(status_code=500)
+        cache = ResponseCache(ttl=60, max_size=10)
+        request = ProxyRequest(message="m")
+        await proxy_request(request, client, cache=cache)
+        await proxy_request(request, client, cache=cache)
+        assert len(calls) == 2
@@ -0,0 +1,115 @@
+"""Unit tests for the local upstream and storage simulator."""
+
+import json
+import random
+import statistics
+import time
+
+import httpx
+import pytest
+
+from settings.simulator import SimulatorSettings
+from simulator import (
+    FaultProfile,
+    LatencyModel,
+    SimulatedBackend,
+    SimulatedUpstreamTransport,
+    Throttle,
+    create_simulated_backend,
+    create_upstream_app,
+)
+from simulator.storage import SimulatedStorageError
+
+
+class TestLatencyModel:
+    def test_fixed_and_none(self):
+        rng = random.Random(0)
+        assert LatencyModel("fixed", median=0.2).sample(rng) == 0.2
+        assert LatencyModel("none", median=0.2).sample(rng) == 0.0
+
+    def test_lognormal_is_centred_on_median(self):
+        rng = random.Random(0)
+        model = LatencyModel("lognormal", median=0.1, sigma=0.5)
+        samples = [model.sample(rng) for _ in range(5000)]
+        assert statistics.median(samples) == pytest.approx(0.1, rel=0.1)
+
+    def test_long_tail_has_slow_outliers(self):
+        rng = random.Random(0)
+        model = LatencyModel("long_tail", median=0.01, sigma=0.1, tail_probability=0.05)
+        samples = [model.sample(rng) for _ in range(5000)]
+        tail = [s for s in samples if s >= 0.01 * model.tail_multiplier]
+        assert len(tail) / len(samples) == pytest.approx(0.05, abs=0.02)
+
+
+def test_throttle_spaces_out_reservations():
+    throttle = Throttle(100)
+    delays = [throttle.reserve() for _ in range(10)]
+    assert delays[-1] == pytest.approx(0.1, abs=0.02)
+    assert Throttle(0).reserve(1e9) == 0.0
+
+
+def profile(**kwargs):
+    return FaultProfile(LatencyModel("none"), rng=random.Random(0), **kwargs)
+
+
+class TestSimulatedUpstream:
+    @pytest.mark.asyncio
+    async def test_echoes_like_httpbin(self):
+        transport = SimulatedUpstreamTransport(profile())
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.post("http://upstream/post", json={"a": 1})
+        assert response.status_code == 200
+        assert response.json()["json"] == {"a": 1}
+
+    @pytest.mark.asyncio
+    async def test_injects_errors_and_resets(self):
+        errors = SimulatedUpstreamTransport(profile(error_rate=1.0), error_status=502)
+        resets = SimulatedUpstreamTransport(profile(reset_rate=1.0))
+        async with httpx.AsyncClient(transport=errors) as client:
+            assert (await client.post("http://upstream/post")).status_code == 502
+        async with httpx.AsyncClient(transport=resets) as client:
+            with pytest.raises(httpx.ReadError):
+                await client.post("http://upstream/post")
+
+    @pytest.mark.asyncio
+    async def test_latency_is_applied(self):
+        slow = FaultProfile(LatencyModel("fixed", median=0.05))
+        transport = SimulatedUpstreamTransport(slow)
+        async with httpx.AsyncClient(transport=transport) as client:
+            started = time.perf_counter()
+            await client.post("http://upstream/post")
+        assert time.perf_counter() - started >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_asgi_app_serves_the_same_contract(self):
+        app = create_upstream_app(SimulatorSettings(upstream_latency="none"))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://upstream"
+        ) as client:
+            response = await client.post("/post", content=json.dumps({"a": 1}))
+        assert response.status_code == 200
+        assert response.json()["json"] == {"a": 1}
+
+
+class TestSimulatedBackend:
+    def test_stores_objects(self):
+        backend = SimulatedBackend(profile())
+        backend.write_stream("a", [b"x", b"y"], "text/plain")
+        assert backend.inner.objects["a"].data == b"xy"
+        assert backend.stat("a") is not None
+
+    def test_injects_failures(self):
+        backend = SimulatedBackend(profile(error_rate=1.0))
+        with pytest.raises(SimulatedStorageError):
+            backend.write("a", b"x", "text/plain")
+        assert backend.stat("a") is None
+
+    def test_bandwidth_cap(self):
+        backend = create_simulated_backend(
+            SimulatorSettings(storage_latency="none", storage_bandwidth=10_000)
+        )
+        started = time.perf_counter()
+        backend.write("a", b"x" * 1000, "text/plain")
+        backend.write("b", b"x" * 1000, "text/plain")
+        assert time.perf_counter() - started >= 0.15
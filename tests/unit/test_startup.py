@@ -0,0 +1,83 @@
+"""Unit tests for the startup timeline."""
+
+import builtins
+import sys
+
+from prometheus_client import REGISTRY
+
+from startup import StartupTimeline, process_age
+
+
+def test_import_groups_are_timed_without_an_import_hook(tmp_path, monkeypatch):
+    (tmp_path / "slow_startup_module.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(tmp_path)
+    original = builtins.__import__
+    timeline = StartupTimeline()
+
+    timeline.start_imports()
+    try:
+        with timeline.import_group("slow"):
+            assert builtins.__import__ is original
+            import slow_startup_module  # noqa: F401
+        timeline.finish_imports()
+        assert timeline.phases["import:slow"] >= 0.05
+        assert timeline.phases["imports"] >= timeline.phases["import:slow"]
+
+        # Running the group again, with its module cached, keeps the first time
+        with timeline.import_group("slow"):
+            import slow_startup_module  # noqa: F401, F811
+        assert timeline.phases["import:slow"] >= 0.05
+    finally:
+        sys.modules.pop("slow_startup_module", None)
+
+
+def test_app_import_groups_are_timed():
+    import src.app  # noqa: F401
+    from startup import timeline as app_timeline
+
+    assert {
+        "import:fastapi",
+        "import:settings",
+        "import:clients",
+        "import:services",
+        "import:middleware",
+        "import:routes",
+        "imports",
+    } <= app_timeline.phases.keys()
+
+
+def test_finish_imports_is_idempotent():
+    timeline = StartupTimeline()
+    timeline.start_imports()
+    timeline.finish_imports()
+    first = timeline.phases["imports"]
+    timeline.finish_imports()
+    assert timeline.phases["imports"] == first
+
+
+def test_phase_records_duration_even_on_error():
+    timeline = StartupTimeline()
+    try:
+        with timeline.phase("lifespan"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert timeline.phases["lifespan"] >= 0
+
+
+def test_publish_exports_phases():
+    timeline = StartupTimeline()
+    timeline.phases["create_app"] = 0.25
+
+    phases = timeline.publish()
+
+    assert phases["create_app"] == 0.25
+    assert phases["ready"] > 0
+    age = process_age()
+    if age is not None:
+        assert phases["ready"] <= age
+        assert phases["interpreter"] >= 0
+    assert (
+        REGISTRY.get_sample_value("app_startup_seconds", {"phase": "create_app"})
+        == 0.25
+    )
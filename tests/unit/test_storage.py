@@ -0,0 +1,74 @@
+"""Unit tests for the storage backends behind the bucket client."""
+
+import os
+
+import pytest
+
+from clients.gcs_client import GCSBucketClient
+from clients.storage import (
+    GCSBackend,
+    LocalBackend,
+    MemoryBackend,
+    create_storage_backend,
+)
+from settings.gcsbucket import GCSBucketSettings
+
+
+class TestLocalBackend:
+    @pytest.mark.parametrize("fsync", ["never", "always", "batch"])
+    def test_write_creates_object_atomically(self, tmp_path, fsync):
+        backend = LocalBackend(str(tmp_path), fsync=fsync, fsync_interval=0.01)
+        backend.write("batches/a.ndjson", b"first", "application/x-ndjson")
+        backend.write("batches/a.ndjson", b"second", "application/x-ndjson")
+        backend.close()
+
+        assert (tmp_path / "batches" / "a.ndjson").read_bytes() == b"second"
+        # No temporary files are left behind next to the object
+        assert os.listdir(tmp_path / "batches") == ["a.ndjson"]
+
+    def test_batch_mode_syncs_pending_objects_on_close(self, tmp_path):
+        backend = LocalBackend(str(tmp_path), fsync="batch", fsync_interval=60)
+        backend.write("a.json", b"{}", "application/json")
+        assert backend._pending
+        backend.close()
+        assert not backend._pending
+
+    @pytest.mark.parametrize("name", ["../escape.json", "/etc/passwd", "."])
+    def test_rejects_names_outside_root(self, tmp_path, name):
+        backend = LocalBackend(str(tmp_path / "root"), fsync="never")
+        with pytest.raises(ValueError):
+            backend.write(name, b"x", "application/json")
+
+    def test_rejects_unknown_fsync_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            LocalBackend(str(tmp_path), fsync="sometimes")
+
+
+class TestMemoryBackend:
+    def test_retains_most_recent_objects(self):
+        backend = MemoryBackend(max_objects=2)
+        for name in ("a", "b", "c"):
+            backend.write(name, name.encode(), "text/plain")
+        assert list(backend.objects) == ["b", "c"]
+        assert backend.objects["c"][:3] == (b"c", "text/plain", None)
+
+    @pytest.mark.asyncio
+    async def test_client_writes_inline_without_pool(self):
+        backend = MemoryBackend()
+        client = GCSBucketClient("unused", max_workers=1, backend=backend)
+        await client.write_to_bucket("a.json", {"name": "a"})
+        await client.aclose()
+        assert backend.objects["a.json"].data == b'{"name":"a"}'
+
+
+@pytest.mark.parametrize(
+    "backend, expected",
+    [("gcs", GCSBackend), ("local", LocalBackend), ("memory", MemoryBackend)],
+)
+def test_create_storage_backend(tmp_path, backend, expected):
+    gcsbucket = GCSBucketSettings(
+        backend=backend, local_root=str(tmp_path), local_fsync="never"
+    )
+    created = create_storage_backend(gcsbucket)
+    assert isinstance(created, expected)
+    created.close()
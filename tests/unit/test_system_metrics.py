@@ -0,0 +1,78 @@
+"""Unit tests for the background system-metrics sampler."""
+
+import asyncio
+import gc
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+from services.system_metrics import SystemMetricsSampler
+
+SRC = str(Path(__file__).resolve().parents[2] / "src")
+
+# Collects garbage as often as possible while metrics are being updated
+GC_DURING_METRIC_UPDATES = """
+import gc
+from routes.health.metrics import REQUEST_COUNT
+from services.system_metrics import SystemMetricsSampler
+
+sampler = SystemMetricsSampler()
+gc.callbacks.append(sampler._on_gc)
+gc.set_threshold(1)
+for _ in range(20000):
+    REQUEST_COUNT.labels(method="GET", endpoint="/health", status="200").inc()
+    [[] for _ in range(3)]
+sampler.sample()
+"""
+
+
+class TestSystemMetricsSampler:
+    @pytest.mark.asyncio
+    async def test_samples_on_start_and_on_interval(self):
+        sampler = SystemMetricsSampler(interval=0.01)
+        sampler.start()
+        assert REGISTRY.get_sample_value("memory_usage_bytes") > 0
+        assert REGISTRY.get_sample_value("threads") >= 1
+        await asyncio.sleep(0.05)
+        await sampler.aclose()
+        assert REGISTRY.get_sample_value("event_loop_lag_seconds") >= 0
+
+    @pytest.mark.asyncio
+    async def test_gc_pauses_are_published_with_samples_until_closed(self):
+        sampler = SystemMetricsSampler(interval=60)
+        sampler.start()
+        labels = {"generation": "2"}
+        before = REGISTRY.get_sample_value("gc_pause_seconds_count", labels) or 0
+        gc.collect()
+        assert (REGISTRY.get_sample_value("gc_pause_seconds_count", labels) or 0) == (
+            before
+        )
+        sampler.sample()
+        after = REGISTRY.get_sample_value("gc_pause_seconds_count", labels)
+        assert after == before + 1
+        gc.collect()
+        await sampler.aclose()
+        assert REGISTRY.get_sample_value("gc_pause_seconds_count", labels) == after + 1
+        gc.collect()
+        sampler.sample()
+        assert REGISTRY.get_sample_value("gc_pause_seconds_count", labels) == after + 1
+
+    def test_collections_during_metric_updates_do_not_deadlock(self, tmp_path):
+        """
+        In multiprocess mode prometheus_client's lock is not reentrant, and a
+        collection can start while it is held.
+        """
+        env = {
+            **os.environ,
+            "PYTHONPATH": SRC,
+            "PROMETHEUS_MULTIPROC_DIR": str(tmp_path),
+        }
+        subprocess.run(
+            [sys.executable, "-c", GC_DURING_METRIC_UPDATES],
+            env=env,
+            check=True,
+            timeout=60,
+        )
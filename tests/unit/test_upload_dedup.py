@@ -0,0 +1,122 @@
+"""Unit tests for content-hash deduplication of bucket uploads."""
+
+import pytest
+from prometheus_client import REGISTRY
+
+from clients.dedup import UploadIndex
+from clients.gcs_client import GCSBucketClient, GCSBucketClientError
+from clients.storage import (
+    LocalBackend,
+    MemoryBackend,
+    ObjectInfo,
+    PreconditionFailed,
+    content_md5,
+)
+
+
+def skipped(reason):
+    return (
+        REGISTRY.get_sample_value("gcs_upload_skipped_total", {"reason": reason}) or 0
+    )
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, *args, **kwargs):
+        self.writes += 1
+        return super().write(*args, **kwargs)
+
+
+def test_upload_index_is_bounded():
+    index = UploadIndex(max_entries=2)
+    index.put("a", "x", 1)
+    index.put("b", "y", 2)
+    index.get("a")
+    index.put("c", "z", 3)
+    assert len(index) == 2
+    assert index.get("b") is None
+    assert index.get("a").generation == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_rewrites_are_skipped():
+    backend = CountingBackend()
+    client = GCSBucketClient("unused", backend=backend, dedup_index=UploadIndex())
+    before = skipped("unchanged")
+
+    await client.write_to_bucket("a.json", {"v": 1})
+    await client.write_to_bucket("a.json", {"v": 1})
+    await client.write_to_bucket("a.json", {"v": 2})
+    await client.aclose()
+
+    assert backend.writes == 2
+    assert backend.objects["a.json"].data == b'{"v":2}'
+    assert skipped("unchanged") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_conditional_writes_between_workers():
+    """
+    Two workers share a bucket but not an index.
+    """
+    backend = CountingBackend()
+    first, second = (
+        GCSBucketClient(
+            "unused",
+            backend=backend,
+            dedup_index=UploadIndex(),
+            conditional_writes=True,
+        )
+        for _ in range(2)
+    )
+    before = skipped("unchanged_remote")
+
+    await first.write_to_bucket("a.json", {"v": 1})
+    # Same bytes already stored by the other worker: nothing is overwritten
+    await second.write_to_bucket("a.json", {"v": 1})
+    assert backend.objects["a.json"].generation == 1
+    assert skipped("unchanged_remote") - before == 1
+
+    # The first worker's view is now stale; it re-checks and replaces the object
+    await second.write_to_bucket("a.json", {"v": 2})
+    await first.write_to_bucket("a.json", {"v": 3})
+    assert backend.objects["a.json"].data == b'{"v":3}'
+    # Three versions were stored; the rejected attempts never replaced anything
+    assert backend.objects["a.json"].generation == 3
+
+
+@pytest.mark.asyncio
+async def test_conditional_write_gives_up_on_constant_conflicts():
+    class ContendedBackend(MemoryBackend):
+        def write(self, file_name, *args, **kwargs):
+            raise PreconditionFailed(file_name)
+
+        def stat(self, file_name):
+            return ObjectInfo(7, content_md5(b"other"))
+
+    client = GCSBucketClient(
+        "unused",
+        backend=ContendedBackend(),
+        dedup_index=UploadIndex(),
+        conditional_writes=True,
+    )
+    with pytest.raises(GCSBucketClientError):
+        await client.write_to_bucket("a.json", {"v": 1})
+    await client.aclose()
+
+
+def test_local_backend_preconditions(tmp_path):
+    backend = LocalBackend(str(tmp_path), fsync="never")
+    generation = backend.write("a.json", b"1", "application/json", None, 0)
+    with pytest.raises(PreconditionFailed):
+        backend.write("a.json", b"2", "application/json", None, 0)
+    with pytest.raises(PreconditionFailed):
+        backend.write("a.json", b"2", "application/json", None, generation + 1)
+    backend.write("a.json", b"2", "application/json", None, generation)
+
+    assert backend.stat("a.json").md5 == content_md5(b"2")
+    assert backend.stat("missing.json") is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json"]
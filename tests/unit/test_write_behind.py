@@ -0,0 +1,128 @@
+"""Unit tests for the write-behind batching queue."""
+
+import asyncio
+import json
+
+import pytest
+from services.write_behind import WriteBehindQueue, WriteBehindQueueFull
+
+
+class RecordingGCSClient:
+    def __init__(self):
+        self.objects = {}
+
+    async def write_bytes(self, file_name, data, content_type="application/json"):
+        self.objects[file_name] = data
+
+    async def write_lines(self, file_stem, lines):
+        file_name = file_stem + ".ndjson"
+        await self.write_bytes(file_name, b"".join(lines))
+        return file_name
+
+
+def payloads(gcs_client):
+    return [
+        [json.loads(line) for line in data.splitlines()]
+        for data in gcs_client.objects.values()
+    ]
+
+
+class TestWriteBehindQueue:
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_count_reached(self):
+        gcs_client = RecordingGCSClient()
+        queue = WriteBehindQueue(gcs_client, max_batch_count=3, max_batch_age=60)
+        queue.start()
+        for i in range(3):
+            await queue.put({"i": i})
+        await asyncio.sleep(0.05)
+        assert payloads(gcs_client) == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_batch_age_reached(self):
+        gcs_client = RecordingGCSClient()
+        queue = WriteBehindQueue(gcs_client, max_batch_count=100, max_batch_age=0.05)
+        queue.start()
+        await queue.put({"i": 0})
+        await asyncio.sleep(0.15)
+        assert payloads(gcs_client) == [[{"i": 0}]]
+        await queue.aclose()
+
+    @pytest.mark.asyncio
+    async def test_batch_objects_are_ndjson(self):
+        gcs_client = RecordingGCSClient()
+        queue = WriteBehindQueue(gcs_client, prefix="b/")
+        queue.start()
+        await queue.put({"i": 0})
+        await queue.aclose()
+        (name,) = gcs_client.objects
+        assert name.startswith("b/") and name.endswith(".ndjson")
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """
+        Without a running flusher the queue fills up and applies backpressure.
+        """
+        queue = WriteBehindQueue(RecordingGCSClient(), max_queue_size=2)
+        await queue.put({"i": 0})
+        await queue.put({"i": 1})
+        with pytest.raises(WriteBehindQueueFull):
+            await queue.put({"i": 2})
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_payloads(self):
+        gcs_client = RecordingGCSClient()
+        queue = WriteBehindQueue(gcs_client, max_batch_count=1000, max_batch_age=60)
+        queue.start()
+        for i in range(5):
+            await queue.put({"i": i})
+        await queue.aclose()
+        assert payloads(gcs_client) == [[{"i": i} for i in range(5)]]
+        with pytest.raises(WriteBehindQueueFull):
+            await queue.put({"i": 5})
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_is_retried_under_the_same_name(self):
+        gcs_client = RecordingGCSClient()
+        attempts = []
+        write_lines = gcs_client.write_lines
+
+        async def flaky_write_lines(file_stem, lines):
+            attempts.append(file_stem)
+            if len(attempts) < 3:
+                raise RuntimeError("bucket unavailable")
+            return await write_lines(file_stem, lines)
+
+        gcs_client.write_lines = flaky_write_lines
+        queue = WriteBehindQueue(gcs_client, max_retries=3, retry_backoff=0.01)
+        queue.start()
+        await queue.put({"i": 0})
+        await queue.aclose()
+        assert payloads(gcs_client) == [[{"i": 0}]]
+        assert len(attempts) == 3 and len(set(attempts)) == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_is_dead_lettered_when_retries_run_out(self, tmp_path):
+        gcs_client = RecordingGCSClient()
+
+        async def failing_write_lines(file_stem, lines):
+            raise RuntimeError("bucket unavailable")
+
+        gcs_client.write_lines = failing_write_lines
+        queue = WriteBehindQueue(
+            gcs_client,
+            max_retries=2,
+            retry_backoff=0.01,
+            prefix="b/",
+            dead_letter_dir=str(tmp_path),
+        )
+        queue.start()
+        await queue.put({"i": 0})
+        await queue.put({"i": 1})
+        await queue.aclose()
+        (dead_letter,) = (tmp_path / "b").iterdir()
+        assert [json.loads(line) for line in dead_letter.read_bytes().splitlines()] == [
+            {"i": 0},
+            {"i": 1},
+        ]